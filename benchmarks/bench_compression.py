@@ -0,0 +1,63 @@
+"""
+CPU time spent compressing compared to bytes saved, for typical batches of 25 events sent to a local collector that
+decompresses them.
+
+    python benchmarks/bench_compression.py [batches]
+"""
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.compression import Compression
+from ga4mp.ga4mp import GtagMP
+from tests.collector import LocalCollector
+
+def events(batches):
+    return [
+        {
+            "name": "bench_purchase",
+            "params": {
+                "transaction_id": f"T{i}",
+                "currency": "USD",
+                "value": 42.5,
+                "page_location": "https://www.example.com/checkout/confirmation",
+                "items": [{"item_id": f"SKU_{i % 50}", "item_name": "Example product", "price": 21.25, "quantity": 2}],
+            },
+        }
+        for i in range(batches * 25)
+    ]
+
+def run(compression, batches):
+    with LocalCollector() as collector:
+        tracker = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-BENCH", client_id="1234.5678", compression=compression))
+        for name in ("plan", "region", "app_version", "experiment"):
+            tracker.store.set_user_property(name, f"{name}_value")
+        payload = events(batches)
+        tracker._add_session_id_and_engagement_time(payload)
+        bodies = [tracker._prepare_batch(batch, domain=tracker._base_domain)[1] for batch in tracker._batch_events(payload)]
+
+        # CPU time of compression alone
+        start = time.process_time()
+        for body in bodies:
+            tracker._compress(body)
+        cpu = time.process_time() - start
+
+        tracker.send(payload)
+        tracker.close()
+        return cpu, sum(len(body) for body in bodies), collector.bytes_received
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print("%-14s %12s %12s %8s %14s" % ("compression", "raw bytes", "sent bytes", "ratio", "CPU us/batch"))
+    for label, compression in (
+        ("none", None),
+        ("gzip level 1", Compression("gzip", level=1)),
+        ("gzip level 6", Compression("gzip", level=6)),
+        ("gzip level 9", Compression("gzip", level=9)),
+        ("deflate 6", Compression("deflate", level=6)),
+    ):
+        cpu, raw, sent = run(compression, batches)
+        print("%-14s %12d %12d %7.1f%% %14.1f" % (label, raw, sent, 100.0 * sent / raw, cpu / batches * 1e6))
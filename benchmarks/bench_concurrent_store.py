@@ -0,0 +1,50 @@
+"""
+Throughput of session updates from many threads: an unsynchronized DictStore (racy), a DictStore behind one global lock
+and ConcurrentStore, whose locks are striped per parameter type and whose reads return snapshot copies. Each thread updates the last interaction time (session parameters) and reads the
+user properties, as a send does.
+
+    python benchmarks/bench_concurrent_store.py [threads] [iterations]
+"""
+import os, sys
+import threading
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.store import ConcurrentStore, DictStore
+
+def run(store, threads, iterations, lock=None):
+    def work():
+        for i in range(iterations):
+            if lock is False:
+                store.update_session_parameter("last_interaction_time_msec", lambda last: max(last, i), default=0)
+                store.get_all_user_properties()
+            elif lock is None:
+                store.update_session_parameter("last_interaction_time_msec", lambda last: max(last, i), default=0)
+                store.get_all_user_properties()
+            else:
+                with lock:
+                    store.update_session_parameter("last_interaction_time_msec", lambda last: max(last, i), default=0)
+                    store.get_all_user_properties()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    for label, store, lock in (
+        ("DictStore (racy)", DictStore(), False),
+        ("DictStore + global lock", DictStore(), threading.Lock()),
+        ("ConcurrentStore", ConcurrentStore(), None),
+    ):
+        store.set_user_property("plan", "gold")
+        elapsed = run(store, threads, iterations, lock)
+        print("%-24s %3d threads  %10.0f updates/s" % (label, threads, threads * iterations / elapsed))
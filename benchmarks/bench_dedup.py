@@ -0,0 +1,53 @@
+"""
+Memory use and cost per event of LRUDeduplicator and BloomDeduplicator holding a growing number of distinct events,
+and the false positive rate of the Bloom filter.
+
+    python benchmarks/bench_dedup.py [events]
+"""
+import os, sys
+import time
+import tracemalloc
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.dedup import BloomDeduplicator, LRUDeduplicator, param_key
+
+def events(start, count):
+    return [{"name": "purchase", "params": {"event_id": f"{i:012d}", "value": 1.0}} for i in range(start, start + count)]
+
+def fill(deduplicator, batches):
+    for batch in batches:
+        deduplicator.filter(batch, scope="1234.5678")
+
+def run(label, factory, count):
+    first = [events(index, 25) for index in range(0, count, 25)]
+    replay = [events(index, 25) for index in range(0, count, 25)]
+
+    # memory is measured on its own, since tracing allocations slows everything down
+    tracemalloc.start()
+    deduplicator = factory()
+    fill(deduplicator, first)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del deduplicator
+
+    deduplicator = factory()
+    start = time.perf_counter()
+    fill(deduplicator, first)
+    insert = time.perf_counter() - start
+    start = time.perf_counter()
+    fill(deduplicator, replay)
+    lookup = time.perf_counter() - start
+
+    fresh = sum(len(deduplicator.filter([event], scope="1234.5678")) for event in events(count, 10000))
+    print("%-34s %9d events  %8.1f MB  %6.2f us/new event  %6.2f us/duplicate  %6.3f%% false positives" % (
+        label, count, memory / 1e6, insert / count * 1e6, lookup / count * 1e6, (10000 - fresh) / 100))
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    key = param_key("event_id")
+    run("LRUDeduplicator", lambda: LRUDeduplicator(max_size=count * 2, key=key), count)
+    run("BloomDeduplicator (error 0.01%)", lambda: BloomDeduplicator(capacity=count * 2, key=key), count)
+    run("BloomDeduplicator (error 1%)", lambda: BloomDeduplicator(capacity=count * 2, error_rate=0.01, key=key), count)
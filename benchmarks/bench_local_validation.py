@@ -0,0 +1,50 @@
+"""
+Throughput of LocalValidator on a file of JSON lines, each holding a 25-event request.
+
+    python benchmarks/bench_local_validation.py [requests]
+"""
+import json
+import os, sys
+import tempfile
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.validation import LocalValidator
+
+def write_requests(path, count):
+    with open(path, "w") as requests_file:
+        for i in range(count):
+            request = {
+                "client_id": f"{i}.1700000000",
+                "user_properties": {"plan": {"value": "gold"}, "region": {"value": "emea"}},
+                "events": [
+                    {
+                        "name": "purchase",
+                        "params": {
+                            "currency": "USD",
+                            "value": 42.5,
+                            "transaction_id": f"T{i}-{j}",
+                            "session_id": 1700000000,
+                            "engagement_time_msec": 100,
+                            "items": [{"item_id": "SKU_1", "price": 21.25, "quantity": 2}],
+                        },
+                    }
+                    for j in range(25)
+                ],
+            }
+            requests_file.write(json.dumps(request) + "\n")
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "requests.jsonl")
+        write_requests(path, count)
+        for check_catalog in (False, True):
+            start = time.perf_counter()
+            invalid = sum(1 for _ in LocalValidator(check_catalog=check_catalog).validate_file(path))
+            elapsed = time.perf_counter() - start
+            print("check_catalog=%-5s %8d events  %6.2fs  %10.0f events/s  %d invalid requests" % (
+                check_catalog, count * 25, elapsed, count * 25 / elapsed, invalid))
@@ -0,0 +1,67 @@
+"""
+Per-batch cost of logging on the send path: the statements as they were (f-strings on a logger forced to INFO at
+import) against the lazy, guarded statements with the application's default WARNING level, and the whole send path
+with a transport that returns immediately.
+
+    python benchmarks/bench_logging.py [batches]
+"""
+import logging
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.logs import LogSampler
+from ga4mp.transport import BaseTransport, Response
+
+logger = logging.getLogger("ga4mp.ga4mp")
+
+class NullTransport(BaseTransport):
+    def post(self, url, body, headers):
+        return Response(204, {}, b"")
+
+def previous_statements(batches):
+    # the logging of _http_post and _map_batches before the change
+    domain = "https://www.google-analytics.com/mp/collect"
+    for index in range(batches):
+        logger.info(f"Sending POST to: {domain}")
+        logger.info(f"Batch Number: {index + 1}")
+        logger.info(f"Status code: {204}")
+
+def current_statements(batches, sampler):
+    domain = "https://www.google-analytics.com/mp/collect"
+    for index in range(batches):
+        logger.info("Sending POST to: %s", domain)
+        if logger.isEnabledFor(logging.INFO):
+            sampler.log(logger, logging.INFO, None, "Batch Number: %d", index + 1, batch_index=index)
+            sampler.log(logger, logging.INFO, None, "Status code: %s", 204, batch_index=index, status=204)
+
+def send_path(batches):
+    gtag = GtagMP(api_secret="SECRET", measurement_id="G-BENCH", client_id="1.2", transport=NullTransport())
+    batch = [{"name": "bench_event", "params": {"index": str(i)}} for i in range(25)]
+    start = time.perf_counter()
+    for _ in range(batches):
+        gtag.send(batch)
+    return time.perf_counter() - start
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def report(label, elapsed, batches):
+    print("%-46s %8.2f us/batch" % (label, elapsed / batches * 1e6))
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sampler = LogSampler()
+
+    logger.setLevel(logging.INFO)
+    report("logging statements, logger forced to INFO", measure(previous_statements, batches), batches)
+    report("send path, logger forced to INFO", send_path(batches), batches)
+    logger.setLevel(logging.NOTSET)
+    report("logging statements, disabled (lazy, guarded)", measure(current_statements, batches, sampler), batches)
+    report("send path, logging disabled", send_path(batches), batches)
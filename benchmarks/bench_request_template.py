@@ -0,0 +1,43 @@
+"""
+Per-batch overhead of building a request: formatting the url and rebuilding the request fields and user properties from
+the store for every batch, compared to the request template reused until the user properties change.
+
+    python benchmarks/bench_request_template.py [batches]
+"""
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.store import ConcurrentStore, DictStore
+
+def per_batch_rebuild(tracker, batch, domain):
+    # what _prepare_batch did before request templates
+    url = tracker._build_url(domain=domain)
+    static = tracker._static_request()
+    encoder = tracker._request_encoder
+    return url, encoder.encode_with_prefix(encoder.encode_prefix(static), batch)
+
+def run(label, prepare, tracker, batches):
+    batch = [{"name": "bench_event", "params": {"session_id": 1700000000, "engagement_time_msec": 10}}]
+    domain = tracker._base_domain
+    start = time.perf_counter()
+    for _ in range(batches):
+        prepare(tracker, batch, domain)
+    elapsed = time.perf_counter() - start
+    print("%-52s %7d batches  %7.3fs  %6.2f us/batch" % (label, batches, elapsed, elapsed / batches * 1e6))
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for store_class in (DictStore, ConcurrentStore):
+        store = store_class()
+        store.set_user_property("user_id", "user-42")
+        for i in range(20):
+            store.set_user_property("property_%d" % i, "value_%d" % i)
+        tracker = GtagMP(api_secret="SECRET", measurement_id="G-BENCH", client_id="1234567890.1700000000", store=store)
+        name = store_class.__name__
+        run(f"{name}: url and user properties per batch", per_batch_rebuild, tracker, batches)
+        run(f"{name}: request template", lambda tracker, batch, domain: tracker._prepare_batch(batch, domain=domain), tracker, batches)
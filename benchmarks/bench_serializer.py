@@ -0,0 +1,54 @@
+"""
+Cost of encoding request bodies: json.dumps of the whole request per batch compared to RequestEncoder, which reuses
+the encoded client_id and user properties.
+
+    python benchmarks/bench_serializer.py [batches]
+"""
+import json
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.serializer import JSONSerializer, OrjsonSerializer, RequestEncoder
+
+def run(encode, batches, static, events):
+    start = time.perf_counter()
+    for _ in range(batches):
+        encode(static, events)
+    return time.perf_counter() - start
+
+def prefixed(encoder):
+    # the static part is encoded once, as the request templates of the tracking objects do
+    prefixes = {}
+    def encode(static, events):
+        prefix = prefixes.get(id(static))
+        if prefix is None:
+            prefix = prefixes[id(static)] = encoder.encode_prefix(static)
+        return encoder.encode_with_prefix(prefix, events)
+    return encode
+
+def legacy(static, events):
+    request = dict(static, events=events)
+    return json.dumps(request).encode("utf-8")
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    static = {
+        "client_id": "1234567890.1700000000",
+        "user_id": "user-42",
+        "non_personalized_ads": False,
+        "user_properties": {"property_%d" % i: {"value": "value_%d" % i} for i in range(20)},
+    }
+    events = [{"name": "bench_event", "params": {"index": i, "session_id": 1700000000, "engagement_time_msec": 10}} for i in range(25)]
+
+    encoders = [("json.dumps per request", legacy), ("RequestEncoder (json)", prefixed(RequestEncoder(JSONSerializer())))]
+    try:
+        encoders.append(("RequestEncoder (orjson)", prefixed(RequestEncoder(OrjsonSerializer()))))
+    except ImportError:
+        pass
+    for label, encode in encoders:
+        elapsed = run(encode, batches, static, events)
+        print("%-26s %8.2f us/batch" % (label, elapsed / batches * 1e6))
@@ -0,0 +1,73 @@
+"""
+Throughput of ShardedBulkSender with a growing number of worker processes, against a single GtagBulkMP, sending to a
+local stand-in collector that runs in its own process.
+
+    python benchmarks/bench_sharded.py [events] [max_processes]
+"""
+import functools
+import multiprocessing
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp import schema
+from ga4mp.bulk import GtagBulkMP
+from ga4mp.sharded import ShardedBulkSender
+from tests.collector import LocalCollector
+
+def serve(urls, stop):
+    with LocalCollector() as collector:
+        urls.put(collector.url)
+        stop.wait()
+
+def make_tracker(url):
+    tracker = GtagBulkMP(api_secret="SECRET", measurement_id="G-BENCH", max_workers=8, schema_mode=schema.WARN_ONCE)
+    tracker._base_domain = url + "/mp/collect"
+    return tracker
+
+def records(events, clients=1000):
+    per_client = events // clients
+    return [
+        (
+            f"{client}.1700000000",
+            {"plan": "gold", "region": "emea"},
+            [
+                {"name": "purchase", "params": {"transaction_id": f"T{client}-{i}", "currency": "USD", "value": 42.5,
+                 "items": [{"item_id": f"SKU_{i % 50}", "item_name": "Example product", "price": 21.25, "quantity": 2}]}}
+                for i in range(per_client)
+            ],
+        )
+        for client in range(clients)
+    ]
+
+def report(label, events, elapsed):
+    print("%-28s %8d events  %7.3fs  %9.0f events/s" % (label, events, elapsed, events / elapsed))
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    collector = multiprocessing.Process(target=serve, args=(urls, stop), daemon=True)
+    collector.start()
+    url = urls.get()
+
+    tracker = make_tracker(url)
+    start = time.perf_counter()
+    tracker.send_bulk(records(events))
+    report("GtagBulkMP (1 process)", events, time.perf_counter() - start)
+    tracker.close()
+
+    processes = 1
+    while processes <= max_processes:
+        with ShardedBulkSender(functools.partial(make_tracker, url), processes=processes) as sender:
+            start = time.perf_counter()
+            sender.send_bulk(records(events))
+            report(f"ShardedBulkSender ({processes})", events, time.perf_counter() - start)
+        processes *= 2
+
+    stop.set()
+    collector.join()
@@ -0,0 +1,34 @@
+"""
+Append throughput of SegmentSpool with batched fsyncs compared to an fsync after every event.
+
+    python benchmarks/bench_spool.py [events]
+"""
+import os, sys
+import tempfile
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.spool import SegmentSpool
+
+def run(events, fsync_every, per_call):
+    event = {"name": "bench_event", "params": {"index": "1", "session_id": 1700000000}, "_timestamp_micros": 1700000000000000}
+    with tempfile.TemporaryDirectory() as directory:
+        spool = SegmentSpool(directory, fsync_every=fsync_every, fsync_interval=60)
+        start = time.perf_counter()
+        for _ in range(events // per_call):
+            spool.append([event] * per_call)
+        spool.sync()
+        elapsed = time.perf_counter() - start
+        spool.close()
+    return elapsed
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for fsync_every, per_call in ((1, 1), (1000, 1), (1000, 25)):
+        count = events if fsync_every > 1 else min(events, 2000)
+        elapsed = run(count, fsync_every, per_call)
+        print("fsync_every=%-5d events/append=%-3d %8d events  %7.3fs  %10.0f events/s" % (
+            fsync_every, per_call, count, elapsed, count / elapsed))
@@ -0,0 +1,40 @@
+"""
+Cost of persisting a single change to a FileStore holding many keys: a full rewrite of the JSON file, the change log
+mode, and debounced saves.
+
+    python benchmarks/bench_store.py [keys] [changes]
+"""
+import os, sys
+import tempfile
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.store import FileStore
+
+def run(keys, changes, **kwargs):
+    with tempfile.TemporaryDirectory() as directory:
+        store = FileStore(data_location=os.path.join(directory, "store.json"), **kwargs)
+        for i in range(keys):
+            store["session_parameters"][f"client_{i}"] = {"session_id": 1700000000 + i, "last_interaction_time_msec": 1700000000000}
+        store.compact() if store.journal else store.save()
+        start = time.perf_counter()
+        for i in range(changes):
+            store.set_session_parameter(f"client_{i % keys}", {"session_id": i, "last_interaction_time_msec": 1700000000000 + i})
+            store.save()
+        store.flush()
+        return time.perf_counter() - start
+
+if __name__ == "__main__":
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for label, kwargs in (
+        ("full rewrite", {}),
+        ("journal", {"journal": True}),
+        ("debounced rewrite (1s)", {"save_delay": 1.0}),
+        ("debounced journal (1s)", {"journal": True, "save_delay": 1.0}),
+    ):
+        elapsed = run(keys, changes, **kwargs)
+        print("%-24s %6d keys %5d saves  %8.3f ms/save" % (label, keys, changes, elapsed / changes * 1e3))
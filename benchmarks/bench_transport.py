@@ -0,0 +1,33 @@
+"""
+Compare a connection per batch (UrllibTransport) against keep-alive pooling (PooledTransport)
+when sending to a local stand-in collector.
+
+    python benchmarks/bench_transport.py [batches]
+"""
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.transport import PooledTransport, UrllibTransport
+from tests.collector import LocalCollector
+
+def run(transport, batches):
+    events = [{"name": "bench_event", "params": {"index": str(i)}} for i in range(25 * batches)]
+    with LocalCollector() as collector:
+        gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-BENCH", client_id="1.2", transport=transport))
+        start = time.perf_counter()
+        gtag.send(events)
+        elapsed = time.perf_counter() - start
+        transport.close()
+        return elapsed, collector.connections
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for transport in (UrllibTransport(), PooledTransport()):
+        elapsed, connections = run(transport, batches)
+        print("%-16s %6d batches  %7.3fs  %8.1f batches/s  %5d connections" % (
+            type(transport).__name__, batches, elapsed, batches / elapsed, connections))
@@ -0,0 +1,54 @@
+"""
+Per-event cost of checking event parameters: the original per-call scan of params_dict compared to SchemaValidator.
+
+    python benchmarks/bench_validation.py [events]
+"""
+import logging
+import os, sys
+import time
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp import schema
+from ga4mp.utils import params_dict
+
+logger = logging.getLogger("bench_validation")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+def legacy_check(events):
+    # The checks BaseGa4mp._check_params made before the catalog was compiled.
+    assert type(events) == list, "events should be a list"
+    for event in events:
+        assert isinstance(event, dict), "each event should be an instance of a dictionary"
+        assert "name" in event, 'each event should have a "name" key'
+        assert "params" in event, 'each event should have a "params" key'
+    for e in events:
+        event_name = e["name"]
+        event_params = e["params"]
+        if event_name in params_dict.keys():
+            for parameter in params_dict[event_name]:
+                if parameter not in event_params.keys():
+                    logger.warning(
+                        f"WARNING: Event parameters do not match event type.\nFor {event_name} event type, the correct parameter(s) are {params_dict[event_name]}.\nThe parameter '{parameter}' triggered this warning.\nFor a breakdown of currently supported event types and their parameters go here: https://support.google.com/analytics/answer/9267735\n"
+                    )
+
+def run(check, events, batch):
+    start = time.perf_counter()
+    for i in range(0, len(events), batch):
+        check(events[i : i + batch])
+    return (time.perf_counter() - start) / len(events)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    complete = [{"name": "level_up", "params": {"level": 2, "character": "x"}} for _ in range(count)]
+    incomplete = [{"name": "purchase", "params": {"value": 1.0}} for _ in range(count)]
+    custom = [{"name": "custom_event", "params": {"a": 1}} for _ in range(count)]
+    for label, events in (("complete", complete), ("incomplete", incomplete), ("custom", custom)):
+        print(f"{label} events")
+        print("  %-12s %8.3f us/event" % ("legacy", run(legacy_check, events, 25) * 1e6))
+        for mode in (schema.WARN, schema.WARN_ONCE, schema.OFF):
+            validator = schema.SchemaValidator(mode=mode, logger=logger)
+            print("  %-12s %8.3f us/event" % (mode, run(validator.validate, events, 25) * 1e6))
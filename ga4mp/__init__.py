@@ -1,3 +1,4 @@
 from ga4mp.ga4mp import GtagMP, FirebaseMP
+from ga4mp.aio import AsyncGtagMP, AsyncFirebaseMP
 
-__all__ = ['GtagMP','FirebaseMP']
\ No newline at end of file
+__all__ = ['GtagMP','FirebaseMP','AsyncGtagMP','AsyncFirebaseMP']
\ No newline at end of file
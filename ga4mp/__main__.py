@@ -0,0 +1,15 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import sys
+
+from ga4mp.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
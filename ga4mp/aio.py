@@ -0,0 +1,327 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import asyncio
+import collections
+import http.client
+import io
+import logging
+import random
+import ssl
+import time
+import urllib.error
+import urllib.parse
+
+from ga4mp.ga4mp import GtagMP, FirebaseMP, _TRANSPORT_ERRORS
+from ga4mp.results import SendResult
+from ga4mp.transport import Response
+
+logger = logging.getLogger(__name__)
+
+class AsyncTransport(object):
+    """
+    Parent class for the objects used by the asyncio tracking classes to deliver a request body to a URL.
+
+    Subclasses must implement the coroutine `post()`, with the same contract as `BaseTransport.post()`.
+    """
+
+    async def post(self, url, body, headers):
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
+    async def close(self):
+        pass
+
+class AsyncPooledTransport(AsyncTransport):
+    """
+    Stdlib-only asyncio HTTP/1.1 client that keeps a pool of keep-alive connections per host.
+
+    Parameters
+    ----------
+    max_idle_per_host : int, optional
+        Maximum number of idle connections kept open for each host, by default 10
+    idle_timeout : float, optional
+        Idle connections older than this many seconds are closed instead of reused, by default 60
+    timeout : float, optional
+        Timeout in seconds for a whole request/response exchange, by default 10
+    ssl_context : ssl.SSLContext, optional
+        Context used for https connections, by default `ssl.create_default_context()`
+    """
+
+    def __init__(self, max_idle_per_host=10, idle_timeout=60.0, timeout=10.0, ssl_context=None):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+        # Connections are only touched from the event loop, so the pool needs no lock.
+        self._pool = collections.defaultdict(collections.deque)
+
+    async def post(self, url, body, headers):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        head = self._build_head(key, path, body, headers)
+
+        conn, reused = await self._acquire(key)
+        try:
+            response = await asyncio.wait_for(self._exchange(conn, head, body), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self._close_connection(conn)
+            if not reused:
+                raise urllib.error.URLError(e)
+            # The server closed an idle keep-alive connection; retry once on a fresh one.
+            conn = await self._new_connection(key)
+            try:
+                response = await asyncio.wait_for(self._exchange(conn, head, body), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, http.client.HTTPException) as e:
+                self._close_connection(conn)
+                raise urllib.error.URLError(e)
+        except (OSError, asyncio.TimeoutError, http.client.HTTPException) as e:
+            self._close_connection(conn)
+            raise urllib.error.URLError(e)
+
+        status, response_headers, data, will_close = response
+        if will_close:
+            self._close_connection(conn)
+        else:
+            self._release(key, conn)
+
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, http.client.responses.get(status, ""), response_headers, io.BytesIO(data))
+        return Response(status, response_headers, data)
+
+    async def close(self):
+        """
+        Close every pooled connection.
+        """
+        for idle in self._pool.values():
+            while idle:
+                self._close_connection(idle.popleft()[0])
+        self._pool.clear()
+
+    @property
+    def ssl_context(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    def _build_head(self, key, path, body, headers):
+        scheme, host, port = key
+        default_port = 443 if scheme == "https" else 80
+        lines = [
+            f"POST {path} HTTP/1.1",
+            f"Host: {host}" if port == default_port else f"Host: {host}:{port}",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _exchange(self, conn, head, body):
+        reader, writer = conn
+        writer.write(head + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server before a response was received")
+        version, status, _ = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+        status = int(status)
+
+        raw_headers = b""
+        while True:
+            line = await reader.readline()
+            raw_headers += line
+            if line in (b"\r\n", b"\n", b""):
+                break
+        response_headers = http.client.parse_headers(io.BytesIO(raw_headers))
+
+        will_close = version == "HTTP/1.0" or response_headers.get("Connection", "").lower() == "close"
+        if response_headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        elif response_headers.get("Content-Length") is not None:
+            data = await reader.readexactly(int(response_headers["Content-Length"]))
+        elif status in (204, 304) or 100 <= status < 200:
+            data = b""
+        else:
+            data = await reader.read()
+            will_close = True
+        return status, response_headers, data, will_close
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # skip trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def _acquire(self, key):
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = self._pool[key]
+        while idle:
+            conn, last_used = idle.pop()
+            if last_used >= cutoff and not conn[0].at_eof():
+                return conn, True
+            self._close_connection(conn)
+        return await self._new_connection(key), False
+
+    def _release(self, key, conn):
+        idle = self._pool[key]
+        if len(idle) < self.max_idle_per_host:
+            idle.append((conn, time.monotonic()))
+        else:
+            self._close_connection(conn)
+
+    async def _new_connection(self, key):
+        scheme, host, port = key
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == "https" else None),
+                self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise urllib.error.URLError(e)
+
+    def _close_connection(self, conn):
+        conn[1].close()
+
+class AsyncGa4mpMixin(object):
+    """
+    Turns `send()` and `postponed_send()` of a tracking class into coroutines. Validation and payload building are
+    shared with the synchronous classes; batches are sent concurrently, at most `max_concurrency` at a time, and the
+    same `SendResult` objects are returned.
+
+    Parameters
+    ----------
+    transport : AsyncTransport, optional
+        Object used to deliver the http POST requests, by default an AsyncPooledTransport
+    max_concurrency : int, optional
+        Maximum number of batches in flight at once for a single `send()` call, by default 4
+    """
+
+    def __init__(self, *args, transport: AsyncTransport = None, max_concurrency=4, **kwargs):
+        assert transport is None or isinstance(transport, AsyncTransport), "if supplied, transport must be an instance of AsyncTransport"
+        assert max_concurrency > 0, "max_concurrency should be a positive integer"
+        super().__init__(*args, **kwargs)
+        self._owns_transport = transport is None
+        self.transport = transport or AsyncPooledTransport()
+        self.max_concurrency = max_concurrency
+
+    async def send(self, events, validation_hit=False, postpone=False, date=None):
+        """
+        Coroutine version of `BaseGa4mp.send()`.
+        """
+        with self._sending(events, validation_hit=validation_hit, date=date) as events:
+            if postpone is True:
+                self.batcher.check(events, overhead=self._request_overhead())
+                self._postpone(events)
+            else:
+                batches = self._batch_events(events)
+                results = await self._http_post(batches, validation_hit=validation_hit, date=date)
+                if validation_hit is False:
+                    self._forget_failed(batches, results, scope=self._identity())
+                return results
+
+    async def validate_locally(self, events, debug_sample_rate=0.0):
+        """
+        Coroutine version of `BaseGa4mp.validate_locally()`; the sampled validation hits are awaited.
+        """
+        merged, events = self._validate_batches(events)
+        if debug_sample_rate and random.random() < debug_sample_rate and events:
+            response = await self.send(self._debug_copies(events), validation_hit=True)
+            merged["validationMessages"].extend(response["validationMessages"])
+        return merged
+
+    async def postponed_send(self):
+        """
+        Coroutine version of `BaseGa4mp.postponed_send()`; the batches are sent concurrently.
+        """
+        if self.spool is not None:
+            return await self.spool.drain_async(self)
+
+        batches = self._batch_events(self._event_list)
+        results = await self._http_post(batches, postpone=True)
+        self._keep_unsent(batches, results)
+        return results
+
+    async def close(self):
+        """
+        Coroutine that releases the connections of the default transport and syncs the spool, if any.
+        """
+        if self._owns_transport:
+            await self.transport.close()
+        if self.spool is not None:
+            self.spool.sync()
+
+    def start_background_dispatch(self, *args, **kwargs):
+        raise NotImplementedError("Background dispatch is not available for asyncio tracking objects; schedule send() as a task instead.")
+
+    async def _http_post(self, batched_event_list, validation_hit=False, postpone=False, date=None):
+        self._check_date_not_in_future(date)
+        domain = self._get_domain(validation_hit)
+        logger.info("Sending POST to: %s", domain)
+
+        # send every batch, at most max_concurrency at a time
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def post_batch(batch_index, batch):
+            url, body = self._prepare_batch(batch, domain=domain, postpone=postpone, date=date)
+            async with semaphore:
+                return await self._post_batch(batch_index, len(batch), url, body)
+
+        results = SendResult(await asyncio.gather(*[post_batch(index, batch) for index, batch in enumerate(batched_event_list)]))
+        self._log_results(results)
+
+        if validation_hit:
+            return self._merge_validation_responses(results)
+        return results
+
+    async def _post_batch(self, batch_index, event_count, url, body):
+        # Same steps as BaseGa4mp._post_batch, waiting with asyncio.sleep and awaiting the transport.
+        start = time.perf_counter()
+        body, headers = self._compress(body)
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(self._stream_id())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            attempt_start = time.perf_counter()
+            try:
+                response = await self.transport.post(url, body, headers)
+            except _TRANSPORT_ERRORS as e:
+                delay = self._retry_delay(batch_index, attempt, attempt_start, e, len(body))
+                if delay is None:
+                    return self._batch_result(batch_index, event_count, start, attempt, len(body), error=e)
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                return self._batch_result(batch_index, event_count, start, attempt, len(body), response=response, attempt_start=attempt_start)
+
+class AsyncGtagMP(AsyncGa4mpMixin, GtagMP):
+    """
+    Asyncio version of `GtagMP`; `send()` and `postponed_send()` must be awaited.
+
+    >>> ga = AsyncGtagMP(api_secret="API_SECRET", measurement_id="MEASUREMENT_ID", client_id="CLIENT_ID", max_concurrency=8)
+    >>> await ga.send(events)
+    """
+
+class AsyncFirebaseMP(AsyncGa4mpMixin, FirebaseMP):
+    """
+    Asyncio version of `FirebaseMP`; `send()` and `postponed_send()` must be awaited.
+
+    >>> ga = AsyncFirebaseMP(api_secret="API_SECRET", firebase_app_id="FIREBASE_APP_ID", app_instance_id="APP_INSTANCE_ID")
+    >>> await ga.send(events)
+    """
@@ -0,0 +1,165 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+from ga4mp.serializer import JSONSerializer
+
+# Measurement Protocol limits: https://developers.google.com/analytics/devguides/collection/protocol/ga4/sending-events#limitations
+MAX_EVENTS_PER_REQUEST = 25
+MAX_REQUEST_BYTES = 130 * 1024
+
+class PayloadTooLargeError(ValueError):
+    """
+    Raised when a single event does not fit in a request under the byte limit.
+    """
+
+    def __init__(self, index, event_name, size, limit):
+        self.index = index
+        self.event_name = event_name
+        self.size = size
+        self.limit = limit
+        super().__init__(
+            f"Event {index} ({event_name}) takes {size} bytes, more than the {limit} bytes available in a single request."
+        )
+
+class Batch(list):
+    """
+    Events of one request, as returned by `SizeAwareBatcher.batch()`, with their JSON array as encoded while they were
+    measured (`encoded`), so that `RequestEncoder` writes it into the request instead of encoding the events again.
+    The encoding is only valid as long as the events are not changed.
+    """
+
+    __slots__ = ("encoded",)
+
+    def __init__(self, events=(), encoded=None):
+        super().__init__(events)
+        self.encoded = encoded
+
+class SizeAwareBatcher(object):
+    """
+    Packs events into batches that stay under both the event count and the byte size limit of a request.
+
+    Batches are encoded as a whole first; if every batch of `max_events` events fits under `max_bytes`, they are used
+    as they are. Otherwise the encoded size of every event is measured and the events are packed in order, starting a
+    new batch whenever the next event does not fit, or with `first_fit_decreasing=True`, largest first into the first
+    batch with room, which fills requests more evenly but does not keep events in order across batches (events keep
+    their order within a batch). Either way, every batch keeps the encoding made to measure it (see `Batch`), so
+    events are encoded once per send.
+
+    Parameters
+    ----------
+    max_events : int, optional
+        Maximum number of events per batch, by default 25
+    max_bytes : int, optional
+        Maximum size of an encoded request in bytes, by default 133120 (130 KB)
+    first_fit_decreasing : bool, optional
+        Boolean to depict if events should be packed largest first, by default False
+    serializer : JSONSerializer, optional
+        Serializer used to measure events, by default a `JSONSerializer`
+    """
+
+    def __init__(self, max_events=MAX_EVENTS_PER_REQUEST, max_bytes=MAX_REQUEST_BYTES, first_fit_decreasing=False, serializer=None):
+        assert 0 < max_events <= MAX_EVENTS_PER_REQUEST, f"max_events should be between 1 and {MAX_EVENTS_PER_REQUEST}"
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.first_fit_decreasing = first_fit_decreasing
+        self.serializer = serializer or JSONSerializer()
+
+    def batch(self, events, overhead=0):
+        """
+        Method to split events into batches.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events to send.
+        overhead : int, optional
+            Encoded size of everything in a request but its events (client_id, user properties, ...), by default 0
+
+        Returns
+        -------
+        List[Batch]
+            The batches of events.
+
+        Raises
+        ------
+        PayloadTooLargeError
+            If an event does not fit in a request by itself.
+        """
+        budget = self.max_bytes - overhead
+        dumps = self.serializer.dumps
+        batches = []
+        for index in range(0, len(events), self.max_events):
+            batch = Batch(events[index : index + self.max_events])
+            batch.encoded = dumps(batch)
+            if len(batch.encoded) > budget:
+                break
+            batches.append(batch)
+        else:
+            return batches
+
+        encoded = self._encode_each(events, budget)
+        if self.first_fit_decreasing:
+            batches = self._first_fit_decreasing(events, encoded, budget)
+        else:
+            batches = self._next_fit(events, encoded, budget)
+        for batch, indexes in batches:
+            batch.encoded = b"[" + b",".join(encoded[index] for index in indexes) + b"]"
+        return [batch for batch, _ in batches]
+
+    def check(self, events, overhead=0):
+        """
+        Method to make sure every event fits in a request by itself, raising a `PayloadTooLargeError` otherwise.
+        """
+        budget = self.max_bytes - overhead
+        if len(self.serializer.dumps(events)) > budget:
+            self._encode_each(events, budget)
+
+    def _encode_each(self, events, budget):
+        # Encoding of every event. Within the events array, an event takes its size plus one byte for the comma or
+        # bracket after it, so a batch of events takes 1 + sum(len(encoding) + 1) bytes.
+        dumps = self.serializer.dumps
+        encoded = []
+        for index, event in enumerate(events):
+            encoding = dumps(event)
+            if len(encoding) + 2 > budget:
+                raise PayloadTooLargeError(index, event.get("name"), len(encoding) + 2, budget)
+            encoded.append(encoding)
+        return encoded
+
+    def _next_fit(self, events, encoded, budget):
+        # (batch, event indexes) pairs
+        batches = []
+        batch, indexes, used = Batch(), [], 1
+        for index, event in enumerate(events):
+            size = len(encoded[index]) + 1
+            if len(batch) == self.max_events or used + size > budget:
+                batches.append((batch, indexes))
+                batch, indexes, used = Batch(), [], 1
+            batch.append(event)
+            indexes.append(index)
+            used += size
+        if batch:
+            batches.append((batch, indexes))
+        return batches
+
+    def _first_fit_decreasing(self, events, encoded, budget):
+        sizes = [len(encoding) + 1 for encoding in encoded]
+        bins = []  # [used bytes, event indexes]
+        for index in sorted(range(len(events)), key=sizes.__getitem__, reverse=True):
+            size = sizes[index]
+            for packed in bins:
+                if len(packed[1]) < self.max_events and packed[0] + size <= budget:
+                    packed[0] += size
+                    packed[1].append(index)
+                    break
+            else:
+                bins.append([1 + size, [index]])
+        # batches in the order of their first event, events in their original order
+        ordered = sorted(sorted(indexes) for _, indexes in bins)
+        return [(Batch(events[index] for index in indexes), indexes) for indexes in ordered]
@@ -0,0 +1,171 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import logging
+import time
+
+from ga4mp import schema
+from ga4mp.ga4mp import GtagMP, FirebaseMP, _REQUEST_OVERHEAD_MARGIN
+from ga4mp.retry import RetryPolicy
+from ga4mp.batching import SizeAwareBatcher
+from ga4mp.compression import Compression
+from ga4mp.logs import LogSampler
+from ga4mp.ratelimit import RateLimiter
+from ga4mp.dedup import Deduplicator
+from ga4mp.metrics import Metrics
+from ga4mp.serializer import JSONSerializer
+from ga4mp.session import DEFAULT_SESSION_TIMEOUT
+from ga4mp.transport import BaseTransport
+
+logger = logging.getLogger(__name__)
+
+class BulkMixin(object):
+    """
+    Sends events on behalf of many clients from a single tracking object.
+
+    Events are given as `(id, user_properties, events)` records, where `id` is a client_id (gtag) or an app_instance_id
+    (Firebase). Events of the same id are grouped into payloads of up to 25 events and 130 KB, and every payload goes
+    through the tracking object's transport (and thread pool, if `max_workers` is set). Each id gets its own session_id and
+    engagement time from the tracking object's `SessionManager`, which starts a new session after `session_timeout`
+    seconds of inactivity and drops the sessions of inactive ids.
+    """
+
+    _id_field = None
+
+    def send(self, *args, **kwargs):
+        raise NotImplementedError("Bulk tracking objects send events for many ids; use send_bulk() instead.")
+
+    def send_bulk(self, records, validation_hit=False):
+        """
+        Method to send the events of many clients.
+
+        Parameters
+        ----------
+        records : Iterable[Tuple[str, Dict, List[Dict]]]
+            `(id, user_properties, events)` records. `user_properties` may be None; `events` follows the format of
+            `BaseGa4mp.send()`. Several records may share the same id.
+        validation_hit : bool, optional
+            Boolean to depict if events should be tested against the Measurement Protocol Validation Server, by default False
+
+        Returns
+        -------
+        SendResult or Dict
+            The result of every payload, in the order the ids were first seen, or the validation server response for a
+            validation hit.
+        """
+        grouped = {}
+        try:
+            for client_id, user_properties, events in records:
+                self._check_params(events)
+                if self.deduplicator is not None and validation_hit is False:
+                    events = self.deduplicator.filter(events, scope=client_id)
+                if client_id in grouped:
+                    grouped[client_id][0].update(user_properties or {})
+                    grouped[client_id][1].extend(events)
+                else:
+                    grouped[client_id] = (dict(user_properties or {}), list(events))
+                if self.metrics.enabled:
+                    self.metrics.on_enqueue(len(events))
+
+            # drop the sessions of clients that have been inactive for longer than the session timeout
+            self.sessions.evict_expired()
+
+            batches = []
+            for client_id, (user_properties, events) in grouped.items():
+                self._add_client_session(client_id, events)
+                prefix = self._request_prefix(client_id, user_properties)
+                for batch in self._batch_events(events, overhead=len(prefix) + _REQUEST_OVERHEAD_MARGIN):
+                    batches.append((client_id, prefix, batch))
+        except BaseException:
+            # nothing was sent: the events remembered so far are forgotten, so that a corrected redelivery is not dropped
+            if self.deduplicator is not None and validation_hit is False:
+                for client_id, (_, events) in grouped.items():
+                    self.deduplicator.forget(events, scope=client_id)
+            raise
+
+        url = self._request_template(self._get_domain(validation_hit)).url
+
+        def post_batch(batch_index, batch):
+            _, prefix, events = batch
+            if not self.metrics.enabled:
+                return self._post_batch(batch_index, len(events), url, self._request_encoder.encode_with_prefix(prefix, events))
+            start = time.perf_counter()
+            body = self._request_encoder.encode_with_prefix(prefix, events)
+            self.metrics.on_serialize(time.perf_counter() - start, len(body))
+            return self._post_batch(batch_index, len(events), url, body)
+
+        results = self._map_batches(post_batch, batches)
+        if validation_hit:
+            return self._merge_validation_responses(results)
+        if self.deduplicator is not None:
+            for (client_id, _, events), result in zip(batches, results):
+                if not result.ok:
+                    self.deduplicator.forget(events, scope=client_id)
+        return results
+
+    def forget_client(self, client_id):
+        """
+        Method to drop the session state kept for a client.
+        """
+        self.sessions.forget(client_id)
+
+    def _request_prefix(self, client_id, user_properties):
+        # The id and user properties of a client, encoded once for all of its batches.
+        static = {self._id_field: client_id}
+        self._add_user_props_to_hit(static, user_properties)
+        return self._request_encoder.encode_prefix(static)
+
+    def _add_client_session(self, client_id, events):
+        # Same logic as BaseGa4mp._add_session_id_and_engagement_time, with the sessions kept by the session manager.
+        for event in events:
+            current_time_in_milliseconds = int(time.time() * 1000)
+
+            event_params = event["params"]
+            if "session_id" not in event_params or "engagement_time_msec" not in event_params:
+                session_id, engagement_time = self.sessions.touch(client_id, current_time_in_milliseconds)
+                event_params.setdefault("session_id", session_id)
+                event_params.setdefault("engagement_time_msec", engagement_time)
+
+class GtagBulkMP(BulkMixin, GtagMP):
+    """
+    Bulk sender for gtag data streams; see `BulkMixin`.
+
+    Parameters
+    ----------
+    measurement_id : string
+        The identifier for a Data Stream.
+
+    Examples
+    --------
+    >>> ga = GtagBulkMP(api_secret="API_SECRET", measurement_id="MEASUREMENT_ID", max_workers=8)
+    >>> ga.send_bulk([
+    ...     ("1234.5678", {"plan": "gold"}, [{"name": "level_up", "params": {"level": "2"}}]),
+    ...     ("9876.5432", None, [{"name": "level_end", "params": {"level_name": "First"}}]),
+    ... ])
+    """
+
+    _id_field = "client_id"
+
+    def __init__(self, api_secret, measurement_id, transport: BaseTransport = None, max_workers: int = None, retry: RetryPolicy = None, schema_mode: str = schema.WARN, serializer: JSONSerializer = None, session_timeout: float = DEFAULT_SESSION_TIMEOUT, batcher: SizeAwareBatcher = None, compression: Compression = None, metrics: Metrics = None, log_sampler: LogSampler = None, rate_limiter: RateLimiter = None, deduplicator: Deduplicator = None):
+        super().__init__(api_secret, measurement_id, client_id=None, transport=transport, max_workers=max_workers, retry=retry, schema_mode=schema_mode, serializer=serializer, session_timeout=session_timeout, batcher=batcher, compression=compression, metrics=metrics, log_sampler=log_sampler, rate_limiter=rate_limiter, deduplicator=deduplicator)
+
+class FirebaseBulkMP(BulkMixin, FirebaseMP):
+    """
+    Bulk sender for Firebase apps, keyed by app_instance_id; see `BulkMixin`.
+
+    Parameters
+    ----------
+    firebase_app_id : string
+        The identifier for a Firebase app.
+    """
+
+    _id_field = "app_instance_id"
+
+    def __init__(self, api_secret, firebase_app_id, transport: BaseTransport = None, max_workers: int = None, retry: RetryPolicy = None, schema_mode: str = schema.WARN, serializer: JSONSerializer = None, session_timeout: float = DEFAULT_SESSION_TIMEOUT, batcher: SizeAwareBatcher = None, compression: Compression = None, metrics: Metrics = None, log_sampler: LogSampler = None, rate_limiter: RateLimiter = None, deduplicator: Deduplicator = None):
+        super().__init__(api_secret, firebase_app_id, app_instance_id=None, transport=transport, max_workers=max_workers, retry=retry, schema_mode=schema_mode, serializer=serializer, session_timeout=session_timeout, batcher=batcher, compression=compression, metrics=metrics, log_sampler=log_sampler, rate_limiter=rate_limiter, deduplicator=deduplicator)
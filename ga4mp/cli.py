@@ -0,0 +1,474 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from ga4mp import schema
+from ga4mp.batching import PayloadTooLargeError
+from ga4mp.bulk import GtagBulkMP, FirebaseBulkMP
+from ga4mp.ga4mp import _REQUEST_OVERHEAD_MARGIN
+from ga4mp.metrics import MetricsRecorder
+from ga4mp.ratelimit import FileTokenBucket, TokenBucket
+from ga4mp.transport import BaseTransport, Response
+from ga4mp.validation import LocalValidator
+
+# CSV columns holding user properties, and columns holding fields of the event rather than parameters.
+_USER_PROPERTY_PREFIX = "user_properties."
+_CSV_EVENT_FIELDS = ("name", "timestamp_micros")
+# Request fields that BaseGa4mp._add_user_props_to_hit() takes from the user properties.
+_REQUEST_USER_FIELDS = ("user_id", "non_personalized_ads")
+# Room for the session_id and engagement_time_msec parameters added to every event by send_bulk()
+_SESSION_PARAMS_MARGIN = 64
+_NUMBER_PATTERN = re.compile(r"-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?\Z")
+
+class ImportRecord(object):
+    """
+    One parsed line (NDJSON) or row (CSV) of an import file: the events of one client, or the error that keeps it from
+    being sent, and the position right after it in the file.
+    """
+
+    __slots__ = ("line", "offset", "end_line", "client_id", "user_properties", "events", "error")
+
+    def __init__(self, line, offset, end_line, client_id=None, user_properties=None, events=None, error=None):
+        self.line = line
+        self.offset = offset
+        self.end_line = end_line
+        self.client_id = client_id
+        self.user_properties = user_properties
+        self.events = events
+        self.error = error
+
+class DryRunTransport(BaseTransport):
+    """
+    Transport that accepts every request without sending it, for `--dry-run`.
+    """
+
+    def post(self, url, body, headers):
+        return Response(204, {}, b"")
+
+def _read_lines(path, offset, line):
+    # Yield (line number, offset after the line, line) from a byte offset, reading one line at a time.
+    with open(path, "rb") as infile:
+        infile.seek(offset)
+        for raw in infile:
+            offset += len(raw)
+            line += 1
+            yield line, offset, raw
+
+def read_ndjson(path, id_field, offset=0, line=0):
+    """
+    Function to stream the records of a file of JSON lines.
+
+    Every line holds either a request, `{"<id_field>": ..., "user_properties": {...}, "events": [...]}`, or a single
+    event with its client, `{"<id_field>": ..., "name": ..., "params": {...}}`. User properties are given as plain
+    values (`{"plan": "gold"}`) or in the request format (`{"plan": {"value": "gold"}}`). The `timestamp_micros` of a
+    request is carried to its events that have none, and `user_id` and `non_personalized_ads` go with the user
+    properties, as the tracking objects expect them.
+
+    Yields
+    ------
+    ImportRecord
+        A record per non-empty line, with an error if the line cannot be parsed.
+    """
+    for line, end, raw in _read_lines(path, offset, line):
+        if not raw.strip():
+            continue
+        try:
+            document = json.loads(raw)
+            if not isinstance(document, dict):
+                raise ValueError("line is not a JSON object")
+            client_id = document.get(id_field)
+            user_properties = _plain_user_properties(document.get("user_properties"))
+            for field in _REQUEST_USER_FIELDS:
+                if field in document:
+                    user_properties[field] = document[field]
+            if "events" in document:
+                events = document["events"]
+                if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+                    raise ValueError("events must be a list of objects")
+                timestamp_micros = document.get("timestamp_micros")
+                if timestamp_micros is not None:
+                    for event in events:
+                        event.setdefault("timestamp_micros", timestamp_micros)
+            else:
+                events = [{key: value for key, value in document.items() if key not in (id_field, "user_properties") + _REQUEST_USER_FIELDS}]
+            for event in events:
+                event.setdefault("params", {})
+                _check_event(event)
+        except ValueError as e:
+            yield ImportRecord(line, end, line, error=f"line {line}: {e}")
+            continue
+        yield ImportRecord(line, end, line, client_id, user_properties, events)
+
+def read_csv(path, id_field, offset=0, line=0):
+    """
+    Function to stream the records of a CSV file with a header row, one event per row.
+
+    The `<id_field>` column identifies the client and `name` the event; `timestamp_micros` and `user_id` are optional.
+    Columns named `user_properties.<name>` are user properties and every other column is an event parameter. Empty
+    cells are left out, and cells holding a JSON number are sent as numbers.
+
+    Yields
+    ------
+    ImportRecord
+        A record per row, with an error if the row cannot be parsed.
+    """
+    with open(path, "rb") as infile:
+        header_line = infile.readline()
+    header = next(csv.reader([header_line.decode("utf-8-sig")]))
+    if offset < len(header_line):
+        offset, line = len(header_line), 1
+
+    position = [offset, line]
+    def lines():
+        for number, end, raw in _read_lines(path, offset, line):
+            position[0], position[1] = end, number
+            yield raw.decode("utf-8")
+
+    start_line = line + 1
+    for row in csv.reader(lines()):
+        if not any(row):
+            start_line = position[1] + 1
+            continue
+        if len(row) != len(header):
+            yield ImportRecord(start_line, position[0], position[1], error=f"line {start_line}: expected {len(header)} columns, found {len(row)}")
+            start_line = position[1] + 1
+            continue
+        event = {"params": {}}
+        client_id = None
+        user_properties = {}
+        for column, cell in zip(header, row):
+            if cell == "":
+                continue
+            if column == id_field:
+                client_id = cell
+            elif column == "user_id":
+                user_properties["user_id"] = cell
+            elif column.startswith(_USER_PROPERTY_PREFIX):
+                user_properties[column[len(_USER_PROPERTY_PREFIX):]] = _cell_value(cell)
+            elif column in _CSV_EVENT_FIELDS:
+                event[column] = int(cell) if column == "timestamp_micros" else cell
+            else:
+                event["params"][column] = _cell_value(cell)
+        try:
+            _check_event(event)
+        except ValueError as e:
+            yield ImportRecord(start_line, position[0], position[1], error=f"line {start_line}: {e}")
+        else:
+            yield ImportRecord(start_line, position[0], position[1], client_id, user_properties, [event])
+        start_line = position[1] + 1
+
+def _check_event(event):
+    # The checks of the tracking objects, which would abort the whole import instead of rejecting one record.
+    if not isinstance(event.get("name"), str) or not event["name"]:
+        raise ValueError('every event needs a "name"')
+    if not isinstance(event["params"], dict):
+        raise ValueError('"params" must be an object')
+
+def _cell_value(cell):
+    if _NUMBER_PATTERN.match(cell):
+        return json.loads(cell)
+    return cell
+
+def _plain_user_properties(user_properties):
+    if not user_properties:
+        return {}
+    return {
+        name: value["value"] if isinstance(value, dict) and "value" in value else value
+        for name, value in user_properties.items()
+    }
+
+def validate_records(records, validator, id_field):
+    """
+    Function to set the error of the records rejected by a `LocalValidator`.
+
+    Yields
+    ------
+    ImportRecord
+        The records, with the validation messages of a rejected record as its error.
+    """
+    for record in records:
+        if record.error is not None:
+            yield record
+            continue
+        request = {
+            id_field: record.client_id,
+            "user_properties": {
+                name: {"value": value}
+                for name, value in record.user_properties.items()
+                if name not in _REQUEST_USER_FIELDS
+            },
+            "events": record.events,
+        }
+        messages = validator.validate_request(request)["validationMessages"]
+        if messages:
+            record.error = "\n".join(
+                f"line {record.line}: {message['fieldPath']}: {message['description']} ({message['validationCode']})"
+                for message in messages
+            )
+        yield record
+
+def chunk_records(records, chunk_events, errors):
+    """
+    Function to group records into chunks of about `chunk_events` events, each sent with one `send_bulk()` call, and
+    write the error of every invalid record to `errors`.
+
+    Yields
+    ------
+    Tuple[List[ImportRecord], int, ImportRecord]
+        The valid records of a chunk, the number of invalid records read with them and the last record read.
+    """
+    chunk, events, invalid = [], 0, 0
+    record = None
+    for record in records:
+        if record.error is not None:
+            errors.write(f"{record.error}\n")
+            invalid += 1
+            continue
+        chunk.append(record)
+        events += len(record.events)
+        if events >= chunk_events:
+            yield chunk, invalid, record
+            chunk, events, invalid = [], 0, 0
+    if chunk or invalid:
+        yield chunk, invalid, record
+
+def reject_oversized(tracker, chunk, errors):
+    """
+    Function to set the error of the records of a chunk holding an event too large for a single request, and write it
+    to `errors`. Called when `send_bulk()` raised a `PayloadTooLargeError`, so that the other records are still sent.
+
+    Returns
+    -------
+    List[ImportRecord]
+        The records that fit.
+    """
+    kept = []
+    for record in chunk:
+        overhead = len(tracker._request_prefix(record.client_id, record.user_properties)) + _REQUEST_OVERHEAD_MARGIN + _SESSION_PARAMS_MARGIN
+        try:
+            tracker.batcher.check(record.events, overhead=overhead)
+        except PayloadTooLargeError as e:
+            record.error = f"line {record.line}: {e}"
+            errors.write(f"{record.error}\n")
+        else:
+            kept.append(record)
+    return kept
+
+def send_chunk(tracker, chunk, errors):
+    """
+    Function to send the records of a chunk with `send_bulk()`, leaving out the records with an event too large for a
+    single request (see `reject_oversized()`).
+
+    Returns
+    -------
+    Tuple[SendResult, int]
+        The results of the batches and the number of records left out.
+    """
+    records = chunk
+    while True:
+        try:
+            return tracker.send_bulk((record.client_id, record.user_properties, record.events) for record in records), len(chunk) - len(records)
+        except PayloadTooLargeError:
+            kept = reject_oversized(tracker, records, errors)
+            if len(kept) == len(records):
+                raise
+            records = kept
+
+def load_checkpoint(path, source):
+    """
+    Function to read the position to resume an import of `source` from, `(0, 0)` if there is no checkpoint.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The byte offset and the number of the last line imported.
+    """
+    try:
+        with open(path) as infile:
+            checkpoint = json.load(infile)
+    except FileNotFoundError:
+        return 0, 0
+    if checkpoint.get("source") != os.path.abspath(source):
+        raise ValueError(f"Checkpoint {path} belongs to {checkpoint.get('source')}, not to {source}")
+    return checkpoint["offset"], checkpoint["line"]
+
+def save_checkpoint(path, source, offset, line):
+    """
+    Function to record the position up to which `source` has been imported.
+    """
+    # Written to a temporary file, then renamed, so a crash leaves either the old or the new checkpoint.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as outfile:
+        json.dump({"source": os.path.abspath(source), "offset": offset, "line": line}, outfile)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(tmp_path, path)
+
+def import_file(tracker, path, file_format=None, validator=None, chunk_events=1000, rate=None, checkpoint=None, errors=None):
+    """
+    Function to stream the events of a file to a bulk tracking object: parse, validate, batch and send.
+
+    The file is read one line at a time and sent in chunks of about `chunk_events` events, so memory use does not
+    depend on its size. After every chunk, the position in the file is saved to `checkpoint`, and an import with the
+    same checkpoint resumes from there. Once a batch has failed, the checkpoint is no longer advanced, so that resuming
+    sends the events of the failed batch again (along with the rest of its chunk and the chunks after it).
+
+    Parameters
+    ----------
+    tracker : GtagBulkMP or FirebaseBulkMP
+        Bulk tracking object sending the events, through its thread pool if `max_workers` is set.
+    path : string
+        Path of the NDJSON or CSV file.
+    file_format : str, optional
+        "ndjson" or "csv", by default guessed from the extension of `path`
+    validator : LocalValidator, optional
+        Validator rejecting invalid records before they are sent, by default None (no validation)
+    chunk_events : int, optional
+        Number of events read before they are sent, by default 1000
+    rate : float, optional
+        Maximum number of events sent per second, by default None (no limit)
+    checkpoint : string, optional
+        Path of the checkpoint file, by default None
+    errors : TextIO, optional
+        Stream receiving the messages of invalid records, by default `sys.stderr`
+
+    Returns
+    -------
+    Dict
+        Counts of records, invalid records, events sent and failed, batches and failed batches.
+    """
+    errors = errors or sys.stderr
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    assert file_format in ("ndjson", "csv"), "file_format should be ndjson or csv"
+    id_field = tracker._id_field
+
+    offset, line = load_checkpoint(checkpoint, path) if checkpoint else (0, 0)
+    reader = read_csv if file_format == "csv" else read_ndjson
+    records = reader(path, id_field, offset=offset, line=line)
+    if validator is not None:
+        records = validate_records(records, validator, id_field)
+
+    summary = {"records": 0, "invalid": 0, "events": 0, "failed_events": 0, "batches": 0, "failed_batches": 0}
+    limiter = TokenBucket(rate, burst=max(rate, chunk_events)) if rate else None
+    checkpoint_line = line
+    failed = False
+    start = time.perf_counter()
+    for chunk, invalid, last in chunk_records(records, chunk_events, errors):
+        summary["invalid"] += invalid
+        summary["records"] += len(chunk) + invalid
+        if chunk:
+            event_count = sum(len(record.events) for record in chunk)
+            if limiter is not None:
+                limiter.acquire(path, event_count)
+            results, rejected = send_chunk(tracker, chunk, errors)
+            summary["invalid"] += rejected
+            for result in results:
+                summary["batches"] += 1
+                if result.ok:
+                    summary["events"] += result.event_count
+                else:
+                    summary["failed_batches"] += 1
+                    summary["failed_events"] += result.event_count
+                    errors.write(f"batch failed: {result.error}\n")
+                    if checkpoint and not failed:
+                        errors.write(f"checkpoint kept at line {checkpoint_line}: a resumed import sends the events after it again\n")
+                    failed = True
+        if checkpoint and not failed:
+            save_checkpoint(checkpoint, path, last.offset, last.end_line)
+            checkpoint_line = last.end_line
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def _format_summary(summary, bytes_sent, dry_run):
+    seconds = summary["seconds"] or 1e-9
+    action = "serialized" if dry_run else "sent"
+    return (
+        f"{summary['records']} records read, {summary['invalid']} invalid\n"
+        f"{summary['events']} events {action} in {summary['batches']} batches ({bytes_sent / 1e6:.2f} MB), "
+        f"{summary['failed_events']} events failed in {summary['failed_batches']} batches\n"
+        f"{seconds:.2f}s, {summary['events'] / seconds:.0f} events/s, {summary['batches'] / seconds:.1f} batches/s\n"
+    )
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m ga4mp", description="Google Analytics 4 Measurement Protocol tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bulk_import = commands.add_parser("import", help="stream the events of NDJSON or CSV files to the Measurement Protocol")
+    bulk_import.add_argument("files", nargs="+", metavar="FILE", help="NDJSON (one request or event per line) or CSV (one event per row) file")
+    stream = bulk_import.add_mutually_exclusive_group(required=True)
+    stream.add_argument("--measurement-id", help="measurement id of a gtag data stream; events are keyed by client_id")
+    stream.add_argument("--firebase-app-id", help="firebase app id of an app data stream; events are keyed by app_instance_id")
+    bulk_import.add_argument("--api-secret", default=os.environ.get("GA4MP_API_SECRET"), help="API secret of the data stream, by default $GA4MP_API_SECRET")
+    bulk_import.add_argument("--format", choices=("ndjson", "csv"), help="file format, by default guessed from the extension")
+    bulk_import.add_argument("--workers", type=int, default=4, help="number of batches sent concurrently (default: 4)")
+    bulk_import.add_argument("--chunk-events", type=int, default=1000, help="number of events read before they are sent (default: 1000)")
+    bulk_import.add_argument("--rate", type=float, help="maximum number of events sent per second")
+    bulk_import.add_argument("--requests-per-second", type=float, help="maximum number of requests sent per second to the data stream")
+    bulk_import.add_argument("--rate-file", help="file holding the --requests-per-second budget, shared by every import using the same file")
+    bulk_import.add_argument("--checkpoint", help="file recording the position reached in the file; an import with the same checkpoint resumes from it")
+    bulk_import.add_argument("--no-validate", action="store_true", help="send the records without validating them locally")
+    bulk_import.add_argument("--catalog", choices=("off", "warn", "strict"), default="warn", help=(
+        "check events against the parameters listed for recommended events in ga4mp.utils.params_dict: log a warning once per "
+        "event name (warn, default) or reject the records that miss one (strict)"))
+    bulk_import.add_argument("--dry-run", action="store_true", help="parse, validate, batch and serialize the events without sending them")
+    return parser
+
+def main(argv=None):
+    """
+    Entry point of `python -m ga4mp`.
+
+    Returns
+    -------
+    int
+        The exit status: 0 if every event was sent, 1 if a batch failed.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if not args.api_secret and not args.dry_run:
+        parser.error("--api-secret (or $GA4MP_API_SECRET) is required unless --dry-run is set")
+    if args.rate_file and not args.requests_per_second:
+        parser.error("--rate-file requires --requests-per-second")
+    if args.checkpoint and len(args.files) > 1:
+        parser.error("--checkpoint can only be used with a single file")
+
+    metrics = MetricsRecorder()
+    options = {
+        "transport": DryRunTransport() if args.dry_run else None,
+        "max_workers": args.workers if args.workers > 1 else None,
+        "schema_mode": schema.WARN_ONCE if args.catalog == "warn" else schema.OFF,
+        "metrics": metrics,
+    }
+    if args.requests_per_second:
+        if args.rate_file:
+            options["rate_limiter"] = FileTokenBucket(args.rate_file, args.requests_per_second)
+        else:
+            options["rate_limiter"] = TokenBucket(args.requests_per_second)
+    if args.measurement_id:
+        tracker = GtagBulkMP(args.api_secret or "DRY_RUN", args.measurement_id, **options)
+    else:
+        tracker = FirebaseBulkMP(args.api_secret or "DRY_RUN", args.firebase_app_id, **options)
+    validator = None if args.no_validate else LocalValidator(id_field=tracker._id_field, check_catalog=args.catalog == "strict")
+
+    failed = False
+    try:
+        for path in args.files:
+            bytes_sent = metrics.counters["bytes_sent_total"]
+            summary = import_file(tracker, path, file_format=args.format, validator=validator, chunk_events=args.chunk_events, rate=args.rate, checkpoint=args.checkpoint)
+            sys.stdout.write(f"{path}:\n" + _format_summary(summary, metrics.counters["bytes_sent_total"] - bytes_sent, args.dry_run))
+            failed = failed or summary["failed_batches"] > 0
+    finally:
+        tracker.close()
+    return 1 if failed else 0
@@ -0,0 +1,60 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import gzip
+import zlib
+
+GZIP = "gzip"
+DEFLATE = "deflate"
+
+class Compression(object):
+    """
+    Compresses request bodies, which are sent with a matching `Content-Encoding` header.
+
+    Parameters
+    ----------
+    encoding : str, optional
+        "gzip" or "deflate" (zlib format), by default "gzip"
+    level : int, optional
+        Compression level from 1 (fastest) to 9 (smallest), by default 6
+    min_size : int, optional
+        Bodies smaller than this number of bytes are sent uncompressed, by default 1024
+    """
+
+    def __init__(self, encoding=GZIP, level=6, min_size=1024):
+        assert encoding in (GZIP, DEFLATE), f"encoding should be one of {(GZIP, DEFLATE)}"
+        assert 1 <= level <= 9, "level should be between 1 and 9"
+        self.encoding = encoding
+        self.level = level
+        self.min_size = min_size
+
+    def compress(self, body, headers):
+        """
+        Method to compress a request body.
+
+        Parameters
+        ----------
+        body : bytes
+            The encoded request body.
+        headers : Dict[str, str]
+            The request headers.
+
+        Returns
+        -------
+        Tuple[bytes, Dict[str, str]]
+            The body and the headers to send; both are returned unchanged if the body is smaller than `min_size`.
+        """
+        if len(body) < self.min_size:
+            return body, headers
+        if self.encoding == GZIP:
+            # mtime=0 keeps the output of identical bodies identical
+            body = gzip.compress(body, compresslevel=self.level, mtime=0)
+        else:
+            body = zlib.compress(body, self.level)
+        return body, dict(headers, **{"Content-Encoding": self.encoding})
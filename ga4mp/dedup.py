@@ -0,0 +1,236 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import collections
+import hashlib
+import json
+import math
+import threading
+import time
+
+
+# Parameters added by the tracking objects themselves, left out of content keys so that a replayed event matches the
+# original whether or not it went through send() before.
+_GENERATED_PARAMS = frozenset(["session_id", "engagement_time_msec"])
+
+def content_key(event):
+    """
+    Event key hashing the name, the parameters (but session_id and engagement_time_msec) and the event timestamp.
+
+    Two events with the same name and parameters and no timestamp have the same key; use `param_key()` if such events
+    are distinct.
+    """
+    params = {name: value for name, value in event["params"].items() if name not in _GENERATED_PARAMS}
+    timestamp = event.get("timestamp_micros", event.get("_timestamp_micros"))
+    document = json.dumps([event["name"], params, timestamp], sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(document.encode("utf-8"), digest_size=16).digest()
+
+def param_key(name="event_id"):
+    """
+    Function returning an event key reading the event parameter `name`, e.g. an id assigned upstream. Events without
+    the parameter fall back to `content_key()`.
+    """
+    def key(event):
+        value = event["params"].get(name)
+        return content_key(event) if value is None else str(value)
+    return key
+
+class Deduplicator(object):
+    """
+    Parent class of the caches dropping events that were already sent within a time window, keyed by client and event.
+
+    Subclasses must implement `_check_and_add()`.
+
+    Parameters
+    ----------
+    key : Callable[[Dict], Hashable], optional
+        Function computing the key of an event, by default `content_key`
+    window : float, optional
+        Number of seconds an event is remembered, by default 86400 (one day)
+    """
+
+    def __init__(self, key=content_key, window=86400.0, clock=time.monotonic):
+        assert window > 0, "window should be positive"
+        self.key = key
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def filter(self, events, scope=None):
+        """
+        Method to remove the events seen before from a list, remembering the others.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events in the format accepted by `BaseGa4mp.send()`.
+        scope : str, optional
+            client_id or app_instance_id the events belong to, by default None
+
+        Returns
+        -------
+        List[Dict]
+            The events seen for the first time, in order; the list itself if none was dropped.
+        """
+        keys = [self._scoped_key(scope, event) for event in events]
+        with self._lock:
+            now = self._clock()
+            fresh = [self._check_and_add(key, now) for key in keys]
+            duplicates = len(fresh) - sum(fresh)
+            self.hits += duplicates
+            self.misses += len(fresh) - duplicates
+        if not duplicates:
+            return events
+        return [event for event, is_fresh in zip(events, fresh) if is_fresh]
+
+    def forget(self, events, scope=None):
+        """
+        Method to forget events that were remembered by `filter()` but could not be delivered, so that a redelivery of
+        them is not dropped.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events in the format accepted by `BaseGa4mp.send()`.
+        scope : str, optional
+            client_id or app_instance_id the events belong to, by default None
+        """
+        keys = [self._scoped_key(scope, event) for event in events]
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def _scoped_key(self, scope, event):
+        key = self.key(event)
+        return key if scope is None else (scope, key)
+
+    def _check_and_add(self, key, now):
+        # True if the key was not seen within the window; it is remembered either way.
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
+    def _remove(self, key):
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
+class LRUDeduplicator(Deduplicator):
+    """
+    Exact cache of the keys seen within the window, holding at most `max_size` keys. A key is remembered for `window`
+    seconds after it was last seen, and the least recently seen keys are forgotten first when the cache is full.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum number of keys remembered, by default 1000000
+    """
+
+    def __init__(self, max_size=1000000, key=content_key, window=86400.0, clock=time.monotonic):
+        super().__init__(key=key, window=window, clock=clock)
+        assert max_size > 0, "max_size should be positive"
+        self.max_size = max_size
+        self._seen = collections.OrderedDict()  # key: time it was last seen, least recent first
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _check_and_add(self, key, now):
+        seen = self._seen
+        # the expired keys are at the front
+        expired = now - self.window
+        while seen:
+            oldest, added = next(iter(seen.items()))
+            if added > expired:
+                break
+            del seen[oldest]
+        if key in seen:
+            seen.move_to_end(key)
+            seen[key] = now
+            return False
+        seen[key] = now
+        if len(seen) > self.max_size:
+            seen.popitem(last=False)
+        return True
+
+    def _remove(self, key):
+        self._seen.pop(key, None)
+
+class BloomDeduplicator(Deduplicator):
+    """
+    Probabilistic cache for high cardinalities: two Bloom filters sized for `capacity` keys each, the current one and
+    the previous one. Keys are added to the current filter and looked up in both; the previous filter is dropped and the
+    current one takes its place every `window` seconds, or as soon as it holds `capacity` keys. An event is therefore
+    remembered for at least `window` seconds unless more than `capacity` events arrive in that time. Bits cannot be
+    cleared, so the keys given to `forget()` are kept in a set that overrides the filters until they are seen again.
+
+    Memory use is fixed, about `2 * capacity * 1.44 * log2(1 / error_rate)` bits. False positives drop a new event as a
+    duplicate with a probability of about `error_rate`; duplicates are never missed while remembered.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        Number of keys per filter, by default 1000000 (2.4 MB per filter with the default error rate)
+    error_rate : float, optional
+        False positive rate of a full filter, by default 0.0001
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.0001, key=content_key, window=86400.0, clock=time.monotonic):
+        super().__init__(key=key, window=window, clock=clock)
+        assert capacity > 0, "capacity should be positive"
+        assert 0 < error_rate < 1, "error_rate should be between 0 and 1"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.bits / capacity * math.log(2))))
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+        self._rotated = None
+        self._generation = 0
+        self._forgotten = {}  # key: generation it was forgotten in
+
+    def _positions(self, key):
+        # double hashing: position i is h1 + i * h2, from one 128-bit digest
+        digest = hashlib.blake2b(repr(key).encode("utf-8") if not isinstance(key, bytes) else key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hash_count)]
+
+    def _check_and_add(self, key, now):
+        if self._rotated is None:
+            self._rotated = now
+        elif now - self._rotated >= self.window or self._count >= self.capacity:
+            self._previous, self._current = self._current, self._previous
+            self._current[:] = bytes(len(self._current))
+            self._count = 0
+            self._rotated = now
+            # a forgotten key is in the filters for at most one more rotation
+            self._generation += 1
+            if self._forgotten:
+                self._forgotten = {key: generation for key, generation in self._forgotten.items() if generation >= self._generation - 1}
+
+        current, previous = self._current, self._previous
+        in_current = in_previous = True
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not current[byte] & mask:
+                in_current = False
+                current[byte] |= mask
+            if in_previous and not previous[byte] & mask:
+                in_previous = False
+        if self._forgotten and self._forgotten.pop(key, None) is not None:
+            if not in_current:
+                self._count += 1
+            return True
+        if in_current:
+            return False
+        self._count += 1
+        return not in_previous
+
+    def _remove(self, key):
+        self._forgotten[key] = self._generation
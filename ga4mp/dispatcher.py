@@ -0,0 +1,199 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import atexit
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+class BackgroundDispatcher(object):
+    """
+    Sends the events given to a tracking object from a worker thread, so that `send()` only has to enqueue them.
+
+    The worker packs queued events into full payloads and sends a payload as soon as `batch_size` events are waiting,
+    or once `flush_interval` seconds have passed since the oldest waiting event was queued.
+
+    Parameters
+    ----------
+    tracker : BaseGa4mp
+        Tracking object whose `_http_post` method delivers the payloads.
+    max_queue_size : int, optional
+        Maximum number of events waiting to be sent, by default 10000
+    flush_interval : float, optional
+        Maximum number of seconds an event waits for its payload to fill up, by default 5
+    batch_size : int, optional
+        Number of events per payload, by default 25 (the maximum allowed by the Measurement Protocol)
+    overflow : str, optional
+        What `put()` does when the queue is full: "block" until there is room, "drop_oldest" to discard the oldest
+        waiting event or "drop_newest" to discard the incoming event, by default "block"
+    drain_at_exit : bool, optional
+        Boolean to depict if waiting events should be sent when the interpreter exits, by default True
+    """
+
+    def __init__(self, tracker, max_queue_size=10000, flush_interval=5.0, batch_size=25, overflow=BLOCK, drain_at_exit=True):
+        assert overflow in (BLOCK, DROP_OLDEST, DROP_NEWEST), "overflow should be one of 'block', 'drop_oldest' or 'drop_newest'"
+        assert 0 < batch_size <= 25, "batch_size should be between 1 and 25"
+        self._tracker = tracker
+        self.max_queue_size = max_queue_size
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._queue = collections.deque()  # (enqueue time, event) pairs
+        self._unfinished = 0  # queued plus in-flight events
+        self._flush_requested = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        self._room_ready = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+
+        self._worker = threading.Thread(target=self._run, name="ga4mp-dispatcher", daemon=True)
+        self._worker.start()
+        self._drain_at_exit = drain_at_exit
+        if drain_at_exit:
+            atexit.register(self.close)
+
+    def put(self, events):
+        """
+        Method to enqueue events for sending. Returns the number of events that were accepted.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events that already passed the tracking object's checks.
+        """
+        accepted = 0
+        dropped = []
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot enqueue events on a closed dispatcher.")
+            for event in events:
+                if len(self._queue) >= self.max_queue_size:
+                    if self.overflow == DROP_NEWEST:
+                        dropped.append(event)
+                        self.dropped += 1
+                        self._tracker.metrics.on_drop(1)
+                        continue
+                    elif self.overflow == DROP_OLDEST:
+                        dropped.append(self._queue.popleft()[1])
+                        self._unfinished -= 1
+                        self.dropped += 1
+                        self._tracker.metrics.on_drop(1)
+                    else:
+                        # the worker may be idle, waiting for this call to finish enqueuing: wake it to make room
+                        self._work_ready.notify()
+                        while len(self._queue) >= self.max_queue_size and not self._closed:
+                            self._room_ready.wait()
+                        if self._closed:
+                            raise RuntimeError("Cannot enqueue events on a closed dispatcher.")
+                self._queue.append((time.monotonic(), event))
+                self._unfinished += 1
+                accepted += 1
+            self._work_ready.notify()
+        if dropped and self._tracker.deduplicator is not None:
+            # dropped events were never sent, so a redelivery of them must not be dropped as a duplicate
+            self._tracker.deduplicator.forget(dropped, scope=self._tracker._identity())
+        return accepted
+
+    def flush(self, timeout=None):
+        """
+        Method to send every waiting event right away and wait until they are delivered.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait, by default wait until done
+
+        Returns
+        -------
+        bool
+            True if every event was handled before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._flush_requested = True
+            self._work_ready.notify()
+            while self._unfinished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._all_done.wait(remaining)
+            return True
+
+    def close(self, timeout=None):
+        """
+        Method to send every waiting event, then stop the worker thread.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait for the waiting events, by default wait until done
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._work_ready.notify()
+            self._room_ready.notify_all()
+        self._worker.join(timeout)
+        if self._drain_at_exit:
+            atexit.unregister(self.close)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ready_to_send():
+                    if self._queue:
+                        self._work_ready.wait(self._queue[0][0] + self.flush_interval - time.monotonic())
+                    else:
+                        self._flush_requested = False
+                        self._all_done.notify_all()
+                        if self._closed:
+                            return
+                        self._work_ready.wait()
+                batch = [self._queue.popleft()[1] for _ in range(min(self.batch_size, len(self._queue)))]
+                self._room_ready.notify_all()
+
+            tracker = self._tracker
+            try:
+                batches = tracker._batch_events(batch)
+                tracker._forget_failed(batches, tracker._http_post(batches), scope=tracker._identity())
+            except Exception:
+                logger.exception("Failed to send a background batch of %d events", len(batch))
+                if tracker.deduplicator is not None:
+                    tracker.deduplicator.forget(batch, scope=tracker._identity())
+
+            with self._lock:
+                self._unfinished -= len(batch)
+                if not self._unfinished:
+                    self._all_done.notify_all()
+
+    def _ready_to_send(self):
+        # Called with the lock held.
+        if not self._queue:
+            return False
+        return (
+            len(self._queue) >= self.batch_size
+            or len(self._queue) >= self.max_queue_size
+            or self._flush_requested
+            or self._closed
+            or time.monotonic() >= self._queue[0][0] + self.flush_interval
+        )
@@ -1,13 +1,22 @@
+import sys
+
 from ga4mp.item import Item
 
+# Parameters allowed longer values by the GA4 event collection limits: https://support.google.com/analytics/answer/9267744
+_PAGE_PARAMETERS = frozenset(["page_location", "page_referrer", "page_title"])
+
 class Event(dict):
+    # A {"name": ..., "params": {...}} dictionary. The empty __slots__ keeps events from carrying an attribute
+    # dictionary of their own, names are interned and the limit checks take constant time.
+    __slots__ = ()
+
     def __init__(self, name):
         self.set_event_name(name)
 
     def set_event_name(self, name):
         if len(name) > 40:
             raise ValueError("Event name cannot exceed 40 characters.")
-        self["name"] = name
+        self["name"] = sys.intern(name)
 
     def get_event_name(self):
         return self.get("name")
@@ -16,15 +25,19 @@ class Event(dict):
         # Series of checks to comply with GA4 event collection limits: https://support.google.com/analytics/answer/9267744
         if len(name) > 40:
             raise ValueError("Event parameter name cannot exceed 40 characters.")
-        if name in ["page_location", "page_referrer", "page_title"] and len(str(value)) > 300:
-            raise ValueError("Event parameter value for page info cannot exceed 300 characters.")
-        if name not in ["page_location", "page_referrer", "page_title"] and len(str(value)) > 100:
-            raise ValueError("Event parameter value cannot exceed 100 characters.")
-        if "params" not in self.keys():
-            self["params"] = {}
-        if len(self["params"]) >= 100:
+        if not isinstance(value, (list, tuple, dict)):
+            # strings are measured directly; other scalars through their string form
+            length = len(value) if type(value) is str else len(str(value))
+            if length > 100 and (length > 300 or name not in _PAGE_PARAMETERS):
+                if name in _PAGE_PARAMETERS:
+                    raise ValueError("Event parameter value for page info cannot exceed 300 characters.")
+                raise ValueError("Event parameter value cannot exceed 100 characters.")
+        params = self.get("params")
+        if params is None:
+            params = self["params"] = {}
+        if len(params) >= 100 and name not in params:
             raise RuntimeError("Event cannot contain more than 100 parameters.")
-        self["params"][name] = value
+        params[sys.intern(name)] = value
 
     def get_event_params(self):
         return self.get("params")
@@ -39,6 +52,15 @@ class Event(dict):
     def add_item_to_event(self, item):
         if not isinstance(item, dict):
             raise ValueError("'item' must be an instance of a dictionary.")
-        if "items" not in self["params"].keys():
+        params = self.get("params")
+        if params is None or "items" not in params:
             self.set_event_param("items", [])
-        self["params"]["items"].append(item)
\ No newline at end of file
+        self["params"]["items"].append(item)
+
+    def to_dict(self):
+        # Plain dictionary copy of the event, with items turned into plain dictionaries.
+        event = dict(self)
+        params = event.get("params")
+        if params is not None and "items" in params:
+            event["params"] = dict(params, items=[dict(item) for item in params["items"]])
+        return event
@@ -7,15 +7,33 @@
 # assistance in strategy, implementation, or auditing existing work.
 ###############################################################################
 
+import contextlib
 import json
 import logging
-import urllib.request
 import time
+import http.client
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import random
 from ga4mp.utils import params_dict
+from ga4mp import schema
 from ga4mp.event import Event
 from ga4mp.store import BaseStore, DictStore
+from ga4mp.transport import BaseTransport, PooledTransport
+from ga4mp.dispatcher import BackgroundDispatcher
+from ga4mp.results import BatchResult, SendResult
+from ga4mp.retry import RetryPolicy
+from ga4mp.spool import SegmentSpool
+from ga4mp.serializer import JSONSerializer, RequestEncoder
+from ga4mp.batching import PayloadTooLargeError, SizeAwareBatcher
+from ga4mp.compression import Compression
+from ga4mp.validation import LocalValidator, payload_too_large
+from ga4mp.metrics import Metrics, NOOP_METRICS
+from ga4mp.logs import LogSampler
+from ga4mp.ratelimit import RateLimiter
+from ga4mp.dedup import Deduplicator
+from ga4mp.session import DEFAULT_SESSION_TIMEOUT, SessionManager
 
 import os, sys
 sys.path.append(
@@ -23,7 +41,25 @@ sys.path.append(
 )
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+
+# Failures of a request attempt that are recorded on the batch result (and retried) instead of raised
+_TRANSPORT_ERRORS = (urllib.error.URLError, http.client.HTTPException, OSError)
+
+# ']}' closing a request and a 16-digit ',"timestamp_micros":' timestamp, with room to spare
+_REQUEST_OVERHEAD_MARGIN = 64
+
+class _RequestTemplate(object):
+    # Everything of the requests to one domain but their events and timestamp: the url, the request fields and their
+    # encoding up to the events array. Built by BaseGa4mp._request_template() and reused for as long as `key` holds
+    # and the user properties of the store equal the `user_properties` snapshot.
+    __slots__ = ("key", "user_properties", "url", "static", "prefix")
+
+    def __init__(self, key, user_properties, url, static, prefix):
+        self.key = key
+        self.user_properties = user_properties
+        self.url = url
+        self.static = static
+        self.prefix = prefix
 
 class BaseGa4mp(object):
     """
@@ -34,6 +70,43 @@ class BaseGa4mp(object):
     api_secret : string
         Generated through the Google Analytics UI. To create a new secret, navigate in the Google Analytics UI to: Admin > Data Streams >
         [choose your stream] > Measurement Protocol API Secrets > Create
+    store : BaseStore, optional
+        Store for user properties and session parameters, by default a new DictStore
+    transport : BaseTransport, optional
+        Object used to deliver the http POST requests, by default a PooledTransport that keeps connections alive
+        across batches and `send()` calls
+    max_workers : int, optional
+        If set, the batches of a single send are sent concurrently through a thread pool of this size, by default None
+        (batches are sent one after another)
+    retry : RetryPolicy, optional
+        Policy for retrying batches that failed with a transient error, by default None (no retries)
+    spool : SegmentSpool, optional
+        Durable on-disk queue for postponed events, by default None (postponed events are kept in memory)
+    schema_mode : str, optional
+        How events missing the parameters expected for their name are reported: "off", "warn" (through `log_sampler`,
+        which by default logs a given event name and parameter at most once a minute), "warn_once" (once per event name)
+        or "strict" (raise a ValueError), by default "warn"
+    serializer : JSONSerializer, optional
+        Encoder for request bodies, e.g. `ga4mp.serializer.OrjsonSerializer()`, by default a stdlib `json` encoder
+    session_timeout : float, optional
+        Seconds of inactivity after which the next event starts a new session with a new session_id, or None to keep a
+        single session for the life of the store, by default 1800 (30 minutes, like GA4)
+    batcher : SizeAwareBatcher, optional
+        Splits events into requests under the count and byte limits of the Measurement Protocol, by default a
+        `SizeAwareBatcher` using `serializer`
+    compression : Compression, optional
+        Compresses request bodies (e.g. `Compression("gzip", level=6, min_size=1024)`), by default None (no compression)
+    metrics : Metrics, optional
+        Receives measurements of the send pipeline, e.g. a `ga4mp.metrics.MetricsRecorder`, by default a no-op
+    log_sampler : LogSampler, optional
+        Samples the log records of the send path and rate limits repeated warnings and errors, by default a
+        `LogSampler()` that emits every record and repeats of a warning at most once a minute
+    rate_limiter : RateLimiter, optional
+        Throttles the requests of the data stream (e.g. `ga4mp.ratelimit.TokenBucket(rate=20)`), with one token taken
+        per request attempt, by default None (no throttling)
+    deduplicator : Deduplicator, optional
+        Drops the events of `send()` that were already sent within its time window (e.g.
+        `ga4mp.dedup.LRUDeduplicator(key=param_key("event_id"))`), by default None
 
     See Also
     --------
@@ -62,19 +135,55 @@ class BaseGa4mp(object):
     >>> ga.postponed_send()
     """
 
-    def __init__(self, api_secret, store: BaseStore = None):
+    _request_headers = {"Content-Type": "application/json; charset=utf-8"}
+
+    def __init__(self, api_secret, store: BaseStore = None, transport: BaseTransport = None, max_workers: int = None, retry: RetryPolicy = None, spool: SegmentSpool = None, schema_mode: str = schema.WARN, serializer: JSONSerializer = None, session_timeout: float = DEFAULT_SESSION_TIMEOUT, batcher: SizeAwareBatcher = None, compression: Compression = None, metrics: Metrics = None, log_sampler: LogSampler = None, rate_limiter: RateLimiter = None, deduplicator: Deduplicator = None):
         self._initialization_time = time.time() # used for both session_id and calculating engagement time
         self.api_secret = api_secret
         self._event_list = []
         assert store is None or isinstance(store, BaseStore), "if supplied, store must be an instance of BaseStore"
         self.store = store or DictStore()
+        assert transport is None or isinstance(transport, BaseTransport), "if supplied, transport must be an instance of BaseTransport"
+        self._owns_transport = transport is None
+        self.transport = transport or PooledTransport()
+        self._dispatcher = None
+        assert max_workers is None or max_workers > 0, "if supplied, max_workers must be a positive integer"
+        self.max_workers = max_workers
+        self._executor = None
+        assert retry is None or isinstance(retry, RetryPolicy), "if supplied, retry must be an instance of RetryPolicy"
+        self.retry = retry
+        assert spool is None or isinstance(spool, SegmentSpool), "if supplied, spool must be an instance of SegmentSpool"
+        self.spool = spool
+        assert log_sampler is None or isinstance(log_sampler, LogSampler), "if supplied, log_sampler must be an instance of LogSampler"
+        self.log_sampler = log_sampler or LogSampler()
+        self.schema_validator = schema.SchemaValidator(mode=schema_mode, logger=logger, sampler=self.log_sampler)
+        assert rate_limiter is None or isinstance(rate_limiter, RateLimiter), "if supplied, rate_limiter must be an instance of RateLimiter"
+        self.rate_limiter = rate_limiter
+        assert deduplicator is None or isinstance(deduplicator, Deduplicator), "if supplied, deduplicator must be an instance of Deduplicator"
+        self.deduplicator = deduplicator
+        assert serializer is None or isinstance(serializer, JSONSerializer), "serializer must be an instance of JSONSerializer"
+        self.serializer = serializer or JSONSerializer()
+        self._request_encoder = RequestEncoder(self.serializer)
+        self._templates = {}
+        assert batcher is None or isinstance(batcher, SizeAwareBatcher), "if supplied, batcher must be an instance of SizeAwareBatcher"
+        self.batcher = batcher or SizeAwareBatcher(serializer=self.serializer)
+        assert compression is None or isinstance(compression, Compression), "if supplied, compression must be an instance of Compression"
+        self.compression = compression
+        self._local_validator = None
+        assert metrics is None or isinstance(metrics, Metrics), "if supplied, metrics must be an instance of Metrics"
+        self.metrics = metrics or NOOP_METRICS
+        self.sessions = SessionManager(timeout=session_timeout)
         self._check_store_requirements()
         self._base_domain = "https://www.google-analytics.com/mp/collect"
         self._validation_domain = "https://www.google-analytics.com/debug/mp/collect"
 
     def _check_store_requirements(self):
         # Store must contain "session_id" and "last_interaction_time_msec" in order for tracking to work properly.
-        if self.store.get_session_parameter("session_id") is None:
+        # A session loaded from a persistent store is renewed if it has been inactive for longer than the session timeout.
+        last_interaction_time = self.store.get_session_parameter("last_interaction_time_msec")
+        if self.store.get_session_parameter("session_id") is None or (
+            last_interaction_time is not None and self.sessions._expired(last_interaction_time, int(self._initialization_time * 1000))
+        ):
             self.store.set_session_parameter(name="session_id", value=int(self._initialization_time))
         # Note: "last_interaction_time_msec" factors into the required "engagement_time_msec" event parameter.
         self.store.set_session_parameter(name="last_interaction_time_msec", value=int(self._initialization_time * 1000))
@@ -107,39 +216,243 @@ class BaseGa4mp(object):
             Boolean to depict if provided event list should be postponed, by default False
         date : datetime
             Python datetime object for sending a historical event at the given date. Date cannot be in the future.
+
+        Returns
+        -------
+        SendResult or Dict
+            The result of every batch for a regular hit (see `SendResult`), the validation server response for a validation
+            hit, or None if the events were postponed or handed to the background dispatcher.
         """
 
+        with self._sending(events, validation_hit=validation_hit, date=date) as events:
+            if self._dispatcher is not None and postpone is False and validation_hit is False and date is None:
+                # hand the events to the background worker thread and return right away
+                self.batcher.check(events, overhead=self._request_overhead())
+                self._dispatcher.put(events)
+            elif postpone is True:
+                self.batcher.check(events, overhead=self._request_overhead())
+                # build event list to send later
+                self._postpone(events)
+            else:
+                # send http post request
+                batches = self._batch_events(events)
+                results = self._http_post(batches, validation_hit=validation_hit, date=date)
+                if validation_hit is False:
+                    self._forget_failed(batches, results, scope=self._identity())
+                return results
+
+    @contextlib.contextmanager
+    def _sending(self, events, validation_hit=False, date=None):
+        # Steps of send() before the events are handed over, shared with the asyncio classes: the checks, the
+        # deduplication and the session. If the body of the with statement raises (e.g. PayloadTooLargeError or a
+        # closed dispatcher), the deduplicator forgets the events again so that a corrected redelivery is not dropped.
+
         # check for any missing or invalid parameters among automatically collected and recommended event types
         self._check_params(events)
         self._check_date_not_in_future(date)
-        self._add_session_id_and_engagement_time(events)
+        deduplicator = self.deduplicator if validation_hit is False else None
+        if deduplicator is not None:
+            scope = self._identity()
+            events = deduplicator.filter(events, scope=scope)
+        try:
+            self._add_session_id_and_engagement_time(events)
+            if self.metrics.enabled:
+                self.metrics.on_enqueue(len(events))
+            yield events
+        except BaseException:
+            if deduplicator is not None:
+                deduplicator.forget(events, scope=scope)
+            raise
+
+    def validate_locally(self, events, debug_sample_rate=0.0):
+        """
+        Method to check events with the local validation engine instead of the Measurement Protocol Validation Server.
+
+        The events are packed into requests as `send()` would, with the tracking object's identity and user properties,
+        and every request is checked by a `ga4mp.validation.LocalValidator`. An event too large for a request is reported
+        with a VALUE_OUT_OF_BOUNDS message instead of raising a PayloadTooLargeError. The events are not changed.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events in the format accepted by `send()`.
+        debug_sample_rate : float, optional
+            Fraction of calls for which the events are also sent to the validation server, whose messages are added to
+            the local ones, by default 0.0
+
+        Returns
+        -------
+        Dict
+            A response in the shape of the validation server's, with the messages of every request combined.
+        """
+        merged, events = self._validate_batches(events)
+        if debug_sample_rate and random.random() < debug_sample_rate and events:
+            response = self.send(self._debug_copies(events), validation_hit=True)
+            merged["validationMessages"].extend(response["validationMessages"])
+        return merged
+
+    def _validate_batches(self, events):
+        # Local part of validate_locally(), shared with the asyncio classes. Events too large for a request are
+        # reported instead of raising PayloadTooLargeError; returns the merged response and the events that fit.
+        validator = self._local_validator
+        if validator is None:
+            validator = self._local_validator = LocalValidator(id_field=next(iter(self._build_request(batch=None))))
+        static = self._request_template(self._base_domain).static
+        merged = {"validationMessages": []}
+        positions = list(range(len(events)))
+        while True:
+            try:
+                batches = self._batch_events(events)
+                break
+            except PayloadTooLargeError as e:
+                merged["validationMessages"].append(payload_too_large(f"events[{positions[e.index]}]", e.size, e.limit))
+                events = events[:e.index] + events[e.index + 1:]
+                positions = positions[:e.index] + positions[e.index + 1:]
+        for batch in batches:
+            response = validator.validate_request(dict(static, events=batch))
+            merged["validationMessages"].extend(response["validationMessages"])
+        return merged, events
+
+    def _debug_copies(self, events):
+        # send() adds the session parameters to the events; the validation hits of validate_locally() leave them as they are
+        return [dict(event, params=dict(event["params"])) for event in events]
+
+    def start_background_dispatch(self, max_queue_size=10000, flush_interval=5.0, overflow="block", drain_at_exit=True):
+        """
+        Method to make `send()` enqueue events for a background worker thread instead of sending them immediately.
+        Validation hits, postponed events and historical (dated) events are still handled synchronously.
+
+        Parameters
+        ----------
+        max_queue_size : int, optional
+            Maximum number of events waiting to be sent, by default 10000
+        flush_interval : float, optional
+            Maximum number of seconds an event waits for a full batch of 25 events, by default 5
+        overflow : str, optional
+            What `send()` does when the queue is full: "block" until there is room, "drop_oldest" to discard the oldest
+            waiting event or "drop_newest" to discard the incoming events, by default "block"
+        drain_at_exit : bool, optional
+            Boolean to depict if waiting events should be sent when the interpreter exits, by default True
+
+        Returns
+        -------
+        BackgroundDispatcher
+        """
+        assert self._dispatcher is None, "background dispatch has already been started"
+        self._dispatcher = BackgroundDispatcher(
+            self, max_queue_size=max_queue_size, flush_interval=flush_interval, overflow=overflow, drain_at_exit=drain_at_exit
+        )
+        return self._dispatcher
+
+    def flush(self, timeout=None):
+        """
+        Method to send every event waiting in the background queue and wait until they are delivered.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait, by default wait until done
 
-        if postpone is True:
-            # build event list to send later
-            for event in events:
-                event["_timestamp_micros"] = self._get_timestamp(time.time())
-                self._event_list.append(event)
+        Returns
+        -------
+        bool
+            True if every waiting event was handled before the timeout.
+        """
+        if self._dispatcher is None:
+            return True
+        return self._dispatcher.flush(timeout)
+
+    def _postpone(self, events):
+        # Stamp events with the current time and keep them to send later.
+        for event in events:
+            event["_timestamp_micros"] = self._get_timestamp(time.time())
+        if self.spool is not None:
+            self.spool.append(events)
         else:
-            # batch events into sets of 25 events, the maximum allowed.
-            batched_event_list = [
-                events[event : event + 25] for event in range(0, len(events), 25)
-            ]
-            # send http post request
-            return self._http_post(
-                batched_event_list, validation_hit=validation_hit, date=date
-            )
-        
+            self._event_list.extend(events)
+
+    def _forget_failed(self, batches, results, scope=None):
+        # The deduplicator remembers events before they are sent; those of failed batches are forgotten again so that a
+        # redelivery of them is sent instead of dropped.
+        if self.deduplicator is None:
+            return
+        for batch, result in zip(batches, results):
+            if not result.ok:
+                self.deduplicator.forget(batch, scope=scope)
+
+    def _batch_events(self, events, overhead=None):
+        # batch events into sets of at most 25 events and 130 KB, the maximum allowed.
+        if overhead is None:
+            overhead = self._request_overhead()
+        return self.batcher.batch(events, overhead=overhead)
+
+    def _request_overhead(self):
+        # Upper bound of the encoded size of a request without its events: the cached start of the request, the
+        # closing brackets and room for a request or event-level timestamp.
+        return len(self._request_template(self._base_domain).prefix) + _REQUEST_OVERHEAD_MARGIN
+
+    def _static_request(self):
+        # Request fields other than the events and the timestamp.
+        static = self._build_request(batch=None)
+        del static["events"]
+        self._add_user_props_to_hit(static)
+        return static
+
+    def _request_template(self, domain):
+        # The url and the encoded start of the requests to `domain`, rebuilt only when the api_secret, the stream, the
+        # identity, the store or its user properties change instead of for every batch. The version of the user
+        # properties catches the changes made through the store; comparing them with a snapshot catches direct edits
+        # of the dictionary, for a fraction of the cost of a rebuild.
+        store = self.store
+        key = (self.api_secret, self._stream_id(), self._identity(), store, store.user_properties_version)
+        user_properties = store.get("user_properties")
+        template = self._templates.get(domain)
+        if template is None or template.key != key or template.user_properties != user_properties:
+            snapshot = dict(user_properties) if user_properties is not None else None
+            static = self._static_request()
+            template = _RequestTemplate(key, snapshot, self._build_url(domain=domain), static, self._request_encoder.encode_prefix(static))
+            self._templates[domain] = template
+        return template
 
     def postponed_send(self):
         """
-        Method to send the events provided to Ga4mp.send(events,postpone=True)
+        Method to send the events provided to Ga4mp.send(events,postpone=True), packed into batches of up to 25 events.
+
+        Events are removed from the queue once their batch has been sent; the events of a failed batch stay queued for the
+        next call. With a spool, they are appended to the spool again (see `SegmentSpool.drain()`).
+
+        Returns
+        -------
+        SendResult
+            The result of every batch, in batch order.
         """
+        if self.spool is not None:
+            return self.spool.drain(self)
 
-        for event in self._event_list:
-            self._http_post([event], postpone=True)
+        batches = self._batch_events(self._event_list)
+        results = self._http_post(batches, postpone=True)
+        self._keep_unsent(batches, results)
+        return results
 
-        # clear event_list for future use
-        self._event_list = []
+    def _keep_unsent(self, batches, results):
+        # keep only the postponed events that still need to be sent
+        self._event_list = [event for batch, result in zip(batches, results) if not result.ok for event in batch]
+
+    def close(self):
+        """
+        Method to send the events waiting in the background queue, then release the network resources held by the
+        tracking object. A transport supplied at initialization is left open, since it may be shared with other tracking objects.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.close()
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._owns_transport:
+            self.transport.close()
+        if self.spool is not None:
+            self.spool.sync()
 
     def append_event_to_params_dict(self, new_name_and_parameters):
 
@@ -156,6 +469,7 @@ class BaseGa4mp(object):
         """
 
         params_dict.update(new_name_and_parameters)
+        schema.invalidate()
 
     def _http_post(self, batched_event_list, validation_hit=False, postpone=False, date=None):
         """
@@ -175,69 +489,176 @@ class BaseGa4mp(object):
             If date is specified, postpone must be False or an assertion will be thrown.
         """
         self._check_date_not_in_future(date)
-        status_code = None  # Default set to know if batch loop does not work and to bound status_code
 
         # set domain
-        domain = self._base_domain
-        if validation_hit is True:
-            domain = self._validation_domain
-        logger.info(f"Sending POST to: {domain}")
+        domain = self._get_domain(validation_hit)
+        logger.info("Sending POST to: %s", domain)
+
+        def post_batch(batch_index, batch):
+            url, body = self._prepare_batch(batch, domain=domain, postpone=postpone, date=date)
+            return self._post_batch(batch_index, len(batch), url, body)
 
         # loop through events in batches of 25
-        batch_number = 1
-        for batch in batched_event_list:
-            # url and request slightly differ by subclass
-            url = self._build_url(domain=domain)
-            request = self._build_request(batch=batch)
-            self._add_user_props_to_hit(request)
-
-            # make adjustments for postponed hit
-            request["events"] = (
-                {"name": batch["name"], "params": batch["params"]}
-                if (postpone)
-                else batch
-            )
-
-            if date is not None:
-                logger.info(f"Setting event timestamp to: {date}")
-                assert (
-                    postpone is False
-                ), "Cannot send postponed historical hit, ensure postpone=False"
-
-                ts = self._datetime_to_timestamp(date)
-                ts_micro = self._get_timestamp(ts)
-                request["timestamp_micros"] = int(ts_micro)
-                logger.info(f"Timestamp of request is: {request['timestamp_micros']}")
-
-            if postpone:
-                # add timestamp to hit
-                request["timestamp_micros"] = batch["_timestamp_micros"]
-
-            req = urllib.request.Request(url)
-            req.add_header("Content-Type", "application/json; charset=utf-8")
-            jsondata = json.dumps(request)
-            json_data_as_bytes = jsondata.encode("utf-8")  # needs to be bytes
-            req.add_header("Content-Length", len(json_data_as_bytes))
-            result = urllib.request.urlopen(req, json_data_as_bytes)
-
-            
-
-            status_code = result.status
-            logger.info(f"Batch Number: {batch_number}")
-            logger.info(f"Status code: {status_code}")
-            batch_number += 1
-
-            if validation_hit and status_code == 200:
-                response = json.loads(result.read().decode('utf8'))
-                validation_messages = response.get("validationMessages", [])
-                if validation_messages:
-                    logger.error(f"| Validation messages:")
-                    for validation in validation_messages:
-                        message = validation["description"]
-                        logger.error(f"|  {message}")
-                return response
-
-        return status_code
+        results = self._map_batches(post_batch, batched_event_list)
+
+        if validation_hit:
+            return self._merge_validation_responses(results)
+        return results
+
+    def _map_batches(self, post_batch, batches):
+        # Call post_batch(batch_index, batch) for every batch, concurrently if a thread pool is configured.
+        if self.max_workers and len(batches) > 1:
+            results = SendResult(self._get_executor().map(post_batch, range(len(batches)), batches))
+        else:
+            results = SendResult(post_batch(index, batch) for index, batch in enumerate(batches))
+        self._log_results(results)
+        return results
+
+    def _log_results(self, results):
+        if logger.isEnabledFor(logging.INFO):
+            for result in results:
+                self.log_sampler.log(logger, logging.INFO, None, "Batch Number: %d", result.batch_index + 1, batch_index=result.batch_index)
+                self.log_sampler.log(logger, logging.INFO, None, "Status code: %s", result.status, batch_index=result.batch_index, status=result.status)
+
+    def _post_batch(self, batch_index, event_count, url, body):
+        # Send one encoded batch; transport failures are recorded on the result instead of interrupting the other batches.
+        # The asyncio classes differ only in how they wait and call the transport.
+        start = time.perf_counter()
+        body, headers = self._compress(body)
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self._stream_id())
+            attempt_start = time.perf_counter()
+            try:
+                response = self.transport.post(url, body, headers)
+            except _TRANSPORT_ERRORS as e:
+                delay = self._retry_delay(batch_index, attempt, attempt_start, e, len(body))
+                if delay is None:
+                    return self._batch_result(batch_index, event_count, start, attempt, len(body), error=e)
+                time.sleep(delay)
+                attempt += 1
+            else:
+                return self._batch_result(batch_index, event_count, start, attempt, len(body), response=response, attempt_start=attempt_start)
+
+    def _retry_delay(self, batch_index, attempt, attempt_start, error, body_size):
+        # Record a failed attempt and return the number of seconds to wait before the next one, or None if the batch
+        # has failed for good.
+        status = error.code if isinstance(error, urllib.error.HTTPError) else None
+        metrics = self.metrics
+        if metrics.enabled:
+            metrics.on_request(time.perf_counter() - attempt_start, status, body_size)
+        if self.retry is not None and self.retry.should_retry(attempt, error):
+            delay = self.retry.backoff(attempt, error)
+            self.log_sampler.log(logger, logging.INFO, None, "Batch %d attempt %d failed (%s); retrying in %.2fs", batch_index + 1, attempt, error, delay, batch_index=batch_index, attempt=attempt, status=status)
+            if metrics.enabled:
+                metrics.on_retry(attempt, error)
+            return delay
+        self.log_sampler.log(logger, logging.ERROR, ("batch_failed", type(error).__name__, status), "Batch %d failed after %d attempt(s): %s", batch_index + 1, attempt, error, batch_index=batch_index, attempts=attempt, status=status)
+        return None
+
+    def _batch_result(self, batch_index, event_count, start, attempts, body_size, response=None, error=None, attempt_start=None):
+        # Build the result of a batch from the response of its last attempt or the error that ended it.
+        metrics = self.metrics
+        if response is not None:
+            if metrics.enabled:
+                metrics.on_request(time.perf_counter() - attempt_start, response.status, body_size)
+            result = BatchResult(batch_index, event_count, status=response.status, latency=time.perf_counter() - start, attempts=attempts, response=response)
+        else:
+            status = error.code if isinstance(error, urllib.error.HTTPError) else None
+            result = BatchResult(batch_index, event_count, status=status, latency=time.perf_counter() - start, attempts=attempts, error=error)
+        if metrics.enabled:
+            metrics.on_batch(result, body_size)
+        return result
+
+    def _compress(self, body):
+        # Compress a request body once, before any attempt is made to send it.
+        if self.compression is None:
+            return body, self._request_headers
+        return self.compression.compress(body, self._request_headers)
+
+    def _get_executor(self):
+        # The thread pool is shared by every send of this tracking object.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ga4mp")
+        return self._executor
+
+    def _merge_validation_responses(self, results):
+        # Combine the validation messages of every batch into a single validation server response.
+        merged = {"validationMessages": []}
+        for result in results:
+            if result.ok and result.status == 200:
+                response = self._parse_validation_response(result.response.read())
+                merged["validationMessages"].extend(response.get("validationMessages", []))
+        if not any(result.ok for result in results):
+            results.raise_for_errors()
+        return merged
+
+    def _get_domain(self, validation_hit):
+        if validation_hit is True:
+            return self._validation_domain
+        return self._base_domain
+
+    def _prepare_batch(self, batch, domain, postpone=False, date=None):
+        """
+        Method to build the url and the encoded request body for a single batch of events.
+
+        Parameters
+        ----------
+        batch : List[Dict]
+            Up to 25 events.
+        domain : string
+            Collection or validation endpoint.
+        postpone : bool, optional
+            Boolean to depict if the batch holds postponed events, which are sent with event-level timestamps, by default False
+        date : datetime
+            Python datetime object for sending a historical event at the given date.
+
+        Returns
+        -------
+        Tuple[str, bytes]
+            The url and the UTF-8 encoded JSON body.
+        """
+        # make adjustments for postponed hit: each event carries the time it was recorded at
+        if postpone:
+            batch = [
+                {"name": event["name"], "params": event["params"], "timestamp_micros": event["_timestamp_micros"]}
+                if "_timestamp_micros" in event
+                else event
+                for event in batch
+            ]
+
+        # url and request slightly differ by subclass; everything but the events is encoded once and cached
+        template = self._request_template(domain)
+
+        timestamp_micros = None
+        if date is not None:
+            logger.info("Setting event timestamp to: %s", date)
+            assert (
+                postpone is False
+            ), "Cannot send postponed historical hit, ensure postpone=False"
+
+            ts = self._datetime_to_timestamp(date)
+            ts_micro = self._get_timestamp(ts)
+            timestamp_micros = int(ts_micro)
+            logger.info("Timestamp of request is: %d", timestamp_micros)
+
+        if not self.metrics.enabled:
+            return template.url, self._request_encoder.encode_with_prefix(template.prefix, batch, timestamp_micros=timestamp_micros)
+        start = time.perf_counter()
+        body = self._request_encoder.encode_with_prefix(template.prefix, batch, timestamp_micros=timestamp_micros)
+        self.metrics.on_serialize(time.perf_counter() - start, len(body))
+        return template.url, body
+
+    def _parse_validation_response(self, body):
+        # Decode a validation server response and log its messages.
+        response = json.loads(body.decode('utf8'))
+        validation_messages = response.get("validationMessages", [])
+        if validation_messages:
+            logger.error("| Validation messages:")
+            for validation in validation_messages:
+                logger.error("|  %s", validation["description"])
+        return response
 
     def _check_params(self, events):
 
@@ -260,29 +681,7 @@ class BaseGa4mp(object):
             }]
         """
 
-        # check to make sure it's a list of dictionaries with the right keys
-
-        assert type(events) == list, "events should be a list"
-
-        for event in events:
-
-            assert isinstance(event, dict), "each event should be an instance of a dictionary"
-
-            assert "name" in event, 'each event should have a "name" key'
-
-            assert "params" in event, 'each event should have a "params" key'
-
-        # check for any missing or invalid parameters
-
-        for e in events:
-            event_name = e["name"]
-            event_params = e["params"]
-            if event_name in params_dict.keys():
-                for parameter in params_dict[event_name]:
-                    if parameter not in event_params.keys():
-                        logger.warning(
-                            f"WARNING: Event parameters do not match event type.\nFor {event_name} event type, the correct parameter(s) are {params_dict[event_name]}.\nThe parameter '{parameter}' triggered this warning.\nFor a breakdown of currently supported event types and their parameters go here: https://support.google.com/analytics/answer/9267735\n"
-                        )
+        self.schema_validator.validate(events)
 
     def _add_session_id_and_engagement_time(self, events):
         """
@@ -292,14 +691,14 @@ class BaseGa4mp(object):
             current_time_in_milliseconds = int(time.time() * 1000)
 
             event_params = event["params"]
-            if "session_id" not in event_params.keys():
-                event_params["session_id"] = self.store.get_session_parameter("session_id")
-            if "engagement_time_msec" not in event_params.keys():
-                last_interaction_time = self.store.get_session_parameter("last_interaction_time_msec")
-                event_params["engagement_time_msec"] = current_time_in_milliseconds - last_interaction_time if current_time_in_milliseconds > last_interaction_time else 0
-                self.store.set_session_parameter(name="last_interaction_time_msec", value=current_time_in_milliseconds)
+            if "session_id" not in event_params.keys() or "engagement_time_msec" not in event_params.keys():
+                session_id, engagement_time = self.sessions.touch_store(self.store, current_time_in_milliseconds)
+                if "session_id" not in event_params.keys():
+                    event_params["session_id"] = session_id
+                if "engagement_time_msec" not in event_params.keys():
+                    event_params["engagement_time_msec"] = engagement_time
 
-    def _add_user_props_to_hit(self, hit):
+    def _add_user_props_to_hit(self, hit, user_properties=None):
 
         """
         Method is a helper function to add user properties to outgoing hits.
@@ -307,20 +706,25 @@ class BaseGa4mp(object):
         Parameters
         ----------
         hit : dict
+        user_properties : dict, optional
+            User properties to add, by default the user properties of the store
         """
 
-        for key in self.store.get_all_user_properties():
+        if user_properties is None:
+            user_properties = self.store.get_all_user_properties()
+
+        for key in user_properties:
             try:
                 if key in ["user_id", "non_personalized_ads"]:
-                    hit.update({key: self.store.get_user_property(key)})
+                    hit.update({key: user_properties[key]})
                 else:
                     if "user_properties" not in hit.keys():
                         hit.update({"user_properties": {}})
                     hit["user_properties"].update(
-                        {key: {"value": self.store.get_user_property(key)}}
+                        {key: {"value": user_properties[key]}}
                     )
             except:
-                logger.info(f"Failed to add user property to outgoing hit: {key}")
+                logger.info("Failed to add user property to outgoing hit: %s", key)
 
     def _get_timestamp(self, timestamp):
         """
@@ -364,6 +768,14 @@ class BaseGa4mp(object):
                 date <= datetime.datetime.now()
             ), "Provided date cannot be in the future"
 
+    def _stream_id(self):
+        # measurement_id or firebase_app_id, the key of the rate limiter
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
+    def _identity(self):
+        # client_id or app_instance_id, the scope of the deduplicator
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
     def _build_url(self, domain):
         raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
 
@@ -382,11 +794,17 @@ class GtagMP(BaseGa4mp):
         A unique identifier for a client, representing a specific browser/device.
     """
 
-    def __init__(self, api_secret, measurement_id, client_id,):
-        super().__init__(api_secret)
+    def __init__(self, api_secret, measurement_id, client_id, store: BaseStore = None, transport: BaseTransport = None, max_workers: int = None, retry: RetryPolicy = None, spool: SegmentSpool = None, schema_mode: str = schema.WARN, serializer: JSONSerializer = None, session_timeout: float = DEFAULT_SESSION_TIMEOUT, batcher: SizeAwareBatcher = None, compression: Compression = None, metrics: Metrics = None, log_sampler: LogSampler = None, rate_limiter: RateLimiter = None, deduplicator: Deduplicator = None):
+        super().__init__(api_secret, store=store, transport=transport, max_workers=max_workers, retry=retry, spool=spool, schema_mode=schema_mode, serializer=serializer, session_timeout=session_timeout, batcher=batcher, compression=compression, metrics=metrics, log_sampler=log_sampler, rate_limiter=rate_limiter, deduplicator=deduplicator)
         self.measurement_id = measurement_id
         self.client_id = client_id
 
+    def _stream_id(self):
+        return self.measurement_id
+
+    def _identity(self):
+        return self.client_id
+
     def _build_url(self, domain):
         return f"{domain}?measurement_id={self.measurement_id}&api_secret={self.api_secret}"
 
@@ -417,11 +835,17 @@ class FirebaseMP(BaseGa4mp):
             * Unity - GetAnalyticsInstanceIdAsync() - https://firebase.google.com/docs/reference/unity/class/firebase/analytics/firebase-analytics#getanalyticsinstanceidasync
     """
 
-    def __init__(self, api_secret, firebase_app_id, app_instance_id):
-        super().__init__(api_secret)
+    def __init__(self, api_secret, firebase_app_id, app_instance_id, store: BaseStore = None, transport: BaseTransport = None, max_workers: int = None, retry: RetryPolicy = None, spool: SegmentSpool = None, schema_mode: str = schema.WARN, serializer: JSONSerializer = None, session_timeout: float = DEFAULT_SESSION_TIMEOUT, batcher: SizeAwareBatcher = None, compression: Compression = None, metrics: Metrics = None, log_sampler: LogSampler = None, rate_limiter: RateLimiter = None, deduplicator: Deduplicator = None):
+        super().__init__(api_secret, store=store, transport=transport, max_workers=max_workers, retry=retry, spool=spool, schema_mode=schema_mode, serializer=serializer, session_timeout=session_timeout, batcher=batcher, compression=compression, metrics=metrics, log_sampler=log_sampler, rate_limiter=rate_limiter, deduplicator=deduplicator)
         self.firebase_app_id = firebase_app_id
         self.app_instance_id = app_instance_id
 
+    def _stream_id(self):
+        return self.firebase_app_id
+
+    def _identity(self):
+        return self.app_instance_id
+
     def _build_url(self, domain):
         return f"{domain}?firebase_app_id={self.firebase_app_id}&api_secret={self.api_secret}"
 
@@ -1,4 +1,10 @@
+import sys
+
 class Item(dict):
+    # Ecommerce item dictionary. The empty __slots__ keeps items from carrying an attribute dictionary of their own,
+    # and parameter names are interned.
+    __slots__ = ()
+
     def __init__(self, item_id=None, item_name=None):
         if item_id is None and item_name is None:
             raise ValueError("At least one of 'item_id' and 'item_name' is required.")
@@ -8,4 +14,8 @@ class Item(dict):
             self.set_parameter("item_name", item_name)
 
     def set_parameter(self, name, value):
-        self[name] = value
\ No newline at end of file
+        self[sys.intern(name)] = value
+
+    def to_dict(self):
+        # Plain dictionary copy of the item's parameters.
+        return dict(self)
@@ -0,0 +1,92 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import logging
+import random
+import threading
+import time
+
+class LogSampler(object):
+    """
+    Decides which log records of the send path are emitted, and emits them with their fields attached as the `ga4mp`
+    attribute of the record (`logging.LogRecord.ga4mp`), for structured log formatters.
+
+    Records below the effective level of their logger are discarded before anything is formatted. Records below
+    WARNING are sampled at `sample_rate`. Warnings and errors with the same key are emitted at most once every
+    `interval` seconds; the repeats in between are counted and the count is added to the next record that gets
+    through.
+
+    Parameters
+    ----------
+    sample_rate : float, optional
+        Fraction of the DEBUG and INFO records that are emitted, by default 1.0
+    interval : float, optional
+        Minimum number of seconds between two warnings or errors with the same key, by default 60.0 (0 to emit all)
+    max_keys : int, optional
+        Number of keys remembered for rate limiting; they are all forgotten when the limit is reached, by default 1000
+    """
+
+    def __init__(self, sample_rate=1.0, interval=60.0, max_keys=1000, clock=time.monotonic):
+        assert 0.0 <= sample_rate <= 1.0, "sample_rate should be between 0 and 1"
+        assert interval >= 0, "interval cannot be negative"
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limits = {}  # key: [time the key may be logged again, repeats suppressed since]
+
+    def log(self, logger, level, key, msg, *args, **fields):
+        """
+        Method to emit a record if it passes the sampler.
+
+        Parameters
+        ----------
+        logger : logging.Logger
+            Logger emitting the record.
+        level : int
+            Level of the record.
+        key : Hashable
+            Identifies repeats of a warning or an error for rate limiting; None to never rate limit the record.
+        msg : str
+            %-style message, formatted with `args` only if the record is emitted.
+        **fields
+            Structured fields of the record.
+        """
+        if not logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return
+        elif key is not None and self.interval > 0:
+            suppressed = self._acquire(key)
+            if suppressed is None:
+                return
+            if suppressed:
+                msg += " (%d similar messages suppressed)"
+                args += (suppressed,)
+                fields["suppressed"] = suppressed
+        logger.log(level, msg, *args, extra={"ga4mp": fields}, stacklevel=2)
+
+    def _acquire(self, key):
+        # Number of repeats suppressed since the key was last logged, or None if it cannot be logged yet.
+        now = self._clock()
+        with self._lock:
+            limit = self._limits.get(key)
+            if limit is None:
+                if len(self._limits) >= self.max_keys:
+                    self._limits.clear()
+                self._limits[key] = [now + self.interval, 0]
+                return 0
+            if now < limit[0]:
+                limit[1] += 1
+                return None
+            suppressed = limit[1]
+            limit[0], limit[1] = now + self.interval, 0
+            return suppressed
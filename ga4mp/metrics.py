@@ -0,0 +1,198 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import bisect
+import threading
+import time
+
+# Upper bounds in seconds of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds in seconds of the serialization time histogram buckets.
+SERIALIZATION_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01)
+
+class Metrics(object):
+    """
+    Hooks called by the send pipeline. This base class does nothing; tracking objects only time their work and call
+    the hooks when `enabled` is True, so the default costs one attribute check per batch.
+
+    Subclass it, or use `MetricsRecorder`, to collect measurements.
+    """
+
+    enabled = False
+
+    def on_enqueue(self, count):
+        # Events accepted by send(): queued for the background worker, postponed or about to be sent.
+        pass
+
+    def on_serialize(self, seconds, size):
+        # A request body of `size` bytes was encoded in `seconds`.
+        pass
+
+    def on_request(self, seconds, status, size):
+        # One HTTP attempt of `size` bytes on the wire took `seconds`; `status` is None if no response was received.
+        pass
+
+    def on_retry(self, attempt, error):
+        # Attempt number `attempt` failed with `error` and will be retried.
+        pass
+
+    def on_batch(self, result, size):
+        # A batch is done, sent or failed after its last attempt; `result` is its BatchResult.
+        pass
+
+    def on_drop(self, count):
+        # Events were discarded by the background queue's overflow policy.
+        pass
+
+NOOP_METRICS = Metrics()
+
+class _Histogram(object):
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRecorder(Metrics):
+    """
+    Collects counters and latency histograms of the send pipeline, and optionally reports every batch as a span.
+
+    Parameters
+    ----------
+    span_callback : Callable, optional
+        Called once per batch with `(name, start_time_ns, end_time_ns, attributes, error)`, e.g. an
+        `OpenTelemetrySpans`, by default None
+    namespace : str, optional
+        Prefix of the exported metric names, by default "ga4mp"
+    """
+
+    enabled = True
+
+    def __init__(self, span_callback=None, namespace="ga4mp"):
+        self.span_callback = span_callback
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.counters = {
+            "events_enqueued_total": 0,
+            "events_sent_total": 0,
+            "events_failed_total": 0,
+            "events_dropped_total": 0,
+            "batches_sent_total": 0,
+            "batches_failed_total": 0,
+            "requests_total": 0,
+            "retries_total": 0,
+            "bytes_sent_total": 0,
+        }
+        self.status_counts = {}
+        self.request_latency = _Histogram(LATENCY_BUCKETS)
+        self.batch_latency = _Histogram(LATENCY_BUCKETS)
+        self.serialization_time = _Histogram(SERIALIZATION_BUCKETS)
+
+    def on_enqueue(self, count):
+        with self._lock:
+            self.counters["events_enqueued_total"] += count
+
+    def on_serialize(self, seconds, size):
+        with self._lock:
+            self.serialization_time.observe(seconds)
+
+    def on_request(self, seconds, status, size):
+        with self._lock:
+            self.counters["requests_total"] += 1
+            self.counters["bytes_sent_total"] += size
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.request_latency.observe(seconds)
+
+    def on_retry(self, attempt, error):
+        with self._lock:
+            self.counters["retries_total"] += 1
+
+    def on_batch(self, result, size):
+        with self._lock:
+            if result.ok:
+                self.counters["batches_sent_total"] += 1
+                self.counters["events_sent_total"] += result.event_count
+            else:
+                self.counters["batches_failed_total"] += 1
+                self.counters["events_failed_total"] += result.event_count
+            self.batch_latency.observe(result.latency)
+        if self.span_callback is not None:
+            end = time.time_ns()
+            attributes = {
+                "ga4mp.batch_index": result.batch_index,
+                "ga4mp.event_count": result.event_count,
+                "ga4mp.attempts": result.attempts,
+                "ga4mp.bytes": size,
+            }
+            if result.status is not None:
+                attributes["http.status_code"] = result.status
+            self.span_callback("ga4mp.send_batch", end - int(result.latency * 1e9), end, attributes, result.error)
+
+    def on_drop(self, count):
+        with self._lock:
+            self.counters["events_dropped_total"] += count
+
+    def prometheus_text(self):
+        """
+        Method to export the collected metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+        """
+        prefix = self.namespace + "_"
+        lines = []
+        with self._lock:
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {prefix}{name} counter")
+                lines.append(f"{prefix}{name} {value}")
+            lines.append(f"# TYPE {prefix}responses_total counter")
+            for status, value in sorted(self.status_counts.items(), key=lambda item: str(item[0])):
+                lines.append(f'{prefix}responses_total{{status="{status if status is not None else "none"}"}} {value}')
+            for name, histogram in (
+                ("request_duration_seconds", self.request_latency),
+                ("batch_duration_seconds", self.batch_latency),
+                ("serialization_duration_seconds", self.serialization_time),
+            ):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}{name}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{prefix}{name}_sum {histogram.total}")
+                lines.append(f"{prefix}{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+class OpenTelemetrySpans(object):
+    """
+    Span callback for `MetricsRecorder` that records every batch as a span of an OpenTelemetry tracer.
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer
+        Any object with the OpenTelemetry `start_span(name, attributes=..., start_time=...)` method, whose spans have
+        `record_exception()` and `end(end_time=...)`.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def __call__(self, name, start_time_ns, end_time_ns, attributes, error):
+        span = self.tracer.start_span(name, attributes=attributes, start_time=start_time_ns)
+        if error is not None:
+            span.record_exception(error)
+        span.end(end_time=end_time_ns)
@@ -0,0 +1,161 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+class RateLimiter(object):
+    """
+    Parent class for the rate limiters applied by the tracking classes before every request, with the measurement_id or
+    firebase_app_id of the tracking object as the key.
+
+    Subclasses must implement `reserve()`.
+    """
+
+    def reserve(self, key, cost=1):
+        """
+        Method to take `cost` tokens for `key`.
+
+        Parameters
+        ----------
+        key : str
+            Budget the tokens are taken from.
+        cost : float, optional
+            Number of tokens, by default 1
+
+        Returns
+        -------
+        float
+            Number of seconds the caller must wait before going ahead; the tokens are taken either way, so calls are
+            served in the order they reserved.
+        """
+        raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
+
+    def acquire(self, key, cost=1):
+        """
+        Method to take `cost` tokens for `key`, sleeping until they are available.
+
+        Returns
+        -------
+        float
+            Number of seconds spent waiting.
+        """
+        delay = self.reserve(key, cost)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+class TokenBucket(RateLimiter):
+    """
+    Token bucket shared by the threads of a process: every key gets `rate` tokens per second, up to `burst` tokens
+    saved while idle.
+
+    Parameters
+    ----------
+    rate : float
+        Number of tokens (requests, by default) per second.
+    burst : float, optional
+        Capacity of the bucket, i.e. the number of requests that may go out at once after an idle period, by default
+        `max(1, rate)`
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        assert rate > 0, "rate should be positive"
+        self.rate = rate
+        self.burst = max(1.0, rate) if burst is None else burst
+        assert self.burst >= 1, "burst should be at least 1"
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}  # key: (tokens, time of the last update)
+
+    def reserve(self, key, cost=1):
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate) - cost
+            self._buckets[key] = (tokens, now)
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket kept in a file and shared by every process using the same path, e.g. the workers of a process pool or
+    of several import jobs, with an exclusive `fcntl` lock held while the buckets are updated. Tokens are refilled by
+    wall clock time, which all processes share.
+
+    Parameters
+    ----------
+    path : string
+        Path of the state file; created if it does not exist.
+    rate : float
+        Number of tokens (requests, by default) per second.
+    burst : float, optional
+        Capacity of the bucket, by default `max(1, rate)`
+    """
+
+    def __init__(self, path, rate, burst=None, clock=time.time):
+        if fcntl is None:
+            raise ImportError("FileTokenBucket requires the fcntl module, which is only available on POSIX systems")
+        super().__init__(rate, burst=burst, clock=clock)
+        self.path = str(path)
+        self._file = None
+        self._pid = None
+
+    def reserve(self, key, cost=1):
+        with self._lock:
+            state_file = self._open()
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                data = state_file.read()
+                buckets = json.loads(data) if data else {}
+                now = self._clock()
+                tokens, updated = buckets.get(key, (self.burst, now))
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate) - cost
+                buckets[key] = (tokens, now)
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(json.dumps(buckets).encode("utf-8"))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def __getstate__(self):
+        # picklable for the initializer of a process pool; the lock and the file are recreated in the worker
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_file"] = state["_pid"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def close(self):
+        """
+        Method to close the state file; it is reopened by the next `reserve()`.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        # flock locks belong to an open file, which a forked child shares with its parent, so each process opens its own.
+        if self._file is None or self._pid != os.getpid():
+            self._file = open(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+            self._pid = os.getpid()
+        return self._file
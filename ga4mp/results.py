@@ -0,0 +1,78 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+class BatchResult(object):
+    """
+    Outcome of sending a single batch of events.
+
+    Parameters
+    ----------
+    batch_index : int
+        Position of the batch among the batches of a single send, starting at 0.
+    event_count : int
+        Number of events in the batch.
+    status : int
+        HTTP status code, or None if no response was received.
+    latency : float
+        Seconds spent sending the batch, including any retries.
+    attempts : int
+        Number of requests made for the batch.
+    error : Exception
+        The error that made the batch fail, or None if it was sent.
+    response : Response
+        The transport response, or None if the batch failed.
+    """
+
+    __slots__ = ("batch_index", "event_count", "status", "latency", "attempts", "error", "response")
+
+    def __init__(self, batch_index, event_count, status=None, latency=0.0, attempts=1, error=None, response=None):
+        self.batch_index = batch_index
+        self.event_count = event_count
+        self.status = status
+        self.latency = latency
+        self.attempts = attempts
+        self.error = error
+        self.response = response
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return (
+            f"BatchResult(batch_index={self.batch_index}, event_count={self.event_count}, status={self.status}, "
+            f"latency={self.latency:.4f}, attempts={self.attempts}, error={self.error!r})"
+        )
+
+class SendResult(list):
+    """
+    List of the `BatchResult` of every batch of a single send, in batch order.
+    """
+
+    @property
+    def ok(self):
+        # True if every batch was sent.
+        return all(result.ok for result in self)
+
+    @property
+    def failed(self):
+        return [result for result in self if not result.ok]
+
+    @property
+    def status_code(self):
+        # Status code of the last batch, which is what send() used to return.
+        return self[-1].status if self else None
+
+    def raise_for_errors(self):
+        """
+        Raise the error of the first failed batch, if any.
+        """
+        for result in self:
+            if result.error is not None:
+                raise result.error
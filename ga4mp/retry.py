@@ -0,0 +1,104 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import asyncio
+import email.utils
+import random
+import socket
+import time
+import urllib.error
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is retried and how long to wait before the next attempt.
+
+    Only transient failures are retried: the HTTP statuses in `retry_statuses` and connection-level errors (refused or
+    reset connections, timeouts). Waits use exponential backoff with full jitter, i.e. a random delay between 0 and
+    `min(backoff_max, backoff_base * 2 ** (attempt - 1))`, unless the server sent a `Retry-After` header.
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        Total number of attempts per request, including the first one, by default 3
+    backoff_base : float, optional
+        Upper bound in seconds of the first backoff, doubled on every further attempt, by default 0.5
+    backoff_max : float, optional
+        Maximum number of seconds to wait between attempts, also applied to `Retry-After`, by default 30
+    retry_statuses : Iterable[int], optional
+        HTTP statuses worth retrying, by default 408, 429, 500, 502, 503 and 504
+    respect_retry_after : bool, optional
+        Boolean to depict if a `Retry-After` response header replaces the computed backoff, by default True
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_max=30.0, retry_statuses=(408, 429, 500, 502, 503, 504), respect_retry_after=True):
+        assert max_attempts >= 1, "max_attempts should be at least 1"
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, attempt, error):
+        """
+        Method to check whether another attempt should follow the given failed attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the attempt that failed, starting at 1.
+        error : Exception
+            The error raised by the transport.
+        """
+        return attempt < self.max_attempts and self.is_retryable(error)
+
+    def is_retryable(self, error):
+        """
+        Method to check whether a failed attempt may be retried.
+
+        Parameters
+        ----------
+        error : Exception
+            The error raised by the transport.
+        """
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code in self.retry_statuses
+        if isinstance(error, urllib.error.URLError):
+            error = error.reason
+        return isinstance(error, (ConnectionError, socket.timeout, TimeoutError, asyncio.TimeoutError))
+
+    def backoff(self, attempt, error=None):
+        """
+        Method to compute the number of seconds to wait after the given failed attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the attempt that failed, starting at 1.
+        error : Exception, optional
+            The error of that attempt, checked for a `Retry-After` header.
+        """
+        retry_after = self._retry_after(error) if self.respect_retry_after else None
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _retry_after(self, error):
+        # Seconds requested by a Retry-After header, given either as seconds or as an HTTP date.
+        headers = getattr(error, "headers", None)
+        value = headers.get("Retry-After") if headers is not None else None
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
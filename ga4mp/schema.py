@@ -0,0 +1,135 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import logging
+import threading
+
+from ga4mp.utils import params_dict
+
+logger = logging.getLogger(__name__)
+
+OFF = "off"
+WARN = "warn"
+WARN_ONCE = "warn_once"
+STRICT = "strict"
+
+_MODES = (OFF, WARN, WARN_ONCE, STRICT)
+
+_MISMATCH_WARNING = (
+    "WARNING: Event parameters do not match event type.\n"
+    "For %s event type, the correct parameter(s) are %s.\n"
+    "The parameter '%s' triggered this warning.\n"
+    "For a breakdown of currently supported event types and their parameters go here: https://support.google.com/analytics/answer/9267735\n"
+)
+
+# Bumped whenever the catalog changes, so that validators know to recompile.
+_catalog_version = 0
+
+def invalidate():
+    """
+    Function to signal that `params_dict` has changed and compiled schemas must be rebuilt.
+    """
+    global _catalog_version
+    _catalog_version += 1
+
+def compile_schemas(catalog=None):
+    """
+    Function to compile the event catalog into `{event_name: (frozenset of parameters, parameter list)}`.
+
+    Event names without expected parameters are left out, since there is nothing to check for them.
+
+    Parameters
+    ----------
+    catalog : Dict[str, List[str]], optional
+        Event names and their expected parameters, by default `ga4mp.utils.params_dict`
+    """
+    catalog = params_dict if catalog is None else catalog
+    return {name: (frozenset(parameters), list(parameters)) for name, parameters in catalog.items() if parameters}
+
+class SchemaValidator(object):
+    """
+    Checks batches of events against the compiled event catalog.
+
+    Parameters
+    ----------
+    mode : str, optional
+        "off" skips the parameter check, "warn" logs a warning for every missing parameter of every event (rate
+        limited by `sampler`, if any), "warn_once" logs the warnings of an event name only the first time it is seen and "strict" raises a ValueError,
+        by default "warn"
+    catalog : Dict[str, List[str]], optional
+        Event names and their expected parameters, by default `ga4mp.utils.params_dict`
+    logger : logging.Logger, optional
+        Logger receiving the warnings, by default the logger of this module
+    sampler : ga4mp.logs.LogSampler, optional
+        Rate limits repeated warnings of the same event name and parameter, by default None (every warning is logged).
+        The tracking classes pass their `log_sampler`, which logs an event name and parameter at most once a minute
+    """
+
+    def __init__(self, mode=WARN, catalog=None, logger=logger, sampler=None):
+        assert mode in _MODES, f"mode should be one of {_MODES}"
+        self.mode = mode
+        self.logger = logger
+        self.sampler = sampler
+        self._catalog = catalog
+        self._warned = set()
+        self._lock = threading.Lock()
+        self._compile()
+
+    def validate(self, events):
+        """
+        Method to check the structure of a batch of events and whether they carry the parameters expected for their name.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events in the format accepted by `BaseGa4mp.send()`.
+        """
+        # check to make sure it's a list of dictionaries with the right keys
+        assert type(events) == list, "events should be a list"
+        for event in events:
+            assert isinstance(event, dict), "each event should be an instance of a dictionary"
+            assert "name" in event, 'each event should have a "name" key'
+            assert "params" in event, 'each event should have a "params" key'
+
+        if self.mode == OFF:
+            return
+        if self._version != _catalog_version:
+            self._compile()
+
+        # check for any missing parameters
+        schemas = self._schemas
+        for event in events:
+            schema = schemas.get(event["name"])
+            if schema is not None and not schema[0] <= event["params"].keys():
+                self._report(event, schema)
+
+    def _report(self, event, schema):
+        event_name = event["name"]
+        if self.mode == WARN_ONCE:
+            if event_name in self._warned:
+                return
+            with self._lock:
+                if event_name in self._warned:
+                    return
+                self._warned.add(event_name)
+        if self.mode != STRICT and not self.logger.isEnabledFor(logging.WARNING):
+            return
+        expected = schema[1]
+        missing = [parameter for parameter in expected if parameter not in event["params"]]
+        if self.mode == STRICT:
+            raise ValueError(f"Event {event_name} is missing the parameter(s) {missing}; the correct parameter(s) are {expected}.")
+        for parameter in missing:
+            if self.sampler is None:
+                self.logger.warning(_MISMATCH_WARNING, event_name, expected, parameter)
+            else:
+                self.sampler.log(self.logger, logging.WARNING, (event_name, parameter), _MISMATCH_WARNING, event_name, expected, parameter, event_name=event_name, parameter=parameter)
+
+    def _compile(self):
+        self._version = _catalog_version
+        self._schemas = compile_schemas(self._catalog)
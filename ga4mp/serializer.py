@@ -0,0 +1,112 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import json
+
+class JSONSerializer(object):
+    """
+    Encodes request payloads to UTF-8 JSON bytes.
+
+    Parameters
+    ----------
+    dumps : Callable[[Any], Union[str, bytes]], optional
+        Function encoding an object to a JSON string or to bytes, e.g. `ujson.dumps` or `rapidjson.dumps`, by default a
+        compact stdlib `json` encoder
+    """
+
+    def __init__(self, dumps=None):
+        if dumps is None:
+            dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        self._dumps = dumps
+
+    def dumps(self, obj):
+        """
+        Method to encode an object.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded JSON document.
+        """
+        data = self._dumps(obj)
+        return data if isinstance(data, bytes) else data.encode("utf-8")
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Serializer using the optional `orjson` package, which encodes straight to bytes.
+    """
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("OrjsonSerializer requires the orjson package: pip install orjson") from e
+        super().__init__(dumps=orjson.dumps)
+
+    def dumps(self, obj):
+        return self._dumps(obj)
+
+class RequestEncoder(object):
+    """
+    Builds request bodies from an encoded static part and a list of events.
+
+    The static part (client_id or app_instance_id, user_id, non_personalized_ads and user properties) is the same for
+    every batch of a tracking object, so it is encoded once by `encode_prefix()` and kept by the caller, e.g. in the
+    request templates of the tracking objects. The events are encoded once and joined to the prefix in a single
+    allocation of the size of the body.
+
+    Parameters
+    ----------
+    serializer : JSONSerializer, optional
+        Serializer used for the static part and the events, by default a `JSONSerializer`
+    """
+
+    def __init__(self, serializer=None):
+        self.serializer = serializer or JSONSerializer()
+
+    def encode_prefix(self, static):
+        """
+        Method to encode the start of a request, up to the events array.
+
+        Parameters
+        ----------
+        static : Dict
+            Request fields other than `events` and `timestamp_micros`.
+
+        Returns
+        -------
+        bytes
+        """
+        return self.serializer.dumps(static)[:-1] + (b',"events":' if static else b'"events":')
+
+    def encode_with_prefix(self, prefix, events, timestamp_micros=None):
+        """
+        Method to encode a request whose start has already been encoded by `encode_prefix()`.
+
+        Parameters
+        ----------
+        prefix : bytes
+            Encoded start of the request, up to the events array.
+        events : List[Dict]
+            Events of the request; the `encoded` array of a `ga4mp.batching.Batch` is used as it is.
+        timestamp_micros : int, optional
+            Request-level timestamp, by default None
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded JSON body.
+        """
+        encoded = getattr(events, "encoded", None)
+        if encoded is None:
+            encoded = self.serializer.dumps(events)
+        # one allocation of the final size, into which every part is copied once
+        if timestamp_micros is None:
+            return b"".join((prefix, encoded, b"}"))
+        return b"".join((prefix, encoded, b',"timestamp_micros":%d}' % timestamp_micros))
@@ -0,0 +1,176 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import heapq
+import itertools
+import threading
+import time
+
+# GA4 ends a session after 30 minutes of inactivity by default.
+DEFAULT_SESSION_TIMEOUT = 30 * 60
+
+class _Session(object):
+    # Session state of one client; a few slots instead of a store per client. `entry` is the sequence number of the
+    # session's heap entry; entries with another number were left behind by a forgotten session and are discarded.
+    __slots__ = ("session_id", "last_interaction_time_msec", "entry")
+
+    def __init__(self, session_id, last_interaction_time_msec, entry=None):
+        self.session_id = session_id
+        self.last_interaction_time_msec = last_interaction_time_msec
+        self.entry = entry
+
+class SessionManager(object):
+    """
+    Assigns session_ids and engagement times to events, starting a new session after a period of inactivity.
+
+    A tracking object keeps the session of its single client in its store (see `touch_store()`). Bulk senders keep the
+    sessions of many clients in the manager itself (see `touch()`); the sessions are indexed by expiration time in a
+    heap, so `evict_expired()` removes stale sessions in O(log n) each instead of scanning every session.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds of inactivity after which the next event starts a new session, or None to never start a new session,
+        by default 1800 (30 minutes, like GA4)
+    """
+
+    def __init__(self, timeout=DEFAULT_SESSION_TIMEOUT):
+        assert timeout is None or timeout > 0, "timeout must be positive or None"
+        self.timeout = timeout
+        self._timeout_msec = None if timeout is None else int(timeout * 1000)
+        self._sessions = {}
+        self._expirations = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def touch_store(self, store, current_time_in_milliseconds):
+        """
+        Method to record an interaction in the session kept in a store.
+
+        Parameters
+        ----------
+        store : BaseStore
+            Store holding the "session_id" and "last_interaction_time_msec" session parameters.
+        current_time_in_milliseconds : int
+            Time of the interaction.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The session_id and the engagement time in milliseconds of the interaction.
+        """
+        # read and advance the last interaction time in one step, so concurrent sends each get their own interval
+        last_interaction_time, _ = store.update_session_parameter(
+            "last_interaction_time_msec", lambda last: max(last, current_time_in_milliseconds), default=current_time_in_milliseconds
+        )
+        if self._expired(last_interaction_time, current_time_in_milliseconds):
+            session_id = current_time_in_milliseconds // 1000
+            store.set_session_parameter(name="session_id", value=session_id)
+            return session_id, 0
+        engagement_time = current_time_in_milliseconds - last_interaction_time if current_time_in_milliseconds > last_interaction_time else 0
+        return store.get_session_parameter("session_id"), engagement_time
+
+    def touch(self, key, current_time_in_milliseconds):
+        """
+        Method to record an interaction in the session of one of many clients kept by the manager.
+
+        Parameters
+        ----------
+        key : string
+            The client_id or app_instance_id.
+        current_time_in_milliseconds : int
+            Time of the interaction.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The session_id and the engagement time in milliseconds of the interaction.
+        """
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or self._expired(session.last_interaction_time_msec, current_time_in_milliseconds):
+                new_session = _Session(current_time_in_milliseconds // 1000, current_time_in_milliseconds)
+                self._sessions[key] = new_session
+                if session is not None:
+                    new_session.entry = session.entry
+                elif self._timeout_msec is not None:
+                    # one heap entry per client; it is moved forward lazily by evict_expired()
+                    new_session.entry = self._push(current_time_in_milliseconds + self._timeout_msec, key)
+                return new_session.session_id, 0
+
+            last_interaction_time = session.last_interaction_time_msec
+            if current_time_in_milliseconds > last_interaction_time:
+                session.last_interaction_time_msec = current_time_in_milliseconds
+                return session.session_id, current_time_in_milliseconds - last_interaction_time
+            return session.session_id, 0
+
+    def evict_expired(self, current_time_in_milliseconds=None):
+        """
+        Method to drop the sessions that have been inactive for longer than the timeout.
+
+        Parameters
+        ----------
+        current_time_in_milliseconds : int, optional
+            Current time, by default the system time
+
+        Returns
+        -------
+        int
+            Number of dropped sessions.
+        """
+        if self._timeout_msec is None:
+            return 0
+        if current_time_in_milliseconds is None:
+            current_time_in_milliseconds = int(time.time() * 1000)
+
+        evicted = 0
+        with self._lock:
+            expirations = self._expirations
+            while expirations and expirations[0][0] <= current_time_in_milliseconds:
+                _, entry, key = heapq.heappop(expirations)
+                session = self._sessions.get(key)
+                if session is None or session.entry != entry:
+                    continue  # forgotten
+                expires_at = session.last_interaction_time_msec + self._timeout_msec
+                if expires_at <= current_time_in_milliseconds:
+                    del self._sessions[key]
+                    evicted += 1
+                else:
+                    # touched since the entry was pushed
+                    session.entry = self._push(expires_at, key)
+        return evicted
+
+    def forget(self, key):
+        """
+        Method to drop the session of a client.
+        """
+        with self._lock:
+            if self._sessions.pop(key, None) is not None and len(self._expirations) > 2 * len(self._sessions) + 16:
+                # drop the entries of forgotten sessions, so that clients forgotten and seen again before their entry
+                # expires cannot grow the heap without bound
+                self._expirations = [
+                    expiration for expiration in self._expirations
+                    if expiration[2] in self._sessions and self._sessions[expiration[2]].entry == expiration[1]
+                ]
+                heapq.heapify(self._expirations)
+
+    def _push(self, expires_at, key):
+        # Add a heap entry for the session of `key`; the lock must be held. Returns its sequence number.
+        entry = next(self._counter)
+        heapq.heappush(self._expirations, (expires_at, entry, key))
+        return entry
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expired(self, last_interaction_time, current_time_in_milliseconds):
+        return self._timeout_msec is not None and current_time_in_milliseconds - last_interaction_time > self._timeout_msec
@@ -0,0 +1,169 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import multiprocessing
+import os
+import pickle
+import urllib.error
+import zlib
+
+from ga4mp.results import BatchResult, SendResult
+
+def shard_of(client_id, shards):
+    """
+    Function to map a client_id or app_instance_id to a shard, the same in every process and on every run (unlike the
+    randomized `hash()` of strings).
+    """
+    return zlib.crc32(str(client_id).encode("utf-8")) % shards
+
+def _portable_error(error):
+    # Errors are pickled back to the parent. An HTTPError holds its open response and cannot be unpickled, so it is
+    # sent as its fields and rebuilt by _restore_error(); other errors that do not survive pickling become a RuntimeError.
+    if error is None:
+        return None
+    if isinstance(error, urllib.error.HTTPError):
+        return ("http", error.url, error.code, error.msg, dict(error.headers or {}))
+    try:
+        pickle.loads(pickle.dumps(error))
+        return ("error", error)
+    except Exception:
+        return ("error", RuntimeError(f"{type(error).__name__}: {error}"))
+
+def _restore_error(portable):
+    if portable is None:
+        return None
+    if portable[0] == "http":
+        _, url, code, msg, headers = portable
+        return urllib.error.HTTPError(url, code, msg, headers, None)
+    return portable[1]
+
+def _worker(connection, factory):
+    # Runs in each worker process: one bulk tracking object, fed chunks of records until it receives None.
+    tracker = factory()
+    try:
+        while True:
+            records = connection.recv()
+            if records is None:
+                break
+            try:
+                results = tracker.send_bulk(records)
+            except Exception as e:
+                connection.send((False, _portable_error(e)))
+                continue
+            connection.send((True, [
+                (result.event_count, result.status, result.latency, result.attempts, _portable_error(result.error))
+                for result in results
+            ]))
+    finally:
+        tracker.close()
+        connection.close()
+
+class ShardedBulkSender(object):
+    """
+    Sends `(id, user_properties, events)` records from a pool of worker processes, so that validation, session
+    handling and serialization run on several cores instead of one.
+
+    Every worker builds its own bulk tracking object with `factory` and receives the records whose id maps to it
+    (`shard_of()`), so the session of an id always lives in the same worker. Records go to the workers and results
+    come back over pipes, pickled per call; each worker then sends its share of the batches through its own transport
+    and thread pool.
+
+    Parameters
+    ----------
+    factory : Callable[[], BulkMixin]
+        Picklable callable (a module-level function, or a `functools.partial` of `GtagBulkMP` or `FirebaseBulkMP`)
+        called once in every worker to create its tracking object.
+    processes : int, optional
+        Number of worker processes, by default `os.cpu_count()`
+    context : str, optional
+        Multiprocessing start method ("fork", "spawn" or "forkserver"), by default the platform default
+
+    Examples
+    --------
+    >>> from functools import partial
+    >>> from ga4mp.bulk import GtagBulkMP
+    >>> with ShardedBulkSender(partial(GtagBulkMP, api_secret="API_SECRET", measurement_id="MEASUREMENT_ID", max_workers=4), processes=4) as sender:
+    ...     results = sender.send_bulk(records)
+    """
+
+    def __init__(self, factory, processes=None, context=None):
+        self.processes = processes or os.cpu_count() or 1
+        assert self.processes > 0, "processes must be a positive integer"
+        context = multiprocessing.get_context(context)
+        self._connections = []
+        self._workers = []
+        for _ in range(self.processes):
+            parent_end, child_end = context.Pipe()
+            worker = context.Process(target=_worker, args=(child_end, factory), daemon=True)
+            worker.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def send_bulk(self, records):
+        """
+        Method to send the events of many clients; see `BulkMixin.send_bulk()`.
+
+        Parameters
+        ----------
+        records : Iterable[Tuple[str, Dict, List[Dict]]]
+            `(id, user_properties, events)` records.
+
+        Returns
+        -------
+        SendResult
+            The result of every payload, those of the first worker first; a result holds no response.
+        """
+        assert self._connections, "the sender has been closed"
+        shards = [[] for _ in range(self.processes)]
+        for record in records:
+            shards[shard_of(record[0], self.processes)].append(record)
+
+        # hand every worker its share first, so they all work at the same time, then collect their results
+        busy = []
+        for connection, shard in zip(self._connections, shards):
+            if shard:
+                connection.send(shard)
+                busy.append(connection)
+        replies = [self._receive(connection) for connection in busy]
+
+        results = SendResult()
+        for ok, payload in replies:
+            if not ok:
+                raise _restore_error(payload)
+            for event_count, status, latency, attempts, error in payload:
+                results.append(BatchResult(len(results), event_count, status=status, latency=latency, attempts=attempts, error=_restore_error(error)))
+        return results
+
+    def close(self):
+        """
+        Method to let the workers finish their work and stop them.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections = []
+        self._workers = []
+
+    def _receive(self, connection):
+        try:
+            return connection.recv()
+        except EOFError:
+            raise RuntimeError("A worker process of the ShardedBulkSender exited unexpectedly") from None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
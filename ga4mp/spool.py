@@ -0,0 +1,280 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from ga4mp.results import SendResult
+
+logger = logging.getLogger(__name__)
+
+class SegmentSpool(object):
+    """
+    Durable, append-only on-disk queue for postponed events, so they survive a crash or a deploy.
+
+    Events are appended as JSON lines to numbered segment files in `directory` and handed to the operating system right
+    away, so they survive a crash of the process. They are made durable against a crash of the machine with one fsync
+    every `fsync_every` events or `fsync_interval` seconds after an unsynced append (from a timer thread), whichever
+    comes first, instead of one fsync per event.
+    `drain()` replays the events in batches and records the position of the last acknowledged event in an `ack` file;
+    segments that are acknowledged completely are deleted. The events of a batch that fails are appended again at the
+    end of the spool, so they are replayed by the next drain; their event-level timestamps keep them in place in GA4.
+
+    Parameters
+    ----------
+    directory : string
+        Directory holding the segment files; created if it does not exist.
+    segment_max_events : int, optional
+        Number of events after which a new segment is started, by default 10000
+    fsync_every : int, optional
+        Number of appended events after which the active segment is fsynced, by default 1000
+    fsync_interval : float, optional
+        Maximum number of seconds appended events may wait for an fsync, by default 1
+    """
+
+    _ACK_FILE = "ack"
+    _SUFFIX = ".seg"
+
+    def __init__(self, directory, segment_max_events=10000, fsync_every=1000, fsync_interval=1.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_events = segment_max_events
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        self._timer = None
+        self._ack = self._read_ack()
+        self._open_active_segment()
+
+    def append(self, events):
+        """
+        Method to append events to the spool.
+
+        Parameters
+        ----------
+        events : List[Dict]
+            Events to append, usually stamped with `_timestamp_micros`.
+        """
+        lines = b"".join(json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n" for event in events)
+        with self._lock:
+            self._active_file.write(lines)
+            self._active_file.flush()
+            self._active_events += len(events)
+            self._unsynced += len(events)
+            if self._unsynced >= self.fsync_every:
+                self.sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+            if self._active_events >= self.segment_max_events:
+                self._rotate()
+
+    def sync(self):
+        """
+        Method to make every appended event durable.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._active_file.flush()
+            os.fsync(self._active_file.fileno())
+            self._unsynced = 0
+
+    def _timed_sync(self):
+        with self._lock:
+            if self._timer is not None and not self._active_file.closed:
+                self.sync()
+
+    def read_batches(self, batch_size=25, end=None):
+        """
+        Method to iterate over the events that have not been acknowledged yet.
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            Maximum number of events per batch, by default 25
+        end : Tuple[int, int], optional
+            Position at which to stop reading, by default the end of the spool
+
+        Yields
+        ------
+        Tuple[List[Dict], Tuple[int, int]]
+            A batch of events and the position right after its last event, to pass to `ack()`.
+        """
+        with self._lock:
+            self._active_file.flush()
+            segments = self._segments()
+
+        ack_segment, ack_offset = self._ack
+        batch = []
+        for segment in segments:
+            if segment < ack_segment:
+                continue
+            if end is not None and segment > end[0]:
+                break
+            with open(self._segment_path(segment), "rb") as segment_file:
+                offset = ack_offset if segment == ack_segment else 0
+                segment_file.seek(offset)
+                for line in segment_file:
+                    if not line.endswith(b"\n"):
+                        break  # being written right now
+                    if end is not None and (segment, offset) >= end:
+                        break
+                    offset += len(line)
+                    batch.append(json.loads(line))
+                    if len(batch) == batch_size:
+                        yield batch, (segment, offset)
+                        batch = []
+                if batch:
+                    yield batch, (segment, offset)
+                    batch = []
+
+    def ack(self, position):
+        """
+        Method to mark every event up to `position` as sent, deleting segments that are no longer needed.
+
+        Parameters
+        ----------
+        position : Tuple[int, int]
+            A position yielded by `read_batches()`.
+        """
+        with self._lock:
+            segment, offset = position
+            if (segment, offset) <= self._ack:
+                return
+            if segment != self._active_segment and offset >= self._segment_path(segment).stat().st_size:
+                # the whole segment is acknowledged; move the ack to the start of the next one
+                segment, offset = segment + 1, 0
+            self._write_ack((segment, offset))
+            for old_segment in self._segments():
+                if old_segment < segment:
+                    self._segment_path(old_segment).unlink()
+
+    def drain(self, tracker, chunk_batches=100):
+        """
+        Method to send every unacknowledged event through a tracking object.
+
+        Events appended while draining are left for the next call. The events of a failed batch are appended again, so
+        they are replayed by the next call as well.
+
+        Parameters
+        ----------
+        tracker : BaseGa4mp
+            Tracking object used to send the events.
+        chunk_batches : int, optional
+            Number of batches of 25 events read into memory and handed to the tracking object at once, by default 100
+
+        Returns
+        -------
+        SendResult
+            The result of every batch that was attempted.
+        """
+        results = SendResult()
+        for events, position in self._chunks(chunk_batches):
+            batches = tracker._batch_events(events)
+            self._ack_chunk(batches, position, tracker._http_post(batches, postpone=True), results)
+        return results
+
+    async def drain_async(self, tracker, chunk_batches=100):
+        """
+        Coroutine version of `drain()` for the asyncio tracking classes.
+        """
+        results = SendResult()
+        for events, position in self._chunks(chunk_batches):
+            batches = tracker._batch_events(events)
+            self._ack_chunk(batches, position, await tracker._http_post(batches, postpone=True), results)
+        return results
+
+    def __len__(self):
+        # Number of unacknowledged events; reads every pending segment.
+        return sum(len(batch) for batch, _ in self.read_batches(batch_size=1000))
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self._active_file.close()
+
+    def _chunks(self, chunk_batches):
+        # The events that were unacknowledged when draining started, `chunk_batches` batches at a time, with the
+        # position right after each chunk. The tracking object packs every chunk into its own batches.
+        events = []
+        for batch, position in self.read_batches(end=self._end_position()):
+            events.extend(batch)
+            if len(events) >= chunk_batches * 25:
+                yield events, position
+                events = []
+        if events:
+            yield events, position
+
+    def _ack_chunk(self, batches, position, chunk_results, results):
+        # Acknowledge a whole chunk, appending the events of failed batches again.
+        offset = len(results)
+        for batch, result in zip(batches, chunk_results):
+            result.batch_index += offset
+            results.append(result)
+            if not result.ok:
+                self.append(batch)
+        self.ack(position)
+
+    def _end_position(self):
+        with self._lock:
+            self._active_file.flush()
+            return self._active_segment, self._active_file.tell()
+
+    def _segments(self):
+        return sorted(int(path.stem) for path in self.directory.glob("*" + self._SUFFIX))
+
+    def _segment_path(self, segment):
+        return self.directory / f"{segment:012d}{self._SUFFIX}"
+
+    def _open_active_segment(self):
+        segments = self._segments()
+        self._active_segment = segments[-1] if segments else max(1, self._ack[0])
+        path = self._segment_path(self._active_segment)
+        self._active_events = 0
+        if path.exists():
+            # drop a partially written last line left by a crash
+            data = path.read_bytes()
+            complete = data[: data.rfind(b"\n") + 1]
+            if len(complete) != len(data):
+                logger.warning("Truncating incomplete event at the end of %s", path)
+                with open(path, "r+b") as segment_file:
+                    segment_file.truncate(len(complete))
+            self._active_events = complete.count(b"\n")
+        self._active_file = open(path, "ab")
+
+    def _rotate(self):
+        self.sync()
+        self._active_file.close()
+        self._active_segment += 1
+        self._active_events = 0
+        self._active_file = open(self._segment_path(self._active_segment), "ab")
+
+    def _read_ack(self):
+        try:
+            segment, offset = (self.directory / self._ACK_FILE).read_text().split()
+            return int(segment), int(offset)
+        except (OSError, ValueError):
+            return 0, 0
+
+    def _write_ack(self, position):
+        # Written to a temporary file, then renamed, so a crash leaves either the old or the new position.
+        tmp_path = self.directory / (self._ACK_FILE + ".tmp")
+        with open(tmp_path, "w") as ack_file:
+            ack_file.write(f"{position[0]} {position[1]}")
+            ack_file.flush()
+            os.fsync(ack_file.fileno())
+        os.replace(tmp_path, self.directory / self._ACK_FILE)
+        self._ack = position
@@ -1,14 +1,33 @@
+import atexit
+import collections
 import json
 import logging
+import os
+import sqlite3
+import threading
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
 class BaseStore(dict):
+    # Incremented on every change to the user properties made through the store's methods, so that tracking objects
+    # can tell cheaply when the user properties they have encoded into their requests are out of date (they also
+    # compare the user properties, for edits made to the dictionary directly). A class attribute, as unpickling and
+    # copying set the items of a store before its instance attributes.
+    user_properties_version = 0
+
     def __init__(self):
         self.update([("user_properties", {}),("session_parameters", {})])
 
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "user_properties":
+            self.user_properties_version += 1
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.user_properties_version += 1
+
     def save(self):
         raise NotImplementedError("Subclass should be using this function, but it was called through the base class instead.")
 
@@ -21,6 +40,8 @@ class BaseStore(dict):
         # Helper function to set a single parameter (user or session or other).
         self._check_exists(key=param_type)
         self[param_type][name] = value
+        if param_type == "user_properties":
+            self.user_properties_version += 1
 
     def _get_one(self, param_type, name):
         # Helper function to get a single parameter value (user or session).
@@ -34,6 +55,22 @@ class BaseStore(dict):
         else:
             return self
 
+    def _update(self, param_type, name, fn, default=None):
+        # Helper function to replace a single parameter with fn(current value); returns the (old, new) values.
+        old = self._get_one(param_type=param_type, name=name)
+        if old is None:
+            old = default
+        new = fn(old)
+        self._set(param_type=param_type, name=name, value=new)
+        return old, new
+
+    def _compare_and_set(self, param_type, name, expected, value):
+        # Helper function to set a single parameter only if its current value is `expected`; returns whether it was set.
+        if self._get_one(param_type=param_type, name=name) != expected:
+            return False
+        self._set(param_type=param_type, name=name, value=value)
+        return True
+
     # While redundant, the following make sure the distinction between session and user items is easier for the end user.
     def set_user_property(self, name, value):
         self._set(param_type="user_properties", name=name, value=value)
@@ -56,6 +93,20 @@ class BaseStore(dict):
     def get_all_session_parameters(self):
         return self._get_all(param_type="session_parameters")
 
+    def update_session_parameter(self, name, fn, default=None):
+        """
+        Replace a session parameter with `fn(current value)`, using `default` as the current value if it is not set.
+        Atomic in `ConcurrentStore`. Returns the old (`default` if it was not set) and the new value.
+        """
+        return self._update(param_type="session_parameters", name=name, fn=fn, default=default)
+
+    def compare_and_set_session_parameter(self, name, expected, value):
+        """
+        Set a session parameter to `value` only if its current value is `expected`. Atomic in `ConcurrentStore`.
+        Returns whether the parameter was set.
+        """
+        return self._compare_and_set(param_type="session_parameters", name=name, expected=expected, value=value)
+
     def clear_session_parameters(self):
         self["session_parameters"] = {}
 
@@ -83,34 +134,397 @@ class DictStore(BaseStore):
         # Give the user back what's in the dictionary so they can decide how to save it.
         self._get_all()
 
+class ConcurrentStore(DictStore):
+    """
+    Dictionary store that can be shared by tracking objects and threads sending concurrently.
+
+    Every parameter type (user properties, session parameters, other) has its own lock, so that threads working on
+    different types do not wait for each other. `update_session_parameter()` and `compare_and_set_session_parameter()`
+    are atomic, and the `get_all_*` methods return a snapshot copy that later writes do not change.
+    """
+
+    def __init__(self, data: dict = None):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        super().__init__(data=data)
+
+    def _lock_for(self, param_type):
+        lock = self._locks.get(param_type)
+        if lock is None:
+            with self._locks_lock:
+                lock = self._locks.setdefault(param_type, threading.Lock())
+        return lock
+
+    # The helpers below work on the underlying dictionaries directly, so that each takes its stripe's lock only once.
+    def _set(self, param_type, name, value):
+        with self._lock_for(param_type):
+            self.setdefault(param_type, {})[name] = value
+            if param_type == "user_properties":
+                self.user_properties_version += 1
+
+    def _get_one(self, param_type, name):
+        with self._lock_for(param_type):
+            return self.setdefault(param_type, {}).get(name, None)
+
+    def _get_all(self, param_type=None):
+        if param_type is None:
+            return self
+        with self._lock_for(param_type):
+            return dict(self.setdefault(param_type, {}))
+
+    def _update(self, param_type, name, fn, default=None):
+        with self._lock_for(param_type):
+            parameters = self.setdefault(param_type, {})
+            old = parameters.get(name, None)
+            if old is None:
+                old = default
+            new = parameters[name] = fn(old)
+            if param_type == "user_properties":
+                self.user_properties_version += 1
+            return old, new
+
+    def _compare_and_set(self, param_type, name, expected, value):
+        with self._lock_for(param_type):
+            parameters = self.setdefault(param_type, {})
+            if parameters.get(name, None) != expected:
+                return False
+            parameters[name] = value
+            if param_type == "user_properties":
+                self.user_properties_version += 1
+            return True
+
+    def clear_user_properties(self):
+        with self._lock_for("user_properties"):
+            super().clear_user_properties()
+
+    def clear_session_parameters(self):
+        with self._lock_for("session_parameters"):
+            super().clear_session_parameters()
+
+    def clear_other_parameters(self):
+        with self._lock_for("other"):
+            super().clear_other_parameters()
+
 class FileStore(BaseStore):
-    # Class for working with dictionaries that get saved to a JSON file.
-    def __init__(self, data_location: str = None):
+    """
+    Store that is loaded from and saved to a JSON file.
+
+    `save()` writes the whole document to a temporary file that is then renamed over `data_location`, so a crash never
+    leaves a half-written file behind.
+
+    With `journal=True`, `save()` only appends the changes made since the previous save to a change log next to the
+    file (`<data_location>.log`), one JSON line per change, instead of rewriting the whole document. The log is replayed
+    on load and folded back into the JSON file once it holds `compact_after` changes, or when `compact()` is called.
+    Only changes made through the `set_*` and `clear_*` methods are journaled.
+
+    With `save_delay` set, `save()` returns at once and the write happens `save_delay` seconds later, so that a burst of
+    saves results in a single write. `flush()` writes pending changes right away; it is also called at exit.
+
+    Parameters
+    ----------
+    data_location : string
+        Path of the JSON file; it is created if it does not exist.
+    journal : bool, optional
+        Boolean to depict if changes should be appended to a change log instead of rewriting the file, by default False
+    save_delay : float, optional
+        Seconds by which writes are delayed and coalesced, by default 0 (write on every `save()`)
+    compact_after : int, optional
+        Number of journaled changes after which the change log is folded into the JSON file, by default 10000
+    """
+
+    def __init__(self, data_location: str = None, journal: bool = False, save_delay: float = 0, compact_after: int = 10000):
         super().__init__()
         self.data_location = data_location
+        self.journal = journal
+        self.save_delay = save_delay
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._changes = []
+        self._journaled = 0
+        self._dirty = False
+        self._timer = None
         try:
-            self._load_file(data_location)
-        except:
-            logger.info(f"Failed to find file at location: {data_location}")
+            self._load_file()
+        except (OSError, TypeError, ValueError):
+            logger.info("Failed to find file at location: %s", data_location)
+        if save_delay:
+            atexit.register(self.flush)
+
+    @property
+    def journal_location(self):
+        return f"{self.data_location}.log"
 
     def _load_file(self):
         # Function to get data from the object's initialized location.
         # If the provided or stored data_location exists, read the file and overwrite the object's contents.
         if Path(self.data_location).exists():
             with open(self.data_location, "r") as json_file:
-                self = json.load(json_file)
+                self.update(json.load(json_file))
+            if self.journal:
+                self._replay_journal()
         # If the data_location doesn't exist, try to create a new starter JSON file at the location given.
         else:
-            starter_dict = '{"user_properties":{}, "session_parameters":{}}'
-            starter_json = json.loads(starter_dict)
-            Path(self.data_location).touch()
-            with open(self.data_location, "w") as json_file:
-                json.dumps(starter_json, json_file)
+            self._write_file()
+
+    def _replay_journal(self):
+        # Apply the changes logged since the JSON file was last written; a partially written last line is ignored.
+        if not Path(self.journal_location).exists():
+            return
+        with open(self.journal_location, "rb") as journal_file:
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    break
+                change = json.loads(line)
+                if change[0] == "set":
+                    super()._set(param_type=change[1], name=change[2], value=change[3])
+                else:
+                    self[change[1]] = {}
+                self._journaled += 1
+
+    # Changes take the lock that writes hold, so that a delayed write never encodes the store while it changes.
+    def _set(self, param_type, name, value):
+        with self._lock:
+            super()._set(param_type=param_type, name=name, value=value)
+            self._record(("set", param_type, name, value))
+
+    def clear_user_properties(self):
+        with self._lock:
+            super().clear_user_properties()
+            self._record(("clear", "user_properties"))
+
+    def clear_session_parameters(self):
+        with self._lock:
+            super().clear_session_parameters()
+            self._record(("clear", "session_parameters"))
+
+    def clear_other_parameters(self):
+        with self._lock:
+            super().clear_other_parameters()
+            self._record(("clear", "other"))
+
+    def _record(self, change):
+        # Called with the lock held.
+        if self.journal:
+            self._changes.append(change)
 
     def save(self):
-        # Function to save the current dictionary to a JSON file at the object's initialized location.
+        # Function to save the current dictionary to the file (or the change log) at the object's initialized location.
+        with self._lock:
+            self._dirty = True
+            if not self.save_delay:
+                self._write()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        Method to write any saved but not yet written changes right away.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._write()
+
+    def compact(self):
+        """
+        Method to write the whole store to the JSON file and empty the change log.
+        """
+        with self._lock:
+            self._changes = []
+            self._write_file()
+            self._dirty = False
+
+    def _write(self):
         try:
-            with open(self.data_location, "w") as outfile:
-                json.dump(self, outfile)
-        except:
-            logger.info(f"Failed to save file at location: {self.data_location}")
\ No newline at end of file
+            if not self.journal:
+                self._write_file()
+            elif self._journaled + len(self._changes) >= self.compact_after:
+                self.compact()
+            elif self._changes:
+                lines = b"".join(json.dumps(change).encode("utf-8") + b"\n" for change in self._changes)
+                with open(self.journal_location, "ab") as journal_file:
+                    journal_file.write(lines)
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+                self._journaled += len(self._changes)
+                self._changes = []
+            self._dirty = False
+        except (OSError, TypeError, ValueError, RuntimeError):
+            logger.info("Failed to save file at location: %s", self.data_location)
+
+    def _write_file(self):
+        # Written to a temporary file, then renamed, so a crash leaves either the old or the new document.
+        if self.data_location is None:
+            raise TypeError("FileStore has no data_location")
+        tmp_location = f"{self.data_location}.tmp"
+        with open(tmp_location, "w") as outfile:
+            json.dump(self, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_location, self.data_location)
+        if self.journal and Path(self.journal_location).exists():
+            os.remove(self.journal_location)
+        self._journaled = 0
+
+class SQLiteStore(object):
+    """
+    SQLite database (stdlib `sqlite3`, WAL mode) holding the user properties, session parameters and other parameters
+    of many clients, keyed by client_id or app_instance_id.
+
+    Use `client()` to get the `BaseStore` of a single client and pass it to a tracking object. Parameters are kept in a
+    table whose primary key starts with the client id, so loading a client is an indexed range lookup. Loaded clients
+    are kept in an in-memory LRU cache of `cache_size` entries, so hot clients are read from memory. Writes are queued
+    and applied in a single transaction once `batch_size` of them are pending, on `flush()`, on a store's `save()`, or
+    before a client is read from disk.
+
+    Parameters
+    ----------
+    database : string
+        Path of the database file, or ":memory:".
+    cache_size : int, optional
+        Number of clients kept in the LRU read cache, by default 10000
+    batch_size : int, optional
+        Number of pending writes after which they are committed, by default 100
+    """
+
+    _CREATE = (
+        "CREATE TABLE IF NOT EXISTS parameters ("
+        "client_id TEXT NOT NULL, param_type TEXT NOT NULL, name TEXT NOT NULL, value TEXT, "
+        "PRIMARY KEY (client_id, param_type, name)) WITHOUT ROWID"
+    )
+    _SELECT = "SELECT param_type, name, value FROM parameters WHERE client_id = ?"
+    _UPSERT = "INSERT OR REPLACE INTO parameters (client_id, param_type, name, value) VALUES (?, ?, ?, ?)"
+    _DELETE = "DELETE FROM parameters WHERE client_id = ? AND param_type = ?"
+
+    def __init__(self, database, cache_size: int = 10000, batch_size: int = 100):
+        self.database = database
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._cache = collections.OrderedDict()
+        self._pending = []
+        # statements are reused through sqlite3's prepared statement cache
+        self._connection = sqlite3.connect(database, check_same_thread=False, isolation_level=None, cached_statements=32)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(self._CREATE)
+
+    def client(self, client_id):
+        """
+        Method to get the store of a single client.
+
+        Parameters
+        ----------
+        client_id : string
+            The client_id or app_instance_id.
+
+        Returns
+        -------
+        SQLiteClientStore
+        """
+        return SQLiteClientStore(self, client_id)
+
+    def load(self, client_id):
+        """
+        Method to get a copy of everything stored for a client.
+
+        Returns
+        -------
+        Dict[str, Dict]
+            Parameters of the client by type ("user_properties", "session_parameters", "other").
+        """
+        with self._lock:
+            data = self._cache.get(client_id)
+            if data is not None:
+                self._cache.move_to_end(client_id)
+            else:
+                self.flush()
+                data = {"user_properties": {}, "session_parameters": {}}
+                for param_type, name, value in self._connection.execute(self._SELECT, (client_id,)):
+                    data.setdefault(param_type, {})[name] = json.loads(value)
+                self._cache_put(client_id, data)
+            return {param_type: dict(parameters) for param_type, parameters in data.items()}
+
+    def set(self, client_id, param_type, name, value):
+        """
+        Method to set a single parameter of a client.
+        """
+        with self._lock:
+            data = self._cache.get(client_id)
+            if data is not None:
+                data.setdefault(param_type, {})[name] = value
+            self._pending.append((self._UPSERT, (client_id, param_type, name, json.dumps(value))))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def clear(self, client_id, param_type):
+        """
+        Method to remove every parameter of one type of a client.
+        """
+        with self._lock:
+            data = self._cache.get(client_id)
+            if data is not None:
+                data[param_type] = {}
+            self._pending.append((self._DELETE, (client_id, param_type)))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Method to commit every pending write in a single transaction.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                with self._connection:
+                    self._connection.execute("BEGIN")
+                    for statement, parameters in pending:
+                        self._connection.execute(statement, parameters)
+            except sqlite3.Error:
+                # rolled back; keep the writes for the next flush
+                self._pending = pending + self._pending
+                raise
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def _cache_put(self, client_id, data):
+        self._cache[client_id] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+class SQLiteClientStore(BaseStore):
+    # Store of a single client of a SQLiteStore; changes made through the set_* and clear_* methods are written through.
+    def __init__(self, database: SQLiteStore, client_id: str):
+        super().__init__()
+        self.database = database
+        self.client_id = client_id
+        self.update(database.load(client_id))
+
+    def _set(self, param_type, name, value):
+        super()._set(param_type=param_type, name=name, value=value)
+        self.database.set(self.client_id, param_type, name, value)
+
+    def clear_user_properties(self):
+        super().clear_user_properties()
+        self.database.clear(self.client_id, "user_properties")
+
+    def clear_session_parameters(self):
+        super().clear_session_parameters()
+        self.database.clear(self.client_id, "session_parameters")
+
+    def clear_other_parameters(self):
+        super().clear_other_parameters()
+        self.database.clear(self.client_id, "other")
+
+    def save(self):
+        # Commit the pending writes of the database.
+        self.database.flush()
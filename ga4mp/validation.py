@@ -0,0 +1,262 @@
+###############################################################################
+# Google Analytics 4 Measurement Protocol for Python
+# Copyright (c) 2022, Adswerve
+#
+# This project is free software, distributed under the BSD license.
+# Adswerve offers consulting and integration services if your firm needs
+# assistance in strategy, implementation, or auditing existing work.
+###############################################################################
+
+import json
+import re
+from collections.abc import Mapping
+
+from ga4mp import schema
+from ga4mp.batching import MAX_EVENTS_PER_REQUEST
+
+# Validation codes returned by the Measurement Protocol Validation Server.
+VALUE_INVALID = "VALUE_INVALID"
+VALUE_REQUIRED = "VALUE_REQUIRED"
+NAME_INVALID = "NAME_INVALID"
+NAME_RESERVED = "NAME_RESERVED"
+VALUE_OUT_OF_BOUNDS = "VALUE_OUT_OF_BOUNDS"
+EXCEEDED_MAX_ENTITIES = "EXCEEDED_MAX_ENTITIES"
+
+# Collection limits: https://support.google.com/analytics/answer/9267744 and
+# https://developers.google.com/analytics/devguides/collection/protocol/ga4/sending-events#limitations
+MAX_NAME_LENGTH = 40
+MAX_PARAMS_PER_EVENT = 25
+MAX_PARAM_VALUE_LENGTH = 100
+MAX_PAGE_PARAM_VALUE_LENGTH = 300
+MAX_USER_PROPERTIES = 25
+MAX_USER_PROPERTY_NAME_LENGTH = 24
+MAX_USER_PROPERTY_VALUE_LENGTH = 36
+MAX_ITEMS_PER_EVENT = 200
+
+_PAGE_PARAMETERS = frozenset(["page_location", "page_referrer", "page_title"])
+_RESERVED_PREFIXES = ("google_", "ga_", "firebase_")
+_RESERVED_EVENT_NAMES = frozenset([
+    "ad_activeview", "ad_click", "ad_exposure", "ad_impression", "ad_query", "ad_reward", "adunit_exposure",
+    "app_background", "app_clear_data", "app_exception", "app_install", "app_remove", "app_store_refund",
+    "app_store_subscription_cancel", "app_store_subscription_convert", "app_store_subscription_renew", "app_uninstall",
+    "app_update", "app_upgrade", "dynamic_link_app_open", "dynamic_link_app_update", "dynamic_link_first_open", "error",
+    "firebase_campaign", "first_open", "first_visit", "in_app_purchase", "notification_dismiss",
+    "notification_foreground", "notification_open", "notification_receive", "os_update", "session_start",
+    "session_start_with_rollout", "user_engagement",
+])
+_RESERVED_USER_PROPERTY_NAMES = frozenset([
+    "first_open_time", "first_visit_time", "last_deep_link_referrer", "user_id", "first_open_after_install",
+])
+_NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_]*\Z")
+_MAX_REMEMBERED_NAMES = 100000
+
+def _message(field_path, description, validation_code):
+    return {"fieldPath": field_path, "description": description, "validationCode": validation_code}
+
+def payload_too_large(field_path, size, limit):
+    """
+    Function building the validation message of an event that does not fit in a single request under the byte limit.
+
+    Parameters
+    ----------
+    field_path : string
+        Path of the event, e.g. "events[3]".
+    size : int
+        Encoded size of the event in bytes.
+    limit : int
+        Number of bytes available for events in a request.
+    """
+    return _message(field_path, f"Event takes {size} bytes, more than the {limit} bytes available in a single request.", VALUE_OUT_OF_BOUNDS)
+
+class LocalValidator(object):
+    """
+    Validates requests locally, returning messages in the shape of the Measurement Protocol Validation Server
+    (`{"validationMessages": [{"fieldPath", "description", "validationCode"}]}`) without a network round trip.
+
+    Checks event, parameter and user property names (length, characters, reserved names and prefixes), parameter
+    values (length, page parameters up to 300 characters), the number of events, parameters, user properties and
+    items, and the structure of items. With `check_catalog=True`, events with a recommended event name must also carry
+    the parameters listed for it in `ga4mp.utils.params_dict`; the validation server itself does not check those.
+
+    Parameters
+    ----------
+    id_field : str, optional
+        Field identifying the client, "client_id" (gtag) or "app_instance_id" (Firebase), by default "client_id"
+    check_catalog : bool, optional
+        Boolean to depict if the parameters expected for recommended event names are required, by default False
+    catalog : Dict[str, List[str]], optional
+        Event names and their expected parameters, by default `ga4mp.utils.params_dict`
+    """
+
+    def __init__(self, id_field="client_id", check_catalog=False, catalog=None):
+        self.id_field = id_field
+        self.check_catalog = check_catalog
+        self._catalog = catalog
+        self._catalog_version = None
+        self._schemas = {}
+        self._valid_names = set()
+
+    def validate_request(self, request):
+        """
+        Method to validate a request body.
+
+        Parameters
+        ----------
+        request : Dict
+            A request in the format sent to the collect endpoint.
+
+        Returns
+        -------
+        Dict
+            The validation response, with an empty `validationMessages` list if the request is valid.
+        """
+        messages = []
+        if not request.get(self.id_field):
+            messages.append(_message(self.id_field, f"Measurement requires an {self.id_field}.", VALUE_REQUIRED))
+        self._validate_user_properties(request.get("user_properties"), messages)
+        events = request.get("events")
+        if not isinstance(events, list) or not events:
+            messages.append(_message("events", "Measurement requires at least one event.", VALUE_REQUIRED))
+        else:
+            if len(events) > MAX_EVENTS_PER_REQUEST:
+                messages.append(_message("events", f"A request cannot contain more than {MAX_EVENTS_PER_REQUEST} events.", EXCEEDED_MAX_ENTITIES))
+            self._validate_events(events, messages)
+        return {"validationMessages": messages}
+
+    def validate_events(self, events):
+        """
+        Method to validate events on their own, without the rest of a request.
+
+        Returns
+        -------
+        Dict
+            The validation response.
+        """
+        messages = []
+        self._validate_events(events, messages)
+        return {"validationMessages": messages}
+
+    def validate_file(self, path):
+        """
+        Method to validate a file of JSON lines, each holding a request or a single event.
+
+        Parameters
+        ----------
+        path : string
+            Path of the file.
+
+        Yields
+        ------
+        Tuple[int, Dict]
+            The line number (starting at 1) and the validation response of every invalid line.
+        """
+        with open(path, "rb") as lines:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    document = json.loads(line)
+                except ValueError as e:
+                    yield line_number, {"validationMessages": [_message("", f"Line is not valid JSON: {e}", VALUE_INVALID)]}
+                    continue
+                if isinstance(document, dict) and "events" in document:
+                    response = self.validate_request(document)
+                else:
+                    response = self.validate_events([document])
+                if response["validationMessages"]:
+                    yield line_number, response
+
+    def _validate_events(self, events, messages):
+        schemas = self._get_schemas() if self.check_catalog else None
+        valid_names = self._valid_names
+        for index, event in enumerate(events):
+            path = f"events[{index}]"
+            if not isinstance(event, Mapping):
+                messages.append(_message(path, "Event must be an object.", VALUE_INVALID))
+                continue
+            name = event.get("name")
+            if not isinstance(name, str) or not name:
+                messages.append(_message(f"{path}.name", "Event name is required.", VALUE_REQUIRED))
+            else:
+                if name not in valid_names:
+                    self._validate_name(name, f"{path}.name", "Event", messages)
+                if name in _RESERVED_EVENT_NAMES:
+                    messages.append(_message(f"{path}.name", f"Event name {name} is reserved.", NAME_RESERVED))
+
+            params = event.get("params")
+            if params is None:
+                params = {}
+            elif not isinstance(params, Mapping):
+                messages.append(_message(f"{path}.params", "Event params must be an object.", VALUE_INVALID))
+                continue
+            if len(params) > MAX_PARAMS_PER_EVENT:
+                messages.append(_message(f"{path}.params", f"Event {name} has {len(params)} parameters; the limit is {MAX_PARAMS_PER_EVENT}.", EXCEEDED_MAX_ENTITIES))
+            for param_name, value in params.items():
+                if param_name not in valid_names:
+                    self._validate_name(param_name, f"{path}.params.{param_name}", "Event parameter", messages)
+                value_type = type(value)
+                if value_type is str:
+                    if len(value) > MAX_PARAM_VALUE_LENGTH and (len(value) > MAX_PAGE_PARAM_VALUE_LENGTH or param_name not in _PAGE_PARAMETERS):
+                        limit = MAX_PAGE_PARAM_VALUE_LENGTH if param_name in _PAGE_PARAMETERS else MAX_PARAM_VALUE_LENGTH
+                        messages.append(_message(f"{path}.params.{param_name}", f"Value of {param_name} is longer than {limit} characters.", VALUE_OUT_OF_BOUNDS))
+                elif value_type is int or value_type is float or value is None:
+                    pass
+                elif param_name == "items":
+                    self._validate_items(value, f"{path}.params.{param_name}", messages)
+                elif not isinstance(value, (int, float)):
+                    messages.append(_message(f"{path}.params.{param_name}", f"Value of {param_name} must be a string or a number.", VALUE_INVALID))
+
+            if schemas is not None and name in schemas:
+                expected_set, expected = schemas[name]
+                if not expected_set <= params.keys():
+                    for param_name in expected:
+                        if param_name not in params:
+                            messages.append(_message(f"{path}.params.{param_name}", f"Event {name} requires the parameter {param_name}.", VALUE_REQUIRED))
+
+    def _validate_items(self, items, path, messages):
+        if not isinstance(items, list):
+            messages.append(_message(path, "Items must be an array.", VALUE_INVALID))
+            return
+        if len(items) > MAX_ITEMS_PER_EVENT:
+            messages.append(_message(path, f"An event cannot contain more than {MAX_ITEMS_PER_EVENT} items.", EXCEEDED_MAX_ENTITIES))
+        for index, item in enumerate(items):
+            item_path = f"{path}[{index}]"
+            if not isinstance(item, Mapping):
+                messages.append(_message(item_path, "Item must be an object.", VALUE_INVALID))
+            elif "item_id" not in item and "item_name" not in item:
+                messages.append(_message(item_path, "Item requires an item_id or an item_name.", VALUE_REQUIRED))
+
+    def _validate_user_properties(self, user_properties, messages):
+        if not user_properties:
+            return
+        if len(user_properties) > MAX_USER_PROPERTIES:
+            messages.append(_message("user_properties", f"A request cannot contain more than {MAX_USER_PROPERTIES} user properties.", EXCEEDED_MAX_ENTITIES))
+        for name, user_property in user_properties.items():
+            path = f"user_properties.{name}"
+            if len(name) > MAX_USER_PROPERTY_NAME_LENGTH:
+                messages.append(_message(path, f"User property name {name} is longer than {MAX_USER_PROPERTY_NAME_LENGTH} characters.", NAME_INVALID))
+            elif not _NAME_PATTERN.match(name):
+                messages.append(_message(path, f"User property name {name} must start with a letter and contain only letters, digits and underscores.", NAME_INVALID))
+            elif name in _RESERVED_USER_PROPERTY_NAMES or name.startswith(_RESERVED_PREFIXES):
+                messages.append(_message(path, f"User property name {name} is reserved.", NAME_RESERVED))
+            value = user_property.get("value") if isinstance(user_property, Mapping) else None
+            if isinstance(value, str) and len(value) > MAX_USER_PROPERTY_VALUE_LENGTH:
+                messages.append(_message(f"{path}.value", f"Value of user property {name} is longer than {MAX_USER_PROPERTY_VALUE_LENGTH} characters.", VALUE_OUT_OF_BOUNDS))
+
+    def _validate_name(self, name, path, kind, messages):
+        # Names that pass are remembered, since the same few names come back in every event.
+        if len(name) > MAX_NAME_LENGTH:
+            messages.append(_message(path, f"{kind} name {name} is longer than {MAX_NAME_LENGTH} characters.", NAME_INVALID))
+        elif not _NAME_PATTERN.match(name):
+            messages.append(_message(path, f"{kind} name {name} must start with a letter and contain only letters, digits and underscores.", NAME_INVALID))
+        elif name.startswith(_RESERVED_PREFIXES):
+            messages.append(_message(path, f"{kind} name {name} uses a reserved prefix.", NAME_RESERVED))
+        elif len(self._valid_names) < _MAX_REMEMBERED_NAMES:
+            self._valid_names.add(name)
+
+    def _get_schemas(self):
+        # Compiled catalog, rebuilt after `append_event_to_params_dict()`.
+        if self._catalog_version != schema._catalog_version:
+            self._catalog_version = schema._catalog_version
+            self._schemas = schema.compile_schemas(self._catalog)
+        return self._schemas
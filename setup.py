@@ -24,6 +24,7 @@ setup(
     license = 'BSD',
     packages = ["ga4mp"],
 
+    python_requires = ">=3.8",
     install_requires = [],
 
     zip_safe = True,
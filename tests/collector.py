@@ -0,0 +1,116 @@
+import collections
+import gzip
+import json
+import zlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_events(count, start=0, **params):
+    # Events used by the tests: "test_event" with an "index" parameter (as a string) and the given parameters.
+    return [{"name": "test_event", "params": {"index": str(i), **params}} for i in range(start, start + count)]
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that clients can keep connections alive between requests.
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        raw_size = len(body)
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        with self.server.lock:
+            self.server.bytes_received += raw_size
+            self.server.requests.append((self.path, dict(self.headers), body))
+            scripted = self.server.script.popleft() if self.server.script else None
+
+        if scripted is not None:
+            # injected failure or delay
+            time.sleep(scripted.get("delay", 0))
+            self.send_response(scripted.get("status", self.server.status))
+            for name, value in scripted.get("headers", {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.startswith("/debug/"):
+            payload = json.dumps({"validationMessages": []}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class LocalCollector(object):
+    """
+    Local stand-in for the Measurement Protocol collect endpoint, used by tests and benchmarks.
+
+    Every POST is recorded as a (path, headers, body) tuple in `requests`, with gzip or deflate bodies decompressed;
+    `bytes_received` counts the body bytes as sent and `connections` counts accepted TCP connections.
+    `inject()` scripts failures or delays for the next requests.
+    """
+
+    def __init__(self, status=204):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _CollectorHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.connections = 0
+        self.server.bytes_received = 0
+        self.server.status = status
+        self.server.script = collections.deque()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    @property
+    def bytes_received(self):
+        return self.server.bytes_received
+
+    def inject(self, status=None, headers=None, delay=0):
+        # Script the response to the next unscripted request.
+        response = {"headers": headers or {}, "delay": delay}
+        if status is not None:
+            response["status"] = status
+        self.server.script.append(response)
+
+    def payloads(self):
+        return [json.loads(body) for _, _, body in self.requests]
+
+    def attach(self, tracker):
+        # Point a tracking object at this collector instead of google-analytics.com.
+        tracker._base_domain = self.url + "/mp/collect"
+        tracker._validation_domain = self.url + "/debug/mp/collect"
+        return tracker
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
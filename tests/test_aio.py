@@ -0,0 +1,90 @@
+import asyncio
+import tempfile
+import unittest
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.aio import AsyncGtagMP, AsyncFirebaseMP, AsyncPooledTransport
+from ga4mp.spool import SegmentSpool
+from tests.collector import LocalCollector
+
+class TestAsyncClients(unittest.TestCase):
+    def setUp(self):
+        self.collector = LocalCollector().__enter__()
+        self.events = [{"name": "test_event", "params": {"index": str(i)}} for i in range(60)]
+
+    def tearDown(self):
+        self.collector.__exit__(None, None, None)
+
+    def test_send_batches_concurrently_over_reused_connections(self):
+        async def run():
+            gtag = self.collector.attach(AsyncGtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", max_concurrency=2))
+            gtag.store.set_user_property("plan", "gold")
+            results = await gtag.send(self.events)
+            await gtag.send(self.events)
+            await gtag.close()
+            return results
+
+        results = asyncio.run(run())
+
+        payloads = self.collector.payloads()
+        self.assertEqual([result.status for result in results], [204, 204, 204])
+        self.assertEqual(len(payloads), 6)
+        self.assertEqual(sum(len(p["events"]) for p in payloads), 120)
+        self.assertEqual(payloads[0]["user_properties"], {"plan": {"value": "gold"}})
+        self.assertLessEqual(self.collector.connections, 2)
+
+    def test_firebase_postponed_send(self):
+        async def run():
+            firebase = self.collector.attach(AsyncFirebaseMP(api_secret="SECRET", firebase_app_id="APP", app_instance_id="INSTANCE"))
+            await firebase.send(self.events[:3], postpone=True)
+            await firebase.postponed_send()
+            await firebase.close()
+            return firebase
+
+        firebase = asyncio.run(run())
+
+        self.assertEqual(len(self.collector.requests), 1)
+        self.assertEqual(self.collector.payloads()[0]["app_instance_id"], "INSTANCE")
+        self.assertIn("timestamp_micros", self.collector.payloads()[0]["events"][0])
+        self.assertEqual(firebase._event_list, [])
+
+    def test_close_syncs_spool(self):
+        async def run(spool):
+            gtag = self.collector.attach(AsyncGtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", spool=spool))
+            await gtag.send(self.events[:3], postpone=True)
+            await gtag.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            spool = SegmentSpool(directory, fsync_interval=3600)
+            asyncio.run(run(spool))
+            self.assertEqual(spool._unsynced, 0)
+            self.assertIsNone(spool._timer)
+            spool.close()
+
+    def test_validation_hit_returns_response(self):
+        async def run():
+            gtag = self.collector.attach(AsyncGtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            return await gtag.send(self.events[:2], validation_hit=True)
+
+        self.assertEqual(asyncio.run(run()), {"validationMessages": []})
+
+    def test_transport_raises_http_error(self):
+        self.collector.server.status = 503
+
+        async def run():
+            transport = AsyncPooledTransport()
+            try:
+                await transport.post(self.collector.url + "/mp/collect", b"{}", {})
+            finally:
+                await transport.close()
+
+        with self.assertRaises(urllib.error.HTTPError):
+            asyncio.run(run())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.batching import PayloadTooLargeError, SizeAwareBatcher
+from ga4mp.ga4mp import GtagMP
+from ga4mp.serializer import JSONSerializer
+from tests.collector import LocalCollector
+
+def event(index, padding):
+    return {"name": "test_event", "params": {"index": index, "padding": "x" * padding}}
+
+class TestSizeAwareBatcher(unittest.TestCase):
+    def encoded_size(self, batch, overhead):
+        return overhead + len(json.dumps(batch, separators=(",", ":")).encode("utf-8"))
+
+    def test_small_events_are_split_by_count(self):
+        events = [event(i, 10) for i in range(60)]
+        self.assertEqual([len(batch) for batch in SizeAwareBatcher().batch(events)], [25, 25, 10])
+
+    def test_batches_stay_under_the_byte_limit(self):
+        events = [event(i, 300 if i % 3 else 2000) for i in range(40)]
+        for first_fit_decreasing in (False, True):
+            batcher = SizeAwareBatcher(max_bytes=5000, first_fit_decreasing=first_fit_decreasing)
+            batches = batcher.batch(events, overhead=100)
+            self.assertEqual(sorted(e["params"]["index"] for batch in batches for e in batch), list(range(40)))
+            for batch in batches:
+                self.assertLessEqual(len(batch), 25)
+                self.assertLessEqual(self.encoded_size(batch, 100), 5000)
+                indexes = [e["params"]["index"] for e in batch]
+                self.assertEqual(indexes, sorted(indexes))
+
+    def test_first_fit_decreasing_fills_batches(self):
+        # large events followed by small ones: in order, the large events each take a batch of their own
+        events = [event(i, 3500 if i < 10 else 2000) for i in range(20)]
+        next_fit = SizeAwareBatcher(max_bytes=6000).batch(events)
+        first_fit = SizeAwareBatcher(max_bytes=6000, first_fit_decreasing=True).batch(events)
+        self.assertEqual((len(next_fit), len(first_fit)), (15, 10))
+
+    def test_batches_keep_their_encoding(self):
+        events = [event(i, 300 if i % 3 else 2000) for i in range(40)]
+        for batcher in (SizeAwareBatcher(), SizeAwareBatcher(max_bytes=5000), SizeAwareBatcher(max_bytes=5000, first_fit_decreasing=True)):
+            for batch in batcher.batch(events):
+                self.assertEqual(json.loads(batch.encoded), batch)
+
+    def test_events_are_encoded_once_per_send(self):
+        calls = []
+        def dumps(obj):
+            calls.append(obj)
+            return json.dumps(obj)
+        serializer = JSONSerializer(dumps=dumps)
+        with LocalCollector() as collector:
+            ga = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", serializer=serializer))
+            ga._request_overhead()
+            del calls[:]
+            ga.send([event(i, 10) for i in range(60)])
+
+        self.assertEqual([len(obj) for obj in calls], [25, 25, 10])
+
+    def test_oversized_event_is_reported(self):
+        events = [event(0, 10), event(1, 6000)]
+        with self.assertRaises(PayloadTooLargeError) as raised:
+            SizeAwareBatcher(max_bytes=5000).batch(events)
+        self.assertEqual(raised.exception.index, 1)
+        self.assertRaises(PayloadTooLargeError, SizeAwareBatcher(max_bytes=5000).check, events)
+
+    def test_tracker_requests_stay_under_the_limit(self):
+        with LocalCollector() as collector:
+            ga = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", batcher=SizeAwareBatcher(max_bytes=8000)))
+            ga.store.set_user_property("plan", "gold" * 100)
+            self.assertTrue(ga.send([event(i, 1000) for i in range(30)]).ok)
+            self.assertRaises(PayloadTooLargeError, ga.send, [event(0, 9000)], postpone=True)
+            bodies = [body for _, _, body in collector.requests]
+
+        self.assertEqual(sum(len(json.loads(body)["events"]) for body in bodies), 30)
+        self.assertTrue(all(len(body) <= 8000 for body in bodies))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.bulk import GtagBulkMP, FirebaseBulkMP
+from tests.collector import LocalCollector, make_events
+
+class TestBulkSender(unittest.TestCase):
+    def test_records_are_grouped_per_client(self):
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", max_workers=4))
+            results = gtag.send_bulk([
+                ("1.1", {"plan": "gold", "user_id": "u1"}, make_events(30)),
+                ("2.2", None, make_events(3)),
+                ("1.1", None, make_events(2)),
+            ])
+            gtag.close()
+            payloads = collector.payloads()
+
+        self.assertTrue(results.ok)
+        per_client = {}
+        for payload in payloads:
+            per_client.setdefault(payload["client_id"], []).append(payload)
+        self.assertEqual(sorted(len(p["events"]) for p in per_client["1.1"]), [7, 25])
+        self.assertEqual(len(per_client["2.2"]), 1)
+        self.assertEqual(per_client["1.1"][0]["user_id"], "u1")
+        self.assertEqual(per_client["1.1"][0]["user_properties"], {"plan": {"value": "gold"}})
+        self.assertNotIn("user_properties", per_client["2.2"][0])
+        self.assertLessEqual(collector.connections, 4)
+
+    def test_sessions_are_kept_per_client(self):
+        with LocalCollector() as collector:
+            firebase = collector.attach(FirebaseBulkMP(api_secret="SECRET", firebase_app_id="APP"))
+            firebase.send_bulk([("a", None, make_events(1))])
+            firebase.sessions._sessions["a"].session_id = 42
+            firebase.send_bulk([("a", None, make_events(1)), ("b", None, make_events(1))])
+            payloads = collector.payloads()
+
+        self.assertEqual(payloads[1]["app_instance_id"], "a")
+        self.assertEqual(payloads[1]["events"][0]["params"]["session_id"], 42)
+        self.assertNotEqual(payloads[2]["events"][0]["params"]["session_id"], 42)
+
+    def test_single_client_send_is_disabled(self):
+        gtag = GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST")
+
+        with self.assertRaises(NotImplementedError):
+            gtag.send(make_events(1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.bulk import GtagBulkMP
+from ga4mp.cli import import_file, main, read_csv, read_ndjson
+from ga4mp.validation import LocalValidator
+from tests.collector import LocalCollector
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as outfile:
+            outfile.write(content)
+        return path
+
+    def ndjson(self, count):
+        lines = [json.dumps({"client_id": f"{i % 3}.1", "name": "test_event", "params": {"index": i}}) for i in range(count)]
+        return self.write("events.ndjson", "\n".join(lines) + "\n")
+
+    def test_ndjson_requests_and_events(self):
+        path = self.write("mixed.ndjson", "\n".join([
+            '{"client_id": "1.1", "user_id": "u1", "user_properties": {"plan": {"value": "gold"}}, "events": [{"name": "a"}, {"name": "b", "params": {"x": 1}}]}',
+            "",
+            '{"client_id": "1.2", "name": "c", "params": {}, "timestamp_micros": 1}',
+            "[]",
+        ]))
+        records = list(read_ndjson(path, "client_id"))
+
+        self.assertEqual(records[0].user_properties, {"plan": "gold", "user_id": "u1"})
+        self.assertEqual(records[0].events, [{"name": "a", "params": {}}, {"name": "b", "params": {"x": 1}}])
+        self.assertEqual((records[1].line, records[1].events), (3, [{"name": "c", "params": {}, "timestamp_micros": 1}]))
+        self.assertIsNone(records[1].error)
+        self.assertIn("line 4", records[2].error)
+
+    def test_ndjson_request_fields_are_kept(self):
+        path = self.write("backfill.ndjson", '{"client_id": "1.1", "timestamp_micros": 1700000000000000, "non_personalized_ads": true, "events": [{"name": "a"}, {"name": "b", "timestamp_micros": 1}]}\n')
+        record = next(read_ndjson(path, "client_id"))
+
+        self.assertEqual([event["timestamp_micros"] for event in record.events], [1700000000000000, 1])
+        self.assertEqual(record.user_properties, {"non_personalized_ads": True})
+        with LocalCollector() as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST"))
+            summary = import_file(tracker, path, validator=LocalValidator(), errors=io.StringIO())
+            payload = collector.payloads()[0]
+
+        self.assertEqual(summary["events"], 2)
+        self.assertEqual(payload["events"][0]["timestamp_micros"], 1700000000000000)
+        self.assertIs(payload["non_personalized_ads"], True)
+
+    def test_csv_rows(self):
+        path = self.write("events.csv", 'client_id,name,value,coupon,user_properties.plan\n1.1,purchase,12.5,007,gold\n1.2,purchase,3,"A\nB",\n1.3,short\n')
+        records = list(read_csv(path, "client_id"))
+
+        self.assertEqual(records[0].events, [{"name": "purchase", "params": {"value": 12.5, "coupon": "007"}}])
+        self.assertEqual(records[0].user_properties, {"plan": "gold"})
+        self.assertEqual((records[1].line, records[1].end_line), (3, 4))
+        self.assertEqual(records[1].events[0]["params"], {"value": 3, "coupon": "A\nB"})
+        self.assertEqual(records[2].error, "line 5: expected 5 columns, found 2")
+
+        # resuming from the end of a row skips the rows before it
+        resumed = list(read_csv(path, "client_id", offset=records[0].offset, line=records[0].end_line))
+        self.assertEqual([record.line for record in resumed[:1]], [3])
+
+    def test_import_sends_valid_records_and_resumes(self):
+        path = self.ndjson(50)
+        with open(path, "a") as outfile:
+            outfile.write('{"client_id": "9.9", "name": "bad-name", "params": {}}\n')
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        errors = io.StringIO()
+        with LocalCollector() as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", max_workers=2))
+            summary = import_file(tracker, path, validator=LocalValidator(), chunk_events=20, checkpoint=checkpoint, errors=errors)
+            resumed = import_file(tracker, path, chunk_events=20, checkpoint=checkpoint, errors=errors)
+            tracker.close()
+            payloads = collector.payloads()
+
+        self.assertEqual((summary["records"], summary["invalid"], summary["events"], summary["failed_events"]), (51, 1, 50, 0))
+        self.assertIn("line 51: events[0].name", errors.getvalue())
+        self.assertEqual(resumed["records"], 0)
+        self.assertEqual(sorted(event["params"]["index"] for payload in payloads for event in payload["events"]), list(range(50)))
+
+    def test_failed_batches_are_counted(self):
+        path = self.ndjson(3)
+        with LocalCollector(status=500) as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST"))
+            summary = import_file(tracker, path, errors=io.StringIO())
+
+        self.assertEqual((summary["events"], summary["failed_events"], summary["failed_batches"]), (0, 3, 3))
+
+    def test_events_without_name_are_rejected_without_validation(self):
+        path = self.ndjson(5)
+        with open(path, "a") as outfile:
+            outfile.write('{"client_id": "9.9", "params": {}}\n{"client_id": "9.9", "name": "a", "params": []}\n')
+        errors = io.StringIO()
+        with LocalCollector() as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST"))
+            summary = import_file(tracker, path, errors=errors)
+
+        self.assertEqual((summary["invalid"], summary["events"]), (2, 5))
+        self.assertIn('line 6: every event needs a "name"', errors.getvalue())
+        self.assertEqual(list(read_csv(self.write("events.csv", "client_id,name,x\n1.1,,1\n"), "client_id"))[0].error, 'line 2: every event needs a "name"')
+
+    def test_checkpoint_is_not_advanced_past_failed_batches(self):
+        path = self.ndjson(60)
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        errors = io.StringIO()
+        with LocalCollector() as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST"))
+            # chunks of 20 events hold a batch for each of the 3 clients; a batch of the second chunk fails, the third
+            # chunk is still sent, but the checkpoint stays at the end of the first
+            for _ in range(3):
+                collector.inject()
+            collector.inject(status=500)
+            summary = import_file(tracker, path, chunk_events=20, checkpoint=checkpoint, errors=errors)
+            resumed = import_file(tracker, path, chunk_events=20, checkpoint=checkpoint, errors=errors)
+
+        self.assertEqual(summary["failed_batches"], 1)
+        self.assertIn("checkpoint kept at line 20", errors.getvalue())
+        self.assertEqual(resumed["records"], 40)
+
+    def test_oversized_records_are_rejected(self):
+        path = self.ndjson(5)
+        items = [dict({"item_id": f"SKU{i}"}, **{f"field_{field}": "x" * 100 for field in range(9)}) for i in range(199)]
+        with open(path, "a") as outfile:
+            outfile.write(json.dumps({"client_id": "9.9", "name": "purchase", "params": {"items": items}}) + "\n")
+        self.assertEqual(LocalValidator().validate_events([{"name": "purchase", "params": {"items": items}}]), {"validationMessages": []})
+        errors = io.StringIO()
+        with LocalCollector() as collector:
+            tracker = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST"))
+            summary = import_file(tracker, path, validator=LocalValidator(), errors=errors)
+
+        self.assertEqual((summary["records"], summary["invalid"], summary["events"]), (6, 1, 5))
+        self.assertIn("line 6: Event 0 (purchase) takes", errors.getvalue())
+
+    def test_main_dry_run(self):
+        path = self.ndjson(60)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = main(["import", path, "--measurement-id", "G-TEST", "--dry-run"])
+
+        self.assertEqual(status, 0)
+        self.assertIn("60 records read, 0 invalid\n60 events serialized in 3 batches", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import gzip
+import unittest
+import zlib
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.compression import Compression
+from ga4mp.ga4mp import GtagMP
+from ga4mp.retry import RetryPolicy
+from tests.collector import LocalCollector, make_events
+
+class TestCompression(unittest.TestCase):
+    def test_small_bodies_are_not_compressed(self):
+        headers = {"Content-Type": "application/json"}
+        body, sent_headers = Compression(min_size=100).compress(b"{}", headers)
+        self.assertEqual((body, sent_headers), (b"{}", headers))
+
+    def test_gzip_and_deflate(self):
+        body = b'{"events":[' + b'{"name":"test_event"},' * 100 + b"]}"
+        compressed, headers = Compression().compress(body, {})
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed), body)
+        compressed, headers = Compression("deflate", level=1).compress(body, {})
+        self.assertEqual(headers["Content-Encoding"], "deflate")
+        self.assertEqual(zlib.decompress(compressed), body)
+
+    def test_tracker_sends_compressed_bodies(self):
+        with LocalCollector() as collector:
+            collector.inject(status=503)
+            ga = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", compression=Compression(min_size=1000), retry=RetryPolicy(backoff_base=0)))
+            self.assertTrue(ga.send(make_events(27, label="repeated label")).ok)
+            requests = collector.requests
+            received = collector.bytes_received
+
+        # the retried request is compressed once and sent twice; the two-event request is under min_size
+        self.assertEqual([headers.get("Content-Encoding") for _, headers, _ in requests], ["gzip", "gzip", None])
+        self.assertEqual(requests[0][2], requests[1][2])
+        self.assertLess(received, sum(len(body) for _, _, body in requests) / 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import asyncio
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.aio import AsyncGtagMP
+from ga4mp.batching import PayloadTooLargeError
+from ga4mp.bulk import GtagBulkMP
+from ga4mp.dedup import BloomDeduplicator, LRUDeduplicator, content_key, param_key
+from ga4mp.ga4mp import GtagMP
+from tests.collector import LocalCollector
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def event(index, **params):
+    return {"name": "purchase", "params": dict(params, transaction_id=f"T{index}")}
+
+class TestDeduplicators(unittest.TestCase):
+    def test_content_key_ignores_generated_params(self):
+        self.assertEqual(content_key(event(1)), content_key(event(1, session_id=5, engagement_time_msec=1)))
+        self.assertNotEqual(content_key(event(1)), content_key(event(2)))
+        self.assertNotEqual(content_key(event(1)), content_key(dict(event(1), timestamp_micros=1)))
+
+    def test_param_key(self):
+        key = param_key("event_id")
+        self.assertEqual(key(event(1, event_id="a")), key(event(2, event_id="a")))
+        self.assertEqual(key(event(1)), content_key(event(1)))
+
+    def check_window(self, deduplicator, clock):
+        self.assertEqual(len(deduplicator.filter([event(1), event(2), event(1)])), 2)
+        self.assertEqual(deduplicator.filter([event(1)], scope="other.client"), [event(1)])
+        clock.now = 5
+        self.assertEqual(deduplicator.filter([event(2), event(3)]), [event(3)])
+        self.assertEqual((deduplicator.hits, deduplicator.misses), (2, 4))
+
+    def test_lru_window_and_size(self):
+        clock = FakeClock()
+        deduplicator = LRUDeduplicator(max_size=3, window=10, clock=clock)
+        self.check_window(deduplicator, clock)
+        # event 2 was seen again at 5, event 1 was not
+        clock.now = 12
+        self.assertEqual(deduplicator.filter([event(1), event(2)]), [event(1)])
+        # the least recently seen key is forgotten when the cache is full
+        deduplicator.filter([event(4)])
+        self.assertEqual(len(deduplicator), 3)
+        self.assertEqual(deduplicator.filter([event(3)]), [event(3)])
+
+    def test_bloom_window_and_rotation(self):
+        clock = FakeClock()
+        deduplicator = BloomDeduplicator(capacity=1000, window=10, clock=clock)
+        self.check_window(deduplicator, clock)
+        # remembered in the previous filter after one rotation, forgotten after two
+        clock.now = 12
+        self.assertEqual(deduplicator.filter([event(3)]), [])
+        clock.now = 40
+        deduplicator.filter([event(5)])
+        self.assertEqual(deduplicator.filter([event(1)]), [event(1)])
+
+    def test_forget(self):
+        for deduplicator in (LRUDeduplicator(), BloomDeduplicator(capacity=1000)):
+            deduplicator.filter([event(1), event(2)], scope="1.2")
+            deduplicator.forget([event(1)], scope="1.2")
+            self.assertEqual(deduplicator.filter([event(1), event(2)], scope="1.2"), [event(1)])
+            self.assertEqual(deduplicator.filter([event(1)], scope="1.2"), [])
+
+    def test_bloom_false_positive_rate(self):
+        deduplicator = BloomDeduplicator(capacity=20000, error_rate=0.01)
+        deduplicator.filter([event(i) for i in range(20000)])
+        fresh = deduplicator.filter([event(i) for i in range(20000, 30000)])
+        self.assertGreater(len(fresh), 9750)
+
+class TestTrackerDeduplication(unittest.TestCase):
+    def test_send_drops_replayed_events(self):
+        deduplicator = LRUDeduplicator(key=param_key("event_id"))
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", deduplicator=deduplicator))
+            gtag.send([event(1, event_id="a"), event(2, event_id="b")])
+            results = gtag.send([event(1, event_id="a")])
+            gtag.send([event(3, event_id="b"), event(4, event_id="c")])
+            payloads = collector.payloads()
+
+        self.assertTrue(results.ok)
+        self.assertEqual(len(results), 0)
+        self.assertEqual([len(payload["events"]) for payload in payloads], [2, 1])
+        self.assertEqual((deduplicator.hits, deduplicator.misses), (2, 3))
+
+    def test_failed_events_are_sent_again(self):
+        deduplicator = LRUDeduplicator(key=param_key("event_id"))
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", deduplicator=deduplicator))
+            collector.inject(status=500)
+            self.assertFalse(gtag.send([event(1, event_id="a")]).ok)
+            results = gtag.send([event(1, event_id="a")])
+
+        self.assertTrue(results.ok)
+        self.assertEqual(sum(result.event_count for result in results), 1)
+
+    def test_bulk_failed_events_are_sent_again(self):
+        with LocalCollector() as collector:
+            bulk = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", deduplicator=LRUDeduplicator()))
+            collector.inject(status=500)
+            self.assertFalse(bulk.send_bulk([("1.1", None, [event(1)])]).ok)
+            self.assertEqual(len(bulk.send_bulk([("1.1", None, [event(1)])])), 1)
+
+    def test_rejected_events_are_sent_again(self):
+        deduplicator = LRUDeduplicator(key=param_key("event_id"))
+        oversized = event(1, event_id="x", note="x" * 140000)
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", deduplicator=deduplicator))
+            self.assertRaises(PayloadTooLargeError, gtag.send, [oversized])
+            self.assertRaises(PayloadTooLargeError, gtag.send, [oversized], postpone=True)
+            results = gtag.send([event(1, event_id="x")])
+            gtag.start_background_dispatch(drain_at_exit=False).close()
+            self.assertRaises(RuntimeError, gtag.send, [event(2, event_id="y")])
+            gtag._dispatcher = None
+            gtag.send([event(2, event_id="y")])
+            payloads = collector.payloads()
+
+        self.assertEqual(sum(result.event_count for result in results), 1)
+        self.assertEqual([payload["events"][0]["params"]["event_id"] for payload in payloads], ["x", "y"])
+
+    def test_async_rejected_events_are_sent_again(self):
+        async def scenario(gtag):
+            with self.assertRaises(PayloadTooLargeError):
+                await gtag.send([event(1, event_id="x", note="x" * 140000)])
+            results = await gtag.send([event(1, event_id="x")])
+            await gtag.close()
+            return results
+
+        with LocalCollector() as collector:
+            gtag = collector.attach(AsyncGtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", deduplicator=LRUDeduplicator(key=param_key("event_id"))))
+            results = asyncio.run(scenario(gtag))
+
+        self.assertTrue(results.ok)
+        self.assertEqual(sum(result.event_count for result in results), 1)
+
+    def test_bulk_rejected_records_are_sent_again(self):
+        with LocalCollector() as collector:
+            bulk = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", deduplicator=LRUDeduplicator()))
+            self.assertRaises(AssertionError, bulk.send_bulk, [("1.1", None, [event(1)]), ("2.2", None, [{"name": "purchase"}])])
+            self.assertRaises(PayloadTooLargeError, bulk.send_bulk, [("1.1", None, [event(1)]), ("2.2", None, [event(2, note="x" * 140000)])])
+            results = bulk.send_bulk([("1.1", None, [event(1)])])
+
+        self.assertEqual(sum(result.event_count for result in results), 1)
+
+    def test_bulk_keys_are_scoped_by_client(self):
+        with LocalCollector() as collector:
+            bulk = collector.attach(GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", deduplicator=BloomDeduplicator(capacity=1000)))
+            bulk.send_bulk([("1.1", None, [event(1)]), ("2.2", None, [event(1)]), ("1.1", None, [event(1)])])
+            payloads = collector.payloads()
+
+        self.assertEqual(sorted(payload["client_id"] for payload in payloads), ["1.1", "2.2"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.transport import BaseTransport, Response
+from tests.collector import LocalCollector, make_events
+
+class BlockingTransport(BaseTransport):
+    # Holds every request until `release` is set, so the worker thread stays busy.
+    def __init__(self):
+        self.release = threading.Event()
+        self.bodies = []
+
+    def post(self, url, body, headers):
+        self.release.wait()
+        self.bodies.append(body)
+        return Response(204, {}, b"")
+
+class TestBackgroundDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.collector = LocalCollector().__enter__()
+        self.gtag = self.collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+
+    def tearDown(self):
+        self.gtag.close()
+        self.collector.__exit__(None, None, None)
+
+    def test_send_enqueues_and_flush_delivers_full_batches(self):
+        self.gtag.start_background_dispatch(flush_interval=60)
+
+        self.assertIsNone(self.gtag.send(make_events(60)))
+        self.assertTrue(self.gtag.flush(timeout=5))
+
+        self.assertEqual([len(p["events"]) for p in self.collector.payloads()], [25, 25, 10])
+
+    def test_partial_batch_is_sent_after_flush_interval(self):
+        self.gtag.start_background_dispatch(flush_interval=0.05)
+
+        self.gtag.send(make_events(3))
+        time.sleep(0.5)
+
+        self.assertEqual(len(self.collector.requests), 1)
+
+    def test_close_drains_queue(self):
+        self.gtag.start_background_dispatch(flush_interval=60)
+
+        self.gtag.send(make_events(30))
+        self.gtag.close()
+
+        self.assertEqual(sum(len(p["events"]) for p in self.collector.payloads()), 30)
+
+    def test_block_with_more_events_than_queue_size(self):
+        dispatcher = self.gtag.start_background_dispatch(max_queue_size=10, flush_interval=60)
+        sender = threading.Thread(target=dispatcher.put, args=(make_events(15),))
+        sender.start()
+        sender.join(timeout=5)
+
+        self.assertFalse(sender.is_alive())
+        self.assertTrue(self.gtag.flush(timeout=5))
+        self.assertEqual(sum(len(p["events"]) for p in self.collector.payloads()), 15)
+
+    def test_drop_newest_when_queue_is_full(self):
+        transport = BlockingTransport()
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport)
+        dispatcher = gtag.start_background_dispatch(max_queue_size=10, flush_interval=0, overflow="drop_newest")
+
+        gtag.send(make_events(1))
+        time.sleep(0.1)  # worker picks up the first event and blocks on the transport
+        accepted = dispatcher.put(make_events(15))
+        transport.release.set()
+        gtag.close()
+
+        self.assertEqual(accepted, 10)
+        self.assertEqual(dispatcher.dropped, 5)
+
+    def test_drop_oldest_when_queue_is_full(self):
+        transport = BlockingTransport()
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport)
+        dispatcher = gtag.start_background_dispatch(max_queue_size=10, flush_interval=0, overflow="drop_oldest")
+
+        gtag.send(make_events(1))
+        time.sleep(0.1)
+        dispatcher.put(make_events(15))
+        transport.release.set()
+        gtag.close()
+
+        self.assertEqual(dispatcher.dropped, 5)
+        self.assertIn(b'"index":"14"', transport.bodies[-1])
+        self.assertNotIn(b'"index":"4"', transport.bodies[-1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import sys
+import unittest
+import os
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.event import Event
+from ga4mp.ga4mp import GtagMP
+from ga4mp.item import Item
+from ga4mp.serializer import JSONSerializer
+from tests.collector import LocalCollector
+
+class TestEvent(unittest.TestCase):
+    def purchase(self):
+        event = Event("purchase")
+        event.set_event_param("currency", "USD")
+        event.set_event_param("value", 12.5)
+        item = event.create_new_item(item_id=1, item_name="Shirt")
+        item.set_parameter("price", 12.5)
+        item.set_parameter("custom_dimension", "blue")
+        event.add_item_to_event(item)
+        return event
+
+    def test_behaves_like_a_dict(self):
+        event = self.purchase()
+        expected = {
+            "name": "purchase",
+            "params": {
+                "currency": "USD",
+                "value": 12.5,
+                "items": [{"item_id": "1", "item_name": "Shirt", "price": 12.5, "custom_dimension": "blue"}],
+            },
+        }
+        self.assertEqual(event, expected)
+        self.assertEqual(event.to_dict(), expected)
+        self.assertEqual(dict(event)["name"], "purchase")
+        self.assertIn("params", event)
+        self.assertNotIn("params", Event("login"))
+        event["_timestamp_micros"] = 1
+        self.assertEqual(event.get("_timestamp_micros"), 1)
+        self.assertEqual(len(event), 3)
+        self.assertIsInstance(event, dict)
+        self.assertEqual(event.copy()["name"], "purchase")
+        self.assertEqual(json.loads(json.dumps(event)), dict(expected, _timestamp_micros=1))
+
+    def test_no_instance_dict(self):
+        event, item = self.purchase(), Item(item_id="1")
+        self.assertFalse(hasattr(event, "__dict__"))
+        self.assertFalse(hasattr(item, "__dict__"))
+
+    def test_limits(self):
+        event = Event("test_event")
+        self.assertRaises(ValueError, Event, "x" * 41)
+        self.assertRaises(ValueError, event.set_event_param, "x" * 41, 1)
+        self.assertRaises(ValueError, event.set_event_param, "label", "x" * 101)
+        event.set_event_param("page_title", "x" * 300)
+        self.assertRaises(ValueError, event.set_event_param, "page_title", "x" * 301)
+        event = Event("test_event")
+        for i in range(100):
+            event.set_event_param(f"p{i}", i)
+        event.set_event_param("p0", "overwritten")
+        self.assertRaises(RuntimeError, event.set_event_param, "one_too_many", 1)
+
+    def test_serialized_like_a_dict(self):
+        event = self.purchase()
+        self.assertEqual(json.loads(JSONSerializer(dumps=json.dumps).dumps([event])), [event.to_dict()])
+        with LocalCollector() as collector:
+            ga = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            self.assertTrue(ga.send([event]).ok)
+            sent = collector.payloads()[0]["events"][0]
+        self.assertEqual(sent["params"]["items"][0]["item_id"], "1")
+        self.assertIn("session_id", sent["params"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import logging
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp import schema
+from ga4mp.ga4mp import GtagMP
+from ga4mp.logs import LogSampler
+from tests.collector import LocalCollector
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class Unformattable(object):
+    # Fails the test if a disabled record is formatted.
+    def __str__(self):
+        raise AssertionError("disabled log record was formatted")
+
+class TestLogSampler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("ga4mp.tests.logs")
+
+    def test_disabled_levels_are_not_formatted(self):
+        self.logger.setLevel(logging.WARNING)
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+        LogSampler().log(self.logger, logging.INFO, None, "value %s", Unformattable())
+
+    def test_repeated_warnings_are_rate_limited(self):
+        clock = FakeClock()
+        sampler = LogSampler(interval=10, clock=clock)
+        with self.assertLogs(self.logger, level="WARNING") as logs:
+            for _ in range(5):
+                sampler.log(self.logger, logging.WARNING, "same", "repeated %d", 1)
+            sampler.log(self.logger, logging.WARNING, "other", "different")
+            clock.now = 10
+            sampler.log(self.logger, logging.WARNING, "same", "repeated %d", 2)
+
+        self.assertEqual([record.getMessage() for record in logs.records], ["repeated 1", "different", "repeated 2 (4 similar messages suppressed)"])
+        self.assertEqual(logs.records[2].ga4mp, {"suppressed": 4})
+
+    def test_info_records_are_sampled_with_fields(self):
+        with self.assertLogs(self.logger, level="INFO") as logs:
+            for _ in range(100):
+                LogSampler(sample_rate=0.0).log(self.logger, logging.INFO, None, "dropped")
+            LogSampler().log(self.logger, logging.INFO, None, "kept %d", 1, batch_index=0)
+
+        self.assertEqual([record.getMessage() for record in logs.records], ["kept 1"])
+        self.assertEqual(logs.records[0].ga4mp, {"batch_index": 0})
+
+    def test_schema_warnings_go_through_the_sampler(self):
+        validator = schema.SchemaValidator(catalog={"purchase": ["currency"]}, sampler=LogSampler())
+        with self.assertLogs("ga4mp.schema", level="WARNING") as logs:
+            validator.validate([{"name": "purchase", "params": {}}] * 3)
+        self.assertEqual(len(logs.records), 1)
+
+    def test_batch_failures_are_rate_limited(self):
+        with LocalCollector() as collector:
+            for _ in range(3):
+                collector.inject(status=400)
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            with self.assertLogs("ga4mp.ga4mp", level="ERROR") as logs:
+                for _ in range(3):
+                    gtag.send([{"name": "test_event", "params": {}}])
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].ga4mp["status"], 400)
+
+    def test_package_does_not_set_logger_levels(self):
+        self.assertEqual(logging.getLogger("ga4mp.ga4mp").level, logging.NOTSET)
+        self.assertEqual(logging.getLogger("ga4mp.store").level, logging.NOTSET)
+
+if __name__ == "__main__":
+    unittest.main()
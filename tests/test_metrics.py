@@ -0,0 +1,116 @@
+import time
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.metrics import Metrics, MetricsRecorder, OpenTelemetrySpans
+from ga4mp.retry import RetryPolicy
+from tests.collector import LocalCollector, make_events
+from tests.test_dispatcher import BlockingTransport
+
+class FakeSpan(object):
+    def __init__(self, name, attributes, start_time):
+        self.name, self.attributes, self.start_time = name, attributes, start_time
+        self.exceptions = []
+        self.end_time = None
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, attributes=None, start_time=None):
+        span = FakeSpan(name, attributes, start_time)
+        self.spans.append(span)
+        return span
+
+class TestMetrics(unittest.TestCase):
+    def test_default_is_a_disabled_noop(self):
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2")
+        self.assertIsInstance(gtag.metrics, Metrics)
+        self.assertFalse(gtag.metrics.enabled)
+
+    def test_counters_and_histograms(self):
+        metrics = MetricsRecorder()
+        with LocalCollector() as collector:
+            collector.inject(status=503)
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", retry=RetryPolicy(backoff_base=0), metrics=metrics))
+            self.assertTrue(gtag.send(make_events(30)).ok)
+            received = collector.bytes_received
+
+        counters = metrics.counters
+        self.assertEqual(counters["events_enqueued_total"], 30)
+        self.assertEqual(counters["events_sent_total"], 30)
+        self.assertEqual(counters["batches_sent_total"], 2)
+        self.assertEqual(counters["requests_total"], 3)
+        self.assertEqual(counters["retries_total"], 1)
+        self.assertEqual(counters["bytes_sent_total"], received)
+        self.assertEqual(metrics.status_counts, {503: 1, 204: 2})
+        self.assertEqual(metrics.request_latency.count, 3)
+        self.assertEqual(metrics.serialization_time.count, 2)
+
+    def test_failed_batches(self):
+        metrics = MetricsRecorder()
+        with LocalCollector() as collector:
+            collector.inject(status=400)
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", metrics=metrics))
+            self.assertFalse(gtag.send(make_events(3)).ok)
+
+        self.assertEqual(metrics.counters["batches_failed_total"], 1)
+        self.assertEqual(metrics.counters["events_failed_total"], 3)
+        self.assertEqual(metrics.counters["events_sent_total"], 0)
+
+    def test_drops_are_counted(self):
+        metrics = MetricsRecorder()
+        transport = BlockingTransport()
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport, metrics=metrics)
+        gtag.start_background_dispatch(max_queue_size=10, flush_interval=0, overflow="drop_newest")
+
+        gtag.send(make_events(1))
+        time.sleep(0.1)
+        gtag.send(make_events(15))
+        transport.release.set()
+        gtag.close()
+
+        self.assertEqual(metrics.counters["events_enqueued_total"], 16)
+        self.assertEqual(metrics.counters["events_dropped_total"], 5)
+
+    def test_prometheus_text(self):
+        metrics = MetricsRecorder()
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", metrics=metrics))
+            gtag.send(make_events(2))
+
+        text = metrics.prometheus_text()
+        self.assertIn("# TYPE ga4mp_events_sent_total counter\nga4mp_events_sent_total 2\n", text)
+        self.assertIn('ga4mp_responses_total{status="204"} 1\n', text)
+        self.assertIn('ga4mp_request_duration_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("ga4mp_request_duration_seconds_count 1\n", text)
+
+    def test_opentelemetry_spans(self):
+        tracer = FakeTracer()
+        metrics = MetricsRecorder(span_callback=OpenTelemetrySpans(tracer))
+        with LocalCollector() as collector:
+            collector.inject(status=400)
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", metrics=metrics))
+            gtag.send(make_events(27))
+
+        self.assertEqual([span.name for span in tracer.spans], ["ga4mp.send_batch"] * 2)
+        failed, sent = sorted(tracer.spans, key=lambda span: span.attributes["ga4mp.batch_index"])
+        self.assertEqual(failed.attributes["http.status_code"], 400)
+        self.assertEqual(len(failed.exceptions), 1)
+        self.assertEqual(sent.attributes["ga4mp.event_count"], 2)
+        self.assertEqual(sent.exceptions, [])
+        self.assertLessEqual(sent.start_time, sent.end_time)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.transport import BaseTransport, Response
+from tests.collector import LocalCollector, make_events
+
+class FailSecondBatchTransport(BaseTransport):
+    def __init__(self):
+        self.calls = 0
+
+    def post(self, url, body, headers):
+        self.calls += 1
+        if self.calls == 2:
+            raise urllib.error.URLError("connection reset")
+        return Response(204, {}, b"")
+
+class TestPostponedSend(unittest.TestCase):
+    def test_postponed_events_are_packed_into_full_batches(self):
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            gtag.send(make_events(60), postpone=True)
+            gtag.postponed_send()
+
+            payloads = collector.payloads()
+
+        self.assertEqual([len(p["events"]) for p in payloads], [25, 25, 10])
+        for payload in payloads:
+            self.assertNotIn("timestamp_micros", payload)
+            for event in payload["events"]:
+                self.assertIsInstance(event["timestamp_micros"], int)
+                self.assertNotIn("_timestamp_micros", event)
+        self.assertEqual(gtag._event_list, [])
+
+    def test_failed_batch_stays_queued(self):
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=FailSecondBatchTransport())
+        gtag.send(make_events(60), postpone=True)
+
+        results = gtag.postponed_send()
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertIsInstance(results.failed[0].error, urllib.error.URLError)
+        self.assertEqual([e["params"]["index"] for e in gtag._event_list], [str(i) for i in range(25, 50)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+from ga4mp.retry import RetryPolicy
+from tests.collector import LocalCollector
+
+class FakeClock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self):
+        self.keys = []
+
+    def reserve(self, key, cost=1):
+        self.keys.append(key)
+        return 0.0
+
+def reserve_many(limiter, count):
+    for _ in range(count):
+        limiter.reserve("G-TEST")
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=3, clock=clock)
+
+        self.assertEqual([bucket.reserve("a") for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve("a"), 0.1)
+        self.assertAlmostEqual(bucket.reserve("a"), 0.2)
+        # other keys have their own budget
+        self.assertEqual(bucket.reserve("b"), 0.0)
+        # idle time refills the bucket, up to the burst
+        clock.now += 60
+        self.assertEqual([bucket.reserve("a") for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve("a", cost=2), 0.2)
+
+    def test_tracker_takes_a_token_per_request(self):
+        limiter = RecordingLimiter()
+        with LocalCollector() as collector:
+            collector.inject(status=503)
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", rate_limiter=limiter, retry=RetryPolicy(backoff_base=0)))
+            gtag.send([{"name": "test_event", "params": {}}] * 30)
+
+        self.assertEqual(limiter.keys, ["G-TEST"] * 3)
+
+    def test_tracker_is_throttled(self):
+        with LocalCollector() as collector:
+            gtag = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", rate_limiter=TokenBucket(rate=20, burst=1)))
+            start = time.perf_counter()
+            gtag.send([{"name": "test_event", "params": {}}] * 125)
+            elapsed = time.perf_counter() - start
+
+        self.assertGreaterEqual(elapsed, 0.19)
+
+@unittest.skipIf(not hasattr(os, "fork"), "requires fork")
+class TestFileTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "budget.json")
+
+    def test_processes_share_one_budget(self):
+        # with a stopped clock, every reservation of every process takes a token and none is lost
+        limiter = FileTokenBucket(self.path, rate=1, burst=10, clock=FakeClock())
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=reserve_many, args=(limiter, 20)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        reserve_many(limiter, 20)
+        for worker in workers:
+            worker.join()
+
+        with open(self.path) as state:
+            tokens, _ = json.load(state)["G-TEST"]
+        self.assertEqual(tokens, 10 - 100)
+        self.assertAlmostEqual(limiter.reserve("G-TEST"), 91.0)
+
+    def test_state_survives_new_instances(self):
+        clock = FakeClock()
+        FileTokenBucket(self.path, rate=2, burst=1, clock=clock).reserve("a")
+        self.assertAlmostEqual(FileTokenBucket(self.path, rate=2, burst=1, clock=clock).reserve("a"), 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
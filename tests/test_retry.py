@@ -0,0 +1,85 @@
+import time
+import unittest
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.retry import RetryPolicy
+from ga4mp.transport import PooledTransport
+from tests.collector import LocalCollector, make_events
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.collector = LocalCollector().__enter__()
+
+    def tearDown(self):
+        self.collector.__exit__(None, None, None)
+
+    def tracker(self, retry, transport=None):
+        return self.collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport, retry=retry))
+
+    def test_transient_status_is_retried(self):
+        self.collector.inject(status=503)
+        self.collector.inject(status=500)
+
+        results = self.tracker(RetryPolicy(max_attempts=3, backoff_base=0.01)).send(make_events(30))
+
+        self.assertTrue(results.ok)
+        self.assertEqual([result.attempts for result in results], [3, 1])
+        self.assertEqual(len(self.collector.requests), 4)
+
+    def test_client_error_is_not_retried(self):
+        self.collector.inject(status=400)
+
+        results = self.tracker(RetryPolicy(max_attempts=3, backoff_base=0.01)).send(make_events(30))
+
+        self.assertEqual([(result.status, result.attempts) for result in results], [(400, 1), (204, 1)])
+
+    def test_gives_up_after_max_attempts(self):
+        for _ in range(3):
+            self.collector.inject(status=503)
+
+        results = self.tracker(RetryPolicy(max_attempts=2, backoff_base=0.01)).send(make_events(1))
+
+        self.assertEqual(results[0].attempts, 2)
+        self.assertIsInstance(results[0].error, urllib.error.HTTPError)
+
+    def test_retry_after_is_honored(self):
+        self.collector.inject(status=429, headers={"Retry-After": "0.3"})
+
+        start = time.perf_counter()
+        results = self.tracker(RetryPolicy(backoff_base=0.001)).send(make_events(1))
+
+        self.assertTrue(results.ok)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+
+    def test_timeout_is_retried(self):
+        self.collector.inject(delay=0.5)
+
+        results = self.tracker(RetryPolicy(backoff_base=0.01), transport=PooledTransport(timeout=0.1)).send(make_events(1))
+
+        self.assertTrue(results.ok)
+        self.assertEqual(results[0].attempts, 2)
+
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=5)
+
+        for attempt in range(1, 10):
+            self.assertLessEqual(policy.backoff(attempt), min(5, 2 ** (attempt - 1)))
+
+    def test_postponed_send_uses_retry_policy(self):
+        self.collector.inject(status=502)
+        gtag = self.tracker(RetryPolicy(backoff_base=0.01))
+
+        gtag.send(make_events(5), postpone=True)
+        results = gtag.postponed_send()
+
+        self.assertEqual(results[0].attempts, 2)
+        self.assertEqual(gtag._event_list, [])
+
+if __name__ == "__main__":
+    unittest.main()
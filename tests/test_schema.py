@@ -0,0 +1,50 @@
+import unittest
+import os, sys
+import types
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp import schema
+from ga4mp.ga4mp import GtagMP
+
+class TestSchemaValidator(unittest.TestCase):
+    def test_catalog_is_compiled_to_frozensets(self):
+        schemas = schema.compile_schemas({"purchase": ["currency", "value"], "login": []})
+        self.assertEqual(schemas, {"purchase": (frozenset({"currency", "value"}), ["currency", "value"])})
+
+    def test_warn_logs_every_missing_parameter(self):
+        validator = schema.SchemaValidator(catalog={"purchase": ["currency", "value"]})
+        with self.assertLogs("ga4mp.schema", level="WARNING") as logs:
+            validator.validate([{"name": "purchase", "params": {}}, {"name": "purchase", "params": {"value": 1}}])
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn("The parameter 'currency' triggered this warning.", logs.output[0])
+
+    def test_warn_once_logs_each_event_name_once(self):
+        validator = schema.SchemaValidator(mode=schema.WARN_ONCE, catalog={"purchase": ["currency"], "refund": ["currency"]})
+        with self.assertLogs("ga4mp.schema", level="WARNING") as logs:
+            for _ in range(3):
+                validator.validate([{"name": "purchase", "params": {}}, {"name": "refund", "params": {}}])
+        self.assertEqual(len(logs.output), 2)
+
+    def test_strict_raises(self):
+        validator = schema.SchemaValidator(mode=schema.STRICT, catalog={"purchase": ["currency", "value"]})
+        validator.validate([{"name": "purchase", "params": {"currency": "USD", "value": 1}}])
+        with self.assertRaisesRegex(ValueError, "currency"):
+            validator.validate([{"name": "purchase", "params": {"value": 1}}])
+
+    def test_malformed_events_are_rejected(self):
+        validator = schema.SchemaValidator(mode=schema.OFF)
+        self.assertRaises(AssertionError, validator.validate, {"name": "purchase", "params": {}})
+        self.assertRaises(AssertionError, validator.validate, [{"name": "purchase"}])
+        self.assertRaises(AssertionError, validator.validate, [types.MappingProxyType({"name": "purchase", "params": {}})])
+
+    def test_catalog_changes_are_picked_up(self):
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", schema_mode=schema.STRICT)
+        ga._check_params([{"name": "schema_test_event", "params": {}}])
+        ga.append_event_to_params_dict({"schema_test_event": ["required_param"]})
+        self.assertRaises(ValueError, ga._check_params, [{"name": "schema_test_event", "params": {}}])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.transport import BaseTransport, Response
+from tests.collector import make_events
+
+class SlowTransport(BaseTransport):
+    # Sleeps on every request and fails the third one, recording the highest number of requests in flight.
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, body, headers):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if call == 3:
+            raise urllib.error.HTTPError(url, 503, "Service Unavailable", {}, None)
+        return Response(204, {}, b"")
+
+class TestSendResults(unittest.TestCase):
+    def test_sequential_send_reports_every_batch(self):
+        transport = SlowTransport(delay=0)
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport)
+
+        results = gtag.send(make_events(110))
+
+        self.assertEqual([result.batch_index for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual([result.event_count for result in results], [25, 25, 25, 25, 10])
+        self.assertEqual([result.status for result in results], [204, 204, 503, 204, 204])
+        self.assertFalse(results.ok)
+        self.assertEqual(len(results.failed), 1)
+        with self.assertRaises(urllib.error.HTTPError):
+            results.raise_for_errors()
+
+    def test_thread_pool_sends_batches_concurrently(self):
+        transport = SlowTransport()
+        gtag = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=transport, max_workers=4)
+
+        results = gtag.send(make_events(200))
+        gtag.close()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual([result.batch_index for result in results], list(range(8)))
+        self.assertGreater(transport.max_in_flight, 1)
+        self.assertLessEqual(transport.max_in_flight, 4)
+        self.assertTrue(all(result.latency > 0 for result in results))
+
+if __name__ == "__main__":
+    unittest.main()
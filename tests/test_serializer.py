@@ -0,0 +1,71 @@
+import datetime
+import json
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.serializer import JSONSerializer, RequestEncoder
+from tests.collector import make_events
+
+class TestRequestEncoder(unittest.TestCase):
+    def test_body_matches_stdlib_json(self):
+        encoder = RequestEncoder()
+        static = {"client_id": "1.2", "user_id": "u", "user_properties": {"plan": {"value": "gold"}}}
+        body = encoder.encode_with_prefix(encoder.encode_prefix(static), make_events(3, label="café"), timestamp_micros=1700000000000000)
+        self.assertEqual(json.loads(body), dict(static, events=make_events(3, label="café"), timestamp_micros=1700000000000000))
+
+    def test_prefix_is_encoded_once(self):
+        calls = []
+        def dumps(obj):
+            calls.append(obj)
+            return json.dumps(obj)
+        encoder = RequestEncoder(JSONSerializer(dumps=dumps))
+        prefix = encoder.encode_prefix({"client_id": "1.2"})
+        encoder.encode_with_prefix(prefix, make_events(1, label="café"))
+        body = encoder.encode_with_prefix(prefix, make_events(1, label="café"))
+        self.assertEqual(len(calls), 3)  # the static part once, the events twice
+        self.assertEqual(json.loads(body)["client_id"], "1.2")
+
+    def test_empty_static_part(self):
+        encoder = RequestEncoder()
+        self.assertEqual(json.loads(encoder.encode_with_prefix(encoder.encode_prefix({}), [])), {"events": []})
+
+    def test_tracker_picks_up_store_changes(self):
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2")
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertNotIn("user_properties", json.loads(body))
+        ga.store.set_user_property("plan", "gold")
+        ga.store.set_user_property("user_id", "u1")
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost", date=datetime.datetime(2022, 1, 1))
+        request = json.loads(body)
+        self.assertEqual(request["user_properties"], {"plan": {"value": "gold"}})
+        self.assertEqual(request["user_id"], "u1")
+        self.assertIn("timestamp_micros", request)
+
+    def test_request_template_is_reused_until_user_properties_change(self):
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2")
+        template = ga._request_template("http://localhost")
+        url, _ = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertEqual(url, "http://localhost?measurement_id=G-TEST&api_secret=SECRET")
+        self.assertIs(ga._request_template("http://localhost"), template)
+        ga.store.set_user_property("plan", "gold")
+        self.assertIsNot(ga._request_template("http://localhost"), template)
+        ga.client_id = "1.3"
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertEqual(json.loads(body)["client_id"], "1.3")
+        ga.store.get_all_user_properties()["plan"] = "silver"
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertEqual(json.loads(body)["user_properties"], {"plan": {"value": "silver"}})
+        ga.store["user_properties"]["tier"] = 2
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertEqual(json.loads(body)["user_properties"]["tier"], {"value": 2})
+        ga.store = ga.store.__class__()
+        _, body = ga._prepare_batch(make_events(1, label="café"), domain="http://localhost")
+        self.assertNotIn("user_properties", json.loads(body))
+
+if __name__ == "__main__":
+    unittest.main()
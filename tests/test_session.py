@@ -0,0 +1,65 @@
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.session import SessionManager
+from ga4mp.store import DictStore
+
+class TestSessionManager(unittest.TestCase):
+    def test_store_session_rolls_over_after_timeout(self):
+        sessions = SessionManager(timeout=60)
+        store = DictStore({"session_parameters": {"session_id": 1000, "last_interaction_time_msec": 1000000}})
+        self.assertEqual(sessions.touch_store(store, 1030000), (1000, 30000))
+        self.assertEqual(sessions.touch_store(store, 1090000), (1000, 60000))
+        self.assertEqual(sessions.touch_store(store, 1150001), (1150, 0))
+        self.assertEqual(store.get_session_parameter("session_id"), 1150)
+        self.assertEqual(sessions.touch_store(store, 1151000), (1150, 999))
+
+    def test_no_timeout_keeps_one_session(self):
+        sessions = SessionManager(timeout=None)
+        store = DictStore({"session_parameters": {"session_id": 1, "last_interaction_time_msec": 0}})
+        self.assertEqual(sessions.touch_store(store, 10 ** 12), (1, 10 ** 12))
+
+    def test_sessions_of_many_clients(self):
+        sessions = SessionManager(timeout=60)
+        self.assertEqual(sessions.touch("a", 1000000), (1000, 0))
+        self.assertEqual(sessions.touch("b", 1010000), (1010, 0))
+        self.assertEqual(sessions.touch("a", 1020000), (1000, 20000))
+        self.assertEqual(sessions.touch("a", 1100000), (1100, 0))
+
+    def test_expired_sessions_are_evicted(self):
+        sessions = SessionManager(timeout=60)
+        for i in range(1000):
+            sessions.touch(i, i)
+        sessions.touch(0, 50000)  # keeps client 0 alive
+        self.assertEqual(sessions.evict_expired(60000 + 499), 499)
+        self.assertEqual(len(sessions), 501)
+        self.assertIn(0, sessions)
+        self.assertNotIn(1, sessions)
+        self.assertEqual(sessions.evict_expired(10 ** 6), 501)
+        self.assertEqual(len(sessions._expirations), 0)
+
+    def test_forgotten_sessions_leave_no_live_heap_entries(self):
+        sessions = SessionManager(timeout=60)
+        for i in range(100):
+            sessions.touch("a", i)
+            sessions.forget("a")
+        sessions.touch("a", 100)
+        self.assertLessEqual(len(sessions._expirations), 2 * len(sessions) + 17)
+        sessions.touch("a", 50000)
+        self.assertEqual(sessions.evict_expired(60000 + 100), 0)
+        self.assertEqual(len(sessions._expirations), 1)
+        self.assertEqual(sessions.evict_expired(10 ** 6), 1)
+        self.assertEqual(len(sessions._expirations), 0)
+
+    def test_tracker_renews_stale_persisted_session(self):
+        store = DictStore({"session_parameters": {"session_id": 1, "last_interaction_time_msec": 1000}})
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", store=store)
+        self.assertNotEqual(ga.store.get_session_parameter("session_id"), 1)
+
+if __name__ == "__main__":
+    unittest.main()
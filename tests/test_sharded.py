@@ -0,0 +1,66 @@
+import functools
+import unittest
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.bulk import GtagBulkMP
+from ga4mp.sharded import ShardedBulkSender, shard_of
+from tests.collector import LocalCollector
+
+def make_tracker(url):
+    tracker = GtagBulkMP(api_secret="SECRET", measurement_id="G-TEST", max_workers=2)
+    tracker._base_domain = url + "/mp/collect"
+    return tracker
+
+class TestShardedBulkSender(unittest.TestCase):
+    def records(self, clients, events_per_client):
+        return [
+            (f"{client}.1", {"plan": "gold"}, [{"name": "test_event", "params": {"index": str(i)}} for i in range(events_per_client)])
+            for client in range(clients)
+        ]
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("1234.5678", 4), shard_of("1234.5678", 4))
+        self.assertEqual(len({shard_of(f"{i}.1", 3) for i in range(100)}), 3)
+
+    def test_records_are_sent_and_sessions_stay_on_one_worker(self):
+        with LocalCollector() as collector:
+            with ShardedBulkSender(functools.partial(make_tracker, collector.url), processes=3) as sender:
+                first = sender.send_bulk(self.records(20, 30))
+                second = sender.send_bulk(self.records(20, 1))
+            payloads = collector.payloads()
+
+        self.assertTrue(first.ok and second.ok)
+        self.assertEqual([result.batch_index for result in first], list(range(40)))
+        self.assertEqual(sum(result.event_count for result in first), 600)
+        self.assertEqual(len(second), 20)
+        sessions = {}
+        for payload in payloads:
+            for event in payload["events"]:
+                sessions.setdefault(payload["client_id"], set()).add(event["params"]["session_id"])
+        self.assertEqual(len(sessions), 20)
+        self.assertTrue(all(len(session_ids) == 1 for session_ids in sessions.values()))
+
+    def test_failed_batches_keep_their_status(self):
+        with LocalCollector(status=400) as collector:
+            with ShardedBulkSender(functools.partial(make_tracker, collector.url), processes=2) as sender:
+                results = sender.send_bulk(self.records(4, 1))
+
+        self.assertFalse(results.ok)
+        self.assertEqual({result.status for result in results}, {400})
+        self.assertIsInstance(results[0].error, urllib.error.HTTPError)
+
+    def test_worker_errors_are_raised(self):
+        with LocalCollector() as collector:
+            with ShardedBulkSender(functools.partial(make_tracker, collector.url), processes=2) as sender:
+                with self.assertRaises(AssertionError):
+                    sender.send_bulk([("1.1", None, [{"name": "no_params"}])])
+                # the worker keeps serving
+                self.assertTrue(sender.send_bulk(self.records(2, 1)).ok)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import tempfile
+import time
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.spool import SegmentSpool
+from tests.collector import LocalCollector, make_events
+
+class TestSegmentSpool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.collector = LocalCollector().__enter__()
+
+    def tearDown(self):
+        self.collector.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def tracker(self, spool):
+        return self.collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", spool=spool))
+
+    def sent_indexes(self):
+        return [int(event["params"]["index"]) for payload in self.collector.payloads() for event in payload["events"]]
+
+    def test_postponed_events_survive_a_restart(self):
+        gtag = self.tracker(SegmentSpool(self.tmp.name, fsync_every=10))
+        gtag.send(make_events(60), postpone=True)
+        del gtag  # no close(): simulate a crash after the appends
+
+        results = self.tracker(SegmentSpool(self.tmp.name)).postponed_send()
+
+        self.assertEqual([result.event_count for result in results], [25, 25, 10])
+        self.assertEqual(self.sent_indexes(), list(range(60)))
+        self.assertTrue(all("timestamp_micros" in e for p in self.collector.payloads() for e in p["events"]))
+
+    def test_lone_event_reaches_the_file_and_is_synced(self):
+        spool = SegmentSpool(self.tmp.name, fsync_interval=0.05)
+        spool.append(make_events(1))
+        # still referenced, so nothing is flushed when the file object is collected
+        self.assertEqual(len(SegmentSpool(self.tmp.name)), 1)
+        time.sleep(0.3)
+        self.assertEqual(spool._unsynced, 0)
+        spool.close()
+
+    def test_failed_batch_is_replayed_by_next_drain(self):
+        spool = SegmentSpool(self.tmp.name)
+        gtag = self.tracker(spool)
+        gtag.send(make_events(60), postpone=True)
+        self.collector.inject(status=204)
+        self.collector.inject(status=400)
+
+        results = gtag.postponed_send()
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertEqual(len(spool), 25)
+
+        gtag.postponed_send()
+        self.assertEqual(len(spool), 0)
+        self.assertEqual(sorted(self.sent_indexes()), sorted(list(range(60)) + list(range(25, 50))))
+        self.assertEqual(self.sent_indexes()[-25:], list(range(25, 50)))
+
+    def test_acknowledged_segments_are_deleted(self):
+        spool = SegmentSpool(self.tmp.name, segment_max_events=20)
+        for start in range(0, 50, 10):
+            spool.append(make_events(10, start=start))
+        self.assertEqual(len(list(spool.directory.glob("*.seg"))), 3)
+
+        spool.drain(self.tracker(None))
+
+        self.assertEqual(len(list(spool.directory.glob("*.seg"))), 1)
+        self.assertEqual(len(spool), 0)
+        spool.append(make_events(5, start=50))
+        self.assertEqual([int(e["params"]["index"]) for batch, _ in spool.read_batches() for e in batch], list(range(50, 55)))
+
+    def test_incomplete_last_line_is_dropped_on_open(self):
+        spool = SegmentSpool(self.tmp.name)
+        spool.append(make_events(3))
+        spool.close()
+        segment = next(spool.directory.glob("*.seg"))
+        with open(segment, "ab") as segment_file:
+            segment_file.write(b'{"name":"test_ev')
+
+        reopened = SegmentSpool(self.tmp.name)
+        reopened.append(make_events(1, start=3))
+
+        self.assertEqual([int(e["params"]["index"]) for batch, _ in reopened.read_batches() for e in batch], [0, 1, 2, 3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.store import ConcurrentStore, DictStore, FileStore, SQLiteStore
+
+class TestUserPropertiesVersion(unittest.TestCase):
+    def check_version(self, store):
+        version = store.user_properties_version
+        store.set_session_parameter("session_id", 1)
+        store.update_session_parameter("counter", lambda value: value + 1, default=0)
+        self.assertEqual(store.user_properties_version, version)
+        store.set_user_property("plan", "gold")
+        self.assertEqual(store.user_properties_version, version + 1)
+        store.clear_user_properties()
+        self.assertEqual(store.user_properties_version, version + 2)
+        store["user_properties"] = {"plan": "silver"}
+        self.assertEqual(store.user_properties_version, version + 3)
+
+    def test_dict_store(self):
+        self.check_version(DictStore())
+
+    def test_concurrent_store(self):
+        self.check_version(ConcurrentStore())
+
+    def test_file_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_version(FileStore(data_location=os.path.join(directory, "store.json")))
+
+class TestFileStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "store.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_new_file_is_created_and_loaded(self):
+        store = FileStore(data_location=self.path)
+        self.assertTrue(os.path.exists(self.path))
+        store.set_user_property("plan", "gold")
+        store.set_session_parameter("session_id", 123)
+        store.save()
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+        loaded = FileStore(data_location=self.path)
+        self.assertEqual(loaded.get_user_property("plan"), "gold")
+        self.assertEqual(loaded.get_session_parameter("session_id"), 123)
+
+    def test_journal_appends_changes_only(self):
+        store = FileStore(data_location=self.path, journal=True)
+        for i in range(100):
+            store.set_session_parameter(f"key_{i}", i)
+        store.save()
+        size = os.path.getsize(self.path)
+        store.set_session_parameter("key_1", "changed")
+        store.clear_user_properties()
+        store.set_user_property("plan", "silver")
+        store.save()
+        self.assertEqual(os.path.getsize(self.path), size)
+        with open(self.path + ".log") as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 103)
+
+        loaded = FileStore(data_location=self.path, journal=True)
+        self.assertEqual(loaded.get_session_parameter("key_1"), "changed")
+        self.assertEqual(loaded.get_session_parameter("key_99"), 99)
+        self.assertEqual(loaded.get_all_user_properties(), {"plan": "silver"})
+
+    def test_journal_is_compacted(self):
+        store = FileStore(data_location=self.path, journal=True, compact_after=10)
+        for i in range(12):
+            store.set_session_parameter(f"key_{i}", i)
+            store.save()
+        with open(self.path) as json_file:
+            self.assertEqual(json.load(json_file)["session_parameters"]["key_9"], 9)
+        with open(self.path + ".log") as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 2)
+        store.compact()
+        self.assertFalse(os.path.exists(self.path + ".log"))
+        self.assertEqual(FileStore(data_location=self.path, journal=True).get_session_parameter("key_11"), 11)
+
+    def test_partial_journal_line_is_ignored(self):
+        store = FileStore(data_location=self.path, journal=True)
+        store.set_session_parameter("a", 1)
+        store.save()
+        with open(self.path + ".log", "ab") as journal_file:
+            journal_file.write(b'["set", "session_parameters", "b"')
+        loaded = FileStore(data_location=self.path, journal=True)
+        self.assertEqual(loaded.get_session_parameter("a"), 1)
+        self.assertIsNone(loaded.get_session_parameter("b"))
+
+    def test_saves_are_debounced(self):
+        store = FileStore(data_location=self.path, save_delay=0.2)
+        for i in range(10):
+            store.set_session_parameter("counter", i)
+            store.save()
+        self.assertIsNone(FileStore(data_location=self.path).get_session_parameter("counter"))
+        time.sleep(0.5)
+        self.assertEqual(FileStore(data_location=self.path).get_session_parameter("counter"), 9)
+        store.set_session_parameter("counter", 10)
+        store.save()
+        store.flush()
+        self.assertEqual(FileStore(data_location=self.path).get_session_parameter("counter"), 10)
+
+    def test_delayed_writes_do_not_race_with_changes(self):
+        store = FileStore(data_location=self.path, save_delay=0.001)
+        errors = []
+        hook = threading.excepthook
+        threading.excepthook = errors.append
+        try:
+            for round in range(20):
+                for i in range(2000):
+                    store.set_session_parameter(f"key_{i}_{round}", i)
+                store.save()
+            store.flush()
+        finally:
+            threading.excepthook = hook
+        self.assertEqual(errors, [])
+        self.assertEqual(FileStore(data_location=self.path).get_session_parameter("key_1999_19"), 1999)
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "store.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_clients_are_kept_apart_and_persisted(self):
+        database = SQLiteStore(self.path)
+        first, second = database.client("1.1"), database.client("2.2")
+        first.set_user_property("plan", "gold")
+        second.set_user_property("plan", {"tier": 2})
+        second.set_other_parameter("note", [1, 2])
+        first.save()
+        database.close()
+
+        database = SQLiteStore(self.path)
+        self.assertEqual(database.client("1.1").get_user_property("plan"), "gold")
+        self.assertEqual(database.client("2.2").get_user_property("plan"), {"tier": 2})
+        self.assertEqual(database.client("2.2").get_other_parameter("note"), [1, 2])
+        self.assertEqual(database.client("3.3").get_all_user_properties(), {})
+        database.close()
+
+    def test_writes_are_batched(self):
+        database = SQLiteStore(self.path, batch_size=3)
+        store = database.client("1.1")
+        store.set_session_parameter("a", 1)
+        store.set_session_parameter("b", 2)
+        count = "SELECT COUNT(*) FROM parameters"
+        self.assertEqual(database._connection.execute(count).fetchone()[0], 0)
+        store.set_session_parameter("c", 3)
+        self.assertEqual(database._connection.execute(count).fetchone()[0], 3)
+        store.clear_session_parameters()
+        database.flush()
+        self.assertEqual(database._connection.execute(count).fetchone()[0], 0)
+        database.close()
+
+    def test_lru_cache_is_bounded(self):
+        database = SQLiteStore(self.path, cache_size=2, batch_size=1000)
+        for client_id in ("a", "b", "c"):
+            database.client(client_id).set_session_parameter("session_id", client_id)
+        self.assertEqual(list(database._cache), ["b", "c"])
+        # evicted clients are read back from disk, including writes not yet committed
+        self.assertEqual(database.client("a").get_session_parameter("session_id"), "a")
+        database.close()
+
+    def test_tracker_uses_client_store(self):
+        database = SQLiteStore(self.path)
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", store=database.client("1.2"))
+        session_id = ga.store.get_session_parameter("session_id")
+        ga.store.save()
+        self.assertEqual(database.client("1.2").get_session_parameter("session_id"), session_id)
+        database.close()
+
+class TestConcurrentStore(unittest.TestCase):
+    threads = 16
+    iterations = 2000
+
+    def hammer(self, target):
+        threads = [threading.Thread(target=target) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_update_is_atomic(self):
+        store = ConcurrentStore()
+
+        def increment():
+            for _ in range(self.iterations):
+                store.update_session_parameter("counter", lambda value: value + 1, default=0)
+                store.set_user_property("plan", "gold")
+                store.get_all_user_properties()
+
+        self.hammer(increment)
+        self.assertEqual(store.get_session_parameter("counter"), self.threads * self.iterations)
+
+    def test_compare_and_set(self):
+        store = ConcurrentStore()
+        store.set_session_parameter("session_id", 1)
+        self.assertFalse(store.compare_and_set_session_parameter("session_id", 2, 3))
+        self.assertTrue(store.compare_and_set_session_parameter("session_id", 1, 3))
+        self.assertEqual(store.get_session_parameter("session_id"), 3)
+
+    def test_snapshots_do_not_change(self):
+        store = ConcurrentStore()
+        store.set_user_property("plan", "gold")
+        snapshot = store.get_all_user_properties()
+        store.set_user_property("plan", "silver")
+        self.assertEqual(snapshot, {"plan": "gold"})
+
+    def test_engagement_time_is_not_counted_twice(self):
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", store=ConcurrentStore())
+        start = ga.store.get_session_parameter("last_interaction_time_msec")
+        engagement = []
+
+        def send():
+            for _ in range(200):
+                events = [{"name": "test_event", "params": {}}]
+                ga._add_session_id_and_engagement_time(events)
+                engagement.append(events[0]["params"]["engagement_time_msec"])
+
+        self.hammer(send)
+        end = ga.store.get_session_parameter("last_interaction_time_msec")
+        # every millisecond between the first and the last interaction is attributed to exactly one event
+        self.assertEqual(sum(engagement), end - start)
+
+if __name__ == "__main__":
+    unittest.main()
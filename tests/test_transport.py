@@ -0,0 +1,77 @@
+import unittest
+import unittest.mock
+import urllib.error
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.ga4mp import GtagMP
+from ga4mp.transport import PooledTransport, UrllibTransport
+from tests.collector import LocalCollector
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.collector = LocalCollector().__enter__()
+        self.events = [{"name": "test_event", "params": {"index": str(i)}} for i in range(60)]
+
+    def tearDown(self):
+        self.collector.__exit__(None, None, None)
+
+    def test_pooled_transport_reuses_connection_across_sends(self):
+        gtag = self.collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+
+        gtag.send(self.events)
+        gtag.send(self.events)
+        gtag.close()
+
+        self.assertEqual(len(self.collector.requests), 6)
+        self.assertEqual(self.collector.connections, 1)
+
+    def test_urllib_transport_opens_connection_per_batch(self):
+        gtag = self.collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2", transport=UrllibTransport()))
+
+        gtag.send(self.events)
+
+        self.assertEqual(self.collector.connections, 3)
+
+    def test_pooled_transport_evicts_idle_connections(self):
+        transport = PooledTransport(idle_timeout=0)
+        transport.post(self.collector.url + "/mp/collect", b"{}", {})
+        transport.post(self.collector.url + "/mp/collect", b"{}", {})
+
+        self.assertEqual(self.collector.connections, 2)
+
+    def test_pooled_transport_raises_http_error(self):
+        self.collector.server.status = 500
+        transport = PooledTransport()
+
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            transport.post(self.collector.url + "/mp/collect", b"{}", {})
+        self.assertEqual(raised.exception.code, 500)
+
+    def test_pooled_transport_sends_through_proxy(self):
+        transport = PooledTransport(proxies={"http": "http://user:secret@" + self.collector.url[len("http://"):]})
+        transport.post("http://collect.invalid/mp/collect?measurement_id=G-TEST", b"{}", {})
+        transport.post("http://collect.invalid/mp/collect?measurement_id=G-TEST", b"{}", {})
+
+        path, headers, _ = self.collector.requests[0]
+        self.assertEqual(path, "http://collect.invalid/mp/collect?measurement_id=G-TEST")
+        self.assertEqual(headers["Proxy-Authorization"], "Basic dXNlcjpzZWNyZXQ=")
+        self.assertEqual(self.collector.connections, 1)
+
+    def test_pooled_transport_reads_proxies_from_environment(self):
+        with unittest.mock.patch.dict(os.environ, {"http_proxy": self.collector.url, "https_proxy": "http://proxy.invalid:3128", "no_proxy": "direct.invalid"}):
+            transport = PooledTransport()
+            transport.post("http://collect.invalid/mp/collect", b"{}", {})
+            tunneled = transport._new_connection(("https", "www.google-analytics.com", None))
+            direct = transport._new_connection(("https", "direct.invalid", None))
+
+        self.assertEqual(self.collector.requests[0][0], "http://collect.invalid/mp/collect")
+        self.assertEqual((tunneled.host, tunneled.port), ("proxy.invalid", 3128))
+        self.assertEqual(tunneled._tunnel_host, "www.google-analytics.com")
+        self.assertEqual(direct.host, "direct.invalid")
+
+if __name__ == "__main__":
+    unittest.main()
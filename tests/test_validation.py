@@ -0,0 +1,106 @@
+import asyncio
+import json
+import tempfile
+import unittest
+import os, sys
+
+sys.path.append(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from ga4mp.aio import AsyncGtagMP
+from ga4mp.event import Event
+from ga4mp.ga4mp import FirebaseMP, GtagMP
+from ga4mp.validation import LocalValidator
+from tests.collector import LocalCollector
+
+class TestLocalValidator(unittest.TestCase):
+    def codes(self, response):
+        return sorted((message["fieldPath"], message["validationCode"]) for message in response["validationMessages"])
+
+    def test_valid_request(self):
+        request = {"client_id": "1.2", "user_properties": {"plan": {"value": "gold"}}, "events": [{"name": "test_event", "params": {"page_title": "x" * 300, "value": 1.5}}]}
+        self.assertEqual(LocalValidator().validate_request(request), {"validationMessages": []})
+
+    def test_invalid_request(self):
+        request = {
+            "user_properties": {"ga_plan": {"value": "gold"}, "tier": {"value": "x" * 37}},
+            "events": [
+                {"name": "1st_event", "params": {"label": "x" * 101, "firebase_x": 1, "items": [{"price": 1}]}},
+                {"name": "session_start", "params": {"p%d" % i: i for i in range(26)}},
+                {"name": "x" * 41},
+            ],
+        }
+        self.assertEqual(self.codes(LocalValidator().validate_request(request)), [
+            ("client_id", "VALUE_REQUIRED"),
+            ("events[0].name", "NAME_INVALID"),
+            ("events[0].params.firebase_x", "NAME_RESERVED"),
+            ("events[0].params.items[0]", "VALUE_REQUIRED"),
+            ("events[0].params.label", "VALUE_OUT_OF_BOUNDS"),
+            ("events[1].name", "NAME_RESERVED"),
+            ("events[1].params", "EXCEEDED_MAX_ENTITIES"),
+            ("events[2].name", "NAME_INVALID"),
+            ("user_properties.ga_plan", "NAME_RESERVED"),
+            ("user_properties.tier.value", "VALUE_OUT_OF_BOUNDS"),
+        ])
+
+    def test_catalog_check(self):
+        events = [{"name": "level_up", "params": {"level": 2}}]
+        self.assertEqual(LocalValidator().validate_events(events), {"validationMessages": []})
+        self.assertEqual(self.codes(LocalValidator(check_catalog=True).validate_events(events)), [("events[0].params.character", "VALUE_REQUIRED")])
+
+    def test_validate_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as events_file:
+            events_file.write(json.dumps({"name": "test_event", "params": {}}) + "\n")
+            events_file.write(json.dumps({"name": "bad-name", "params": {}}) + "\n")
+            events_file.write("\n{not json\n")
+            events_file.write(json.dumps({"app_instance_id": "a", "events": [{"name": "test_event"}]}) + "\n")
+        try:
+            invalid = list(LocalValidator().validate_file(events_file.name))
+        finally:
+            os.remove(events_file.name)
+        self.assertEqual([line for line, _ in invalid], [2, 4, 5])
+
+    def test_tracker_validates_locally(self):
+        event = Event("test_event")
+        event.set_event_param("label", "ok")
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2")
+        self.assertEqual(ga.validate_locally([event] * 30), {"validationMessages": []})
+        self.assertNotIn("session_id", event["params"])
+
+        firebase = FirebaseMP(api_secret="SECRET", firebase_app_id="APP", app_instance_id="")
+        self.assertEqual(self.codes(firebase.validate_locally([event])), [("app_instance_id", "VALUE_REQUIRED")])
+
+    def test_debug_hits_can_be_sampled(self):
+        with LocalCollector() as collector:
+            ga = collector.attach(GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            events = [{"name": "test_event", "params": {}}]
+            ga.validate_locally(events, debug_sample_rate=0.0)
+            ga.validate_locally(events, debug_sample_rate=1.0)
+            self.assertEqual([path.split("?")[0] for path, _, _ in collector.requests], ["/debug/mp/collect"])
+        self.assertEqual(events, [{"name": "test_event", "params": {}}])
+
+    def test_oversized_events_are_reported(self):
+        ga = GtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2")
+        events = [{"name": "test_event", "params": {}}, {"name": "test_event", "params": {"note": "x" * 140000}}, {"name": "test_event", "params": {"note": "x" * 140000}}]
+        response = ga.validate_locally(events)
+        self.assertEqual([message["fieldPath"] for message in response["validationMessages"][:2]], ["events[1]", "events[2]"])
+        self.assertEqual({message["validationCode"] for message in response["validationMessages"][:2]}, {"VALUE_OUT_OF_BOUNDS"})
+
+    def test_async_debug_hits_are_awaited(self):
+        async def run(ga):
+            events = [{"name": "test_event", "params": {}}]
+            local = await ga.validate_locally(events)
+            sampled = await ga.validate_locally(events, debug_sample_rate=1.0)
+            await ga.close()
+            return local, sampled
+
+        with LocalCollector() as collector:
+            ga = collector.attach(AsyncGtagMP(api_secret="SECRET", measurement_id="G-TEST", client_id="1.2"))
+            local, sampled = asyncio.run(run(ga))
+            self.assertEqual([path.split("?")[0] for path, _, _ in collector.requests], ["/debug/mp/collect"])
+        self.assertEqual(local, {"validationMessages": []})
+        self.assertEqual(sampled, {"validationMessages": []})
+
+if __name__ == "__main__":
+    unittest.main()